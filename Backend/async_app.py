@@ -0,0 +1,85 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pymongo.errors import PyMongoError
+from database import MONGODB_WARM_UP, error_status, find_condition, grocery_list, parse_find
+from async_database import Database_Query, explain, find, get_client, health, start, stream_json
+
+# ASGI version of app.py on PyMongo's async API: the same routes and responses, but a
+# request waiting on Mongo no longer holds a worker, so one process multiplexes many
+# concurrent requests over the shared connection pool. Run with an ASGI server, e.g.
+#     uvicorn async_app:app --port 5000
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Same as app.py's warm_up: connect and create the indexes without delaying startup
+    task = asyncio.create_task(start()) if MONGODB_WARM_UP else None
+    yield
+    if task is not None:
+        task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+async def request_json(request: Request):
+    # Flask's get_json(silent=True): None for an empty or malformed body
+    body = await request.body()
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+def json_response(result, status: int = 200) -> Response:
+    return Response(json.dumps(result, default=str), status, media_type="application/json")
+
+
+@app.get("/test")
+async def test():
+    status = await health()
+    return JSONResponse({"status": "ok" if status["ok"] else "unavailable", "mongo": status}, 200 if status["ok"] else 503)
+
+
+@app.api_route("/database/find", methods=["GET", "POST"])
+async def databaseFind(request: Request):
+    try:
+        query = parse_find(await request_json(request))
+        collection = grocery_list(get_client())
+        verbosity = request.query_params.get("explain", "false")
+        if verbosity.lower() != "false":
+            plan = await explain(collection, query, find_condition(query), "queryPlanner" if verbosity.lower() == "true" else verbosity)
+            return json_response(plan)
+        cursor = await find(collection, query)
+        first = await cursor.to_list(1)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+    except PyMongoError as e:
+        return JSONResponse({"error": str(e)}, error_status(e))
+    return StreamingResponse(stream_json(first, cursor, query["paged"], query["limit"]), media_type="application/json")
+
+
+async def write_response(type, request: Request):
+    try:
+        result = await Database_Query(type, await request_json(request), get_client())
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+    except PyMongoError as e:
+        return JSONResponse({"error": str(e)}, error_status(e))
+    status = 207 if result.get("write_errors") or result.get("write_concern_errors") else 200
+    return json_response(result, status)
+
+
+@app.post("/database/insert")
+async def databaseInsert(request: Request):
+    return await write_response("insert", request)
+
+
+@app.post("/database/update")
+async def databaseUpdate(request: Request):
+    return await write_response("update", request)
@@ -0,0 +1,154 @@
+import json
+import logging
+import pymongo
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+import indexes
+from database import MONGODB_URI, MONGODB_CREATE_INDEXES, MONGODB_SERVER_SELECTION_TIMEOUT_MS, HEALTH_CHECK_TIMEOUT_SECONDS
+from database import client_options, grocery_list, find_condition, parse_find, parse_write, json_open, json_close
+from database import check_documents, insert_result, update_operations, update_result, write_collection
+from indexes import GROCERY_LIST_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts of database.py and indexes.py on PyMongo's async API, used by async_app.
+# Function names and behaviour mirror the sync modules one for one; parsing, result
+# formatting and the plan caches are shared with them.
+
+
+# ------------------------------------
+# CLIENT
+# ------------------------------------
+_client = None
+
+
+def create_client(uri: str = None, **overrides):
+    return AsyncMongoClient(uri or MONGODB_URI, connect=False, **{**client_options(), **overrides})
+
+
+def get_client():
+    """The process-wide async client, created on first use; only ever touched from the event loop."""
+    global _client
+    if _client is None:
+        _client = create_client()
+    return _client
+
+
+def set_client(client):
+    global _client
+    _client = client
+
+
+async def health(client=None, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS) -> dict:
+    client = client or get_client()
+    try:
+        with pymongo.timeout(timeout):
+            await client.admin.command("ping")
+    except PyMongoError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True}
+
+
+async def start():
+    """Background startup task: connect, then create the indexes."""
+    if (await health(timeout=MONGODB_SERVER_SELECTION_TIMEOUT_MS / 1000))["ok"] and MONGODB_CREATE_INDEXES:
+        await ensure_indexes(grocery_list(get_client()))
+
+
+# ------------------------------------
+# INDEXES
+# ------------------------------------
+async def ensure_indexes(collection, indexes: list = GROCERY_LIST_INDEXES) -> list:
+    try:
+        names = await collection.create_indexes(indexes)
+    except OperationFailure as e:
+        logger.error(f"Could not create indexes on {collection.full_name}: {e}")
+        return []
+    logger.info(f"Indexes on {collection.full_name}: {', '.join(names)}")
+    return names
+
+
+async def explain(collection, query: dict, condition: dict, verbosity: str = "queryPlanner") -> dict:
+    command = indexes.find_command(collection, query, condition)
+    return await collection.database.command("explain", command, verbosity=indexes.explain_verbosity(verbosity))
+
+
+async def check_collscan(collection, query: dict, condition: dict):
+    if not indexes.COLLSCAN_WARN_DOCUMENTS:
+        return
+    try:
+        count = indexes.cached_count(collection)
+        if count is None:
+            count = indexes.remember_count(collection, await collection.estimated_document_count())
+        if count <= indexes.COLLSCAN_WARN_DOCUMENTS:
+            return
+        key = indexes.plan_key(collection, query, condition)
+        stages = indexes.cached_stages(key)
+        if stages is None:
+            stages = indexes.remember_stages(key, await explain(collection, query, condition))
+    except PyMongoError as e:
+        logger.debug(f"COLLSCAN check failed: {e}")
+        return
+    if "COLLSCAN" in stages:
+        indexes.warn_collscan(collection, count, query, condition)
+
+
+# ------------------------------------
+# FIND
+# ------------------------------------
+async def find(collection, query: dict):
+    condition = find_condition(query)
+    await check_collscan(collection, query, condition)
+    cursor = collection.find(condition, query["projection"])
+    if query["sort"]:
+        cursor = cursor.sort(query["sort"])
+    return cursor.skip(query["skip"]).limit(query["limit"]).batch_size(query["batch_size"])
+
+
+async def stream_json(first: list, cursor, paged: bool = False, limit: int = 0):
+    """database.stream_json over the documents already fetched (first) and then the rest of cursor."""
+    yield json_open(paged)
+    count = 0
+    last_id = None
+
+    async def documents():
+        for document in first:
+            yield document
+        async for document in cursor:
+            yield document
+
+    async for document in documents():
+        yield ("," if count else "") + json.dumps(document, default=str)
+        count += 1
+        last_id = document.get("_id")
+    yield json_close(paged, limit, count, last_id)
+
+
+# ------------------------------------
+# WRITES
+# ------------------------------------
+async def insert_documents(collection, documents: list, ordered: bool = False) -> dict:
+    check_documents(documents)
+    try:
+        return insert_result(documents, ordered, result=await collection.insert_many(documents, ordered=ordered))
+    except BulkWriteError as e:
+        return insert_result(documents, ordered, details=e.details)
+
+
+async def update_documents(collection, operations: list, ordered: bool = False) -> dict:
+    requests = update_operations(operations)
+    try:
+        return update_result(result=await collection.bulk_write(requests, ordered=ordered))
+    except BulkWriteError as e:
+        return update_result(details=e.details)
+
+
+async def Database_Query(type, query, client):
+    if type == "find":
+        return await find(grocery_list(client), parse_find(query))
+    if type == "insert":
+        query = parse_write(query, "documents")
+        return await insert_documents(write_collection(grocery_list(client), query), query["documents"], query["ordered"])
+    if type == "update":
+        query = parse_write(query, "operations")
+        return await update_documents(write_collection(grocery_list(client), query), query["operations"], query["ordered"])
@@ -0,0 +1,104 @@
+"""Load benchmark: sync (threadpool) handlers vs. AsyncEngine handlers.
+
+Both modes run the same FastAPI app against the same database; only
+USE_ASYNC_DB differs. Each mode runs in its own process because the engine
+is chosen when review_backend.database is imported.
+
+Keep --concurrency under the threadpool size (40) for the sync run against
+the default pool: past that, sync handlers can starve the threads needed to
+return connections and the run stalls on pool timeouts.
+
+    cd Backend
+    python -m benchmarks.bench_async_db --database-url sqlite:///./bench.db
+    python -m benchmarks.bench_async_db --database-url mysql://user:pw@localhost:3306/grocery_tracker
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def seed(database_url: str, rows: int):
+    os.environ["DATABASE_URL"] = database_url
+    from review_backend import models
+    from review_backend.database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(models.Store).count() < rows:
+            db.add_all(
+                models.Store(store_name=f"Store {i}", store_location=f"{i} Broad St, Elizabeth, NJ 07201")
+                for i in range(rows)
+            )
+            db.commit()
+    finally:
+        db.close()
+
+
+async def drive(path: str, requests: int, concurrency: int):
+    import httpx
+    from review_backend.main import app
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def run_mode(args, mode: str):
+    env = dict(os.environ, DATABASE_URL=args.database_url, USE_ASYNC_DB="true" if mode == "async" else "false")
+    cmd = [
+        sys.executable, "-m", "benchmarks.bench_async_db", "--worker",
+        "--path", args.path, "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+    ]
+    output = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--path", default="/stores/?limit=50")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args.path, args.requests, args.concurrency))))
+        return
+
+    seed(args.database_url, args.rows)
+    for mode in ("sync", "async"):
+        result = run_mode(args, mode)
+        print(f"{mode:>5}: {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
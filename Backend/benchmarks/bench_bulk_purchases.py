@@ -0,0 +1,102 @@
+"""Bulk purchase ingestion throughput.
+
+Compares one create_purchase call per row against crud.create_purchases_bulk
+(one transaction per batch) and POST /purchases/bulk over ASGI, on SQLite by
+default. Target: 10k purchases/s sustained.
+
+    cd Backend
+    python -m benchmarks.bench_bulk_purchases --purchases 100000 --batch-size 500
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from benchmarks import common
+
+TARGET_PER_SECOND = 10_000
+ITEMS_PER_CART = 20
+
+
+def make_purchases(product_ids, cart_ids, count):
+    # Consecutive purchases share a cart, as when a client posts whole carts
+    from review_backend import schemas
+
+    now = datetime.now()
+    return [
+        schemas.PurchaseCreate(
+            product_id=random.choice(product_ids), cart_id=cart_ids[(i // ITEMS_PER_CART) % len(cart_ids)],
+            product_price=round(random.uniform(1.0, 50.0), 2), product_quantity=random.randint(1, 5),
+            on_sale=random.random() < 0.3, store_id=1, product_category="Pantry", purchased=True,
+            input_date=now,
+        )
+        for i in range(count)
+    ]
+
+
+def bench_per_row(db, purchases):
+    from review_backend import crud
+
+    start = time.perf_counter()
+    for purchase in purchases:
+        crud.create_purchase(db, purchase)
+    return len(purchases) / (time.perf_counter() - start)
+
+
+def bench_bulk(db, purchases, batch_size):
+    from review_backend import crud
+
+    start = time.perf_counter()
+    for i in range(0, len(purchases), batch_size):
+        crud.create_purchases_bulk(db, purchases[i:i + batch_size])
+    return len(purchases) / (time.perf_counter() - start)
+
+
+def bench_http(purchases, batch_size):
+    from fastapi.testclient import TestClient
+    from review_backend.main import app
+
+    payloads = [
+        [p.model_dump(mode="json") for p in purchases[i:i + batch_size]]
+        for i in range(0, len(purchases), batch_size)
+    ]
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        for payload in payloads:
+            client.post("/purchases/bulk", json=payload).raise_for_status()
+        return len(purchases) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--purchases", type=int, default=50_000)
+    parser.add_argument("--per-row", type=int, default=1_000, help="rows for the one-at-a-time baseline")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    common.configure(args.database_url)
+    common.reset_database()
+    from review_backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        product_ids, cart_ids = common.seed_reference_data(
+            db, products=1000, carts=args.purchases // ITEMS_PER_CART + 1
+        )
+        purchases = make_purchases(product_ids, cart_ids, args.purchases)
+        results = {
+            "per_row": bench_per_row(db, purchases[:args.per_row]),
+            "bulk_crud": bench_bulk(db, purchases, args.batch_size),
+        }
+    finally:
+        db.close()
+    results["bulk_http"] = bench_http(purchases, args.batch_size)
+
+    for name, rate in results.items():
+        verdict = "ok" if rate >= TARGET_PER_SECOND else "below target"
+        print(f"{name:>10}: {rate:>10,.0f} purchases/s  ({verdict})")
+
+
+if __name__ == "__main__":
+    main()
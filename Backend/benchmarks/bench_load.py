@@ -0,0 +1,342 @@
+"""API load test: realistic request mixes with latency, throughput and SQL per request.
+
+Seeds the database with review_backend.shard_generation and review_backend.bulk_import
+at --scale, then drives each scenario's weighted request mix through the ASGI app
+from --concurrency threads. For every scenario and route it reports throughput,
+p50/p95/p99, errors and SQL statements per request (from
+review_backend.instrumentation), and writes it all to a JSON file. --compare
+diffs two such files and exits non-zero on regressions past --threshold.
+
+Scenarios: browse (list and detail pages), search (product search and price
+history), checkout (resolve products, create a cart, add its purchases),
+dashboard (spending analytics) and mixed (all of them).
+
+    cd Backend
+    python -m benchmarks.bench_load --scale small --out bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.bench_load --compare bench-old.json bench-new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from benchmarks import common
+
+# Dataset sizes for shard_generation
+SCALES = {
+    "tiny": {"products": 500, "stores": 10, "carts": 1_000, "users": 20},
+    "small": {"products": 5_000, "stores": 50, "carts": 20_000, "users": 200},
+    "medium": {"products": 50_000, "stores": 200, "carts": 200_000, "users": 2_000},
+    "large": {"products": 200_000, "stores": 500, "carts": 1_000_000, "users": 10_000},
+}
+# Successful statuses; product search also answers 404 when nothing matches, which is a valid result
+OK_STATUSES = {200, 304}
+
+
+class Context:
+    """Ids and search terms sampled from the seeded database."""
+
+    def __init__(self, db):
+        from sqlalchemy import func, select
+        from review_backend import models
+
+        def column(col, limit=5000):
+            return list(db.execute(select(col).order_by(func.random()).limit(limit)).scalars())
+
+        self.product_ids = column(models.Product.product_id)
+        self.store_ids = column(models.Store.store_id)
+        self.cart_ids = column(models.Cart.cart_id)
+        self.user_ids = column(models.User.user_id)
+        names = column(models.Product.product_name, 500)
+        self.terms = sorted({word for name in names for word in name.lower().split()})
+        self.products = [
+            dict(row._mapping)
+            for row in db.execute(
+                select(models.Product.product_brand, models.Product.product_name, models.Product.product_quantity,
+                       models.Product.product_packaging, models.Product.unit_quantity, models.Product.unit_of_measurement)
+                .order_by(func.random()).limit(500)
+            )
+        ]
+        self.end_date = db.execute(select(func.max(models.Cart.purchase_date))).scalar() or date.today()
+
+
+def _typo(rng, term: str) -> str:
+    if len(term) < 4:
+        return term
+    i = rng.randrange(1, len(term) - 1)
+    return term[:i] + term[i + 1] + term[i] + term[i + 2:]
+
+
+# Each step issues one or more requests through call(method, label, path, json=None)
+def browse_products(rng, ctx, call):
+    call("GET", "/products/", f"/products/?skip={rng.randrange(0, 500)}&limit=50")
+
+
+def browse_products_page(rng, ctx, call):
+    call("GET", "/products/page/", "/products/page/?limit=50")
+
+
+def browse_product(rng, ctx, call):
+    call("GET", "/products/{product_id}", f"/products/{rng.choice(ctx.product_ids)}")
+
+
+def browse_stores(rng, ctx, call):
+    call("GET", "/stores/", "/stores/?limit=50")
+
+
+def browse_carts_page(rng, ctx, call):
+    call("GET", "/carts/page/", "/carts/page/?order=date&limit=20")
+
+
+def browse_cart(rng, ctx, call):
+    call("GET", "/carts/{cart_id}/expanded", f"/carts/{rng.choice(ctx.cart_ids)}/expanded")
+
+
+def browse_cart_purchases(rng, ctx, call):
+    call("GET", "/purchases/cart/{cart_id}", f"/purchases/cart/{rng.choice(ctx.cart_ids)}")
+
+
+def search_exact(rng, ctx, call):
+    call("GET", "/products/search/", f"/products/search/?search={rng.choice(ctx.terms)}")
+
+
+def search_typo(rng, ctx, call):
+    call("GET", "/products/search/", f"/products/search/?search={_typo(rng, rng.choice(ctx.terms))}")
+
+
+def price_history(rng, ctx, call):
+    call("GET", "/products/{product_id}/price-history", f"/products/{rng.choice(ctx.product_ids)}/price-history")
+
+
+def checkout(rng, ctx, call):
+    # A receipt: resolve its products, create the cart, add the purchases in one call
+    items = [dict(rng.choice(ctx.products)) for _ in range(rng.randint(5, 15))]
+    resolved = call("PUT", "/products/resolve/batch", "/products/resolve/batch", {"products": items})
+    if resolved is None:
+        return
+    store_id = rng.choice(ctx.store_ids)
+    cart = call("POST", "/carts/", "/carts/", {
+        "purchase_date": ctx.end_date.isoformat(), "cart_total": 0.0,
+        "user_id": rng.choice(ctx.user_ids), "store_id": store_id,
+    })
+    if cart is None:
+        return
+    now = datetime.now().replace(microsecond=0).isoformat()
+    purchases = [
+        {
+            "product_id": product_id, "cart_id": cart["cart_id"], "product_price": round(rng.uniform(0.5, 20), 2),
+            "product_quantity": rng.randint(1, 4), "on_sale": rng.random() < 0.2, "store_id": store_id,
+            "product_category": "", "purchased": True, "input_date": now,
+        }
+        for product_id in resolved["product_ids"]
+    ]
+    call("POST", "/carts/{cart_id}/purchases", f"/carts/{cart['cart_id']}/purchases", purchases)
+
+
+def _dashboard_range(rng, ctx):
+    start = ctx.end_date - timedelta(days=rng.choice([30, 90, 365]))
+    return f"start_date={start.isoformat()}&end_date={ctx.end_date.isoformat()}"
+
+
+def dashboard_spending(rng, ctx, call):
+    granularity = rng.choice(["day", "week", "month"])
+    call("GET", "/analytics/spending",
+         f"/analytics/spending?user_id={rng.choice(ctx.user_ids)}&granularity={granularity}&{_dashboard_range(rng, ctx)}")
+
+
+def dashboard_stores(rng, ctx, call):
+    call("GET", "/analytics/spending/stores", f"/analytics/spending/stores?user_id={rng.choice(ctx.user_ids)}&{_dashboard_range(rng, ctx)}")
+
+
+def dashboard_products(rng, ctx, call):
+    call("GET", "/analytics/spending/products", f"/analytics/spending/products?user_id={rng.choice(ctx.user_ids)}&{_dashboard_range(rng, ctx)}")
+
+
+def dashboard_sales(rng, ctx, call):
+    call("GET", "/analytics/spending/sales", f"/analytics/spending/sales?user_id={rng.choice(ctx.user_ids)}&{_dashboard_range(rng, ctx)}")
+
+
+# (weight, step) per scenario
+SCENARIOS = {
+    "browse": [
+        (3, browse_products), (2, browse_products_page), (4, browse_product), (1, browse_stores),
+        (2, browse_carts_page), (3, browse_cart), (1, browse_cart_purchases),
+    ],
+    "search": [(6, search_exact), (2, search_typo), (2, price_history)],
+    "checkout": [(1, checkout)],
+    "dashboard": [(3, dashboard_spending), (2, dashboard_stores), (2, dashboard_products), (1, dashboard_sales)],
+}
+# Share of steps each scenario gets in the mixed run
+MIXED_SHARES = {"browse": 0.5, "search": 0.25, "checkout": 0.1, "dashboard": 0.15}
+SCENARIOS["mixed"] = [
+    (share * weight / sum(w for w, _ in SCENARIOS[name]), step)
+    for name, share in MIXED_SHARES.items()
+    for weight, step in SCENARIOS[name]
+]
+
+
+def seed(scale: dict, seed_value: int):
+    from review_backend import bulk_import, shard_generation
+    from review_backend.database import SessionLocal
+
+    with tempfile.TemporaryDirectory() as directory:
+        shard_generation.generate_dataset(
+            directory, scale["products"], scale["stores"], scale["carts"], scale["users"], seed=seed_value, workers=1,
+        )
+        db = SessionLocal()
+        try:
+            bulk_import.import_dataset(db, directory)
+        finally:
+            db.close()
+
+
+def _statement_totals() -> dict:
+    from review_backend.instrumentation import request_metrics
+
+    with request_metrics._lock:
+        return {f"{method} {route}": (h.sum, h.count) for (method, route), h in request_metrics.statements.items()}
+
+
+def run_scenario(client, ctx, name: str, requests: int, concurrency: int, seed_value: int) -> dict:
+    weights, steps = zip(*SCENARIOS[name])
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def call(method, label, path, body=None):
+        start = time.perf_counter()
+        response = client.request(method, path, json=body)
+        elapsed = time.perf_counter() - start
+        key = f"{method} {label}"
+        ok = response.status_code in OK_STATUSES or (label == "/products/search/" and response.status_code == 404)
+        with lock:
+            latencies[key].append(elapsed)
+            if not ok:
+                errors[key] += 1
+        return response.json() if response.status_code == 200 else None
+
+    def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        for _ in range(requests // concurrency + (index < requests % concurrency)):
+            rng.choices(steps, weights)[0](rng, ctx, call)
+
+    before = _statement_totals()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = _statement_totals()
+
+    routes = {}
+    for key, values in sorted(latencies.items()):
+        statements, count = (a - b for a, b in zip(after.get(key, (0, 0)), before.get(key, (0, 0))))
+        routes[key] = {
+            **common.summarize(values), "errors": errors[key],
+            "queries_per_request": round(statements / count, 2) if count else None,
+        }
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "steps": requests, "requests": len(everything), "errors": sum(errors.values()), "seconds": round(elapsed, 3),
+        "rps": round(len(everything) / elapsed, 1), **common.summarize(everything), "routes": routes,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    regressions = 0
+    print(f"{'scenario':<10} {'metric':<8} {'base':>10} {'new':>10} {'change':>8}")
+    for name, result in new["scenarios"].items():
+        if name not in base["scenarios"]:
+            continue
+        for metric, higher_is_better in (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)):
+            old, current = base["scenarios"][name][metric], result[metric]
+            change = (current - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"{name:<10} {metric:<8} {old:>10} {current:>10} {change:>+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="steps per scenario (a checkout step is three requests)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--async-db", action="store_true", help="run with USE_ASYNC_DB=true")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the database from a previous run")
+    parser.add_argument("--out", default="bench_load.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="diff two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    # Queries per request come from the instrumentation middleware, so metrics stay on
+    common.configure(args.database_url, USE_ASYNC_DB="true" if args.async_db else "false", METRICS_ENABLED="true")
+    if not args.skip_seed:
+        common.reset_database()
+        started = time.perf_counter()
+        seed(SCALES[args.scale], args.seed)
+        print(f"seeded {args.scale} dataset in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    import sqlalchemy
+    from fastapi.testclient import TestClient
+    from review_backend.database import SessionLocal, engine
+    from review_backend.main import app
+
+    db = SessionLocal()
+    try:
+        ctx = Context(db)
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    results = {
+        "meta": {
+            "commit": _git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "sqlalchemy": sqlalchemy.__version__, "database": engine.dialect.name,
+            "async_db": args.async_db, "scale": args.scale, "dataset": SCALES[args.scale], "seed": args.seed,
+            "requests": args.requests, "concurrency": args.concurrency, "cpus": os.cpu_count(),
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        result = run_scenario(client, ctx, name, args.requests, args.concurrency, args.seed)
+        results["scenarios"][name] = result
+        print(
+            f"{name:<10} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+            f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}",
+            file=sys.stderr,
+        )
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Load benchmark: the sync Flask Mongo service (app.py) vs. the ASGI one (async_app.py).
+
+Both apps serve the same /database/find request against the same mongod. The
+sync app gets --sync-workers threads, like a gunicorn sync worker pool: each
+request holds its thread for the whole Mongo round trip. The async app runs on
+one event loop with --concurrency requests in flight. The apps are driven
+in-process through httpx's WSGI/ASGI transports, so no HTTP server is needed and
+the numbers measure the apps and the driver, not the server.
+
+--delay-ms adds server-side latency per request with a $where sleep (needs
+server-side JavaScript enabled) to stand in for the round trip to a remote
+cluster, which is where the async app is expected to pull ahead.
+
+    cd Backend
+    python -m benchmarks.bench_mongo --mongodb-uri mongodb://localhost:27017 --delay-ms 20
+
+Status: results still to be collected. The script has not been run against a
+real mongod yet (mongomock has no async client and no $where, and the machine it
+was written on had no mongod and no way to download one), so nothing here is a
+measurement. To collect them, start a throwaway server, then run once without
+and once with the simulated latency:
+
+    docker run -d --rm --name bench-mongo -p 27017:27017 mongo:7
+    python -m benchmarks.bench_mongo --out mongo_local.json
+    python -m benchmarks.bench_mongo --delay-ms 20 --out mongo_delay20.json
+    docker stop bench-mongo
+
+The first run seeds --rows documents into the grocery_bench database; later runs
+reuse them. Each mode prints its requests per second and p50/p99 latency. What
+the design predicts, to be confirmed by the first run: on a local mongod with no
+delay both apps are bound by Python and should come out close. With --delay-ms
+the sync app should top out near sync-workers * 1000 / delay-ms req/s, while the
+async app scales with --concurrency until the server or the pool
+(MONGODB_MAX_POOL_SIZE is raised to match) runs out. Record the mongod version,
+the hardware and both JSON files with the results.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+BENCH_DATABASE = "grocery_bench"
+
+
+def seed(rows: int):
+    from database import create_client, grocery_list
+
+    client = create_client()
+    collection = grocery_list(client)
+    if collection.estimated_document_count() < rows:
+        collection.drop()
+        collection.insert_many(
+            {"name": f"List {i}", "owner": f"user_{i % 100}", "items": [{"name": f"Item {j}", "quantity": j} for j in range(i % 10)]}
+            for i in range(rows)
+        )
+    client.close()
+
+
+def body(index: int, args) -> dict:
+    condition = {"owner": f"user_{index % 100}"}
+    if args.delay_ms:
+        condition["$where"] = f"sleep({args.delay_ms}) || true"
+    return {"filter": condition, "limit": args.limit}
+
+
+def run_sync(args) -> dict:
+    import httpx
+    from app import app
+
+    latencies = []
+
+    def worker(index: int):
+        with httpx.Client(transport=httpx.WSGITransport(app=app), base_url="http://bench") as client:
+            for i in range(index, args.requests, args.sync_workers):
+                start = time.perf_counter()
+                client.post("/database/find", json=body(i, args)).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sync_workers) as pool:
+        list(pool.map(worker, range(args.sync_workers)))
+    return _result(latencies, time.perf_counter() - started, args.sync_workers)
+
+
+async def run_async(args) -> dict:
+    import httpx
+    from async_app import app
+
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/database/find", json=body(i, args))
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return _result(latencies, elapsed, args.concurrency)
+
+
+def _result(latencies: list, elapsed: float, in_flight: int) -> dict:
+    return {"in_flight": in_flight, "seconds": round(elapsed, 3), "rps": round(len(latencies) / elapsed, 1), **common.summarize(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20, help="documents per find")
+    parser.add_argument("--sync-workers", type=int, default=8, help="threads serving the Flask app")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight against the ASGI app")
+    parser.add_argument("--delay-ms", type=int, default=0, help="server-side sleep per request")
+    parser.add_argument("--out", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # database.py reads its settings at import time
+    os.environ.update(
+        MONGODB_URI=args.mongodb_uri, MONGODB_DATABASE=BENCH_DATABASE, MONGODB_SERVER_API="",
+        MONGODB_WARM_UP="false", MONGODB_MAX_POOL_SIZE=str(max(args.sync_workers, args.concurrency)),
+    )
+    seed(args.rows)
+    results = {"sync": run_sync(args), "async": asyncio.run(run_async(args))}
+    for mode, result in results.items():
+        print(f"{mode:>5} ({result['in_flight']} in flight): {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
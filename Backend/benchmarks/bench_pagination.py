@@ -0,0 +1,97 @@
+"""Page-N latency: OFFSET pagination vs keyset cursors over purchases.
+
+Offset latency grows with the page number because the database reads and
+discards every skipped row; keyset pages start from an index seek and should
+stay flat.
+
+    cd Backend
+    python -m benchmarks.bench_pagination --purchases 200000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+
+def seed_purchases(db, product_ids, cart_ids, count):
+    from sqlalchemy import insert
+    from review_backend import models
+
+    start = datetime.now() - timedelta(days=730)
+    for offset in range(0, count, 10_000):
+        rows = [
+            {
+                "product_id": random.choice(product_ids), "cart_id": random.choice(cart_ids),
+                "product_quantity": random.randint(1, 5), "product_price": round(random.uniform(1, 50), 2),
+                "on_sale": False, "purchased": True,
+                "input_date": start + timedelta(minutes=random.randint(0, 730 * 24 * 60)),
+            }
+            for _ in range(min(10_000, count - offset))
+        ]
+        db.execute(insert(models.Purchase), rows)
+    db.commit()
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--purchases", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    common.configure(args.database_url)
+    common.reset_database()
+    from review_backend import crud, models
+    from review_backend.database import SessionLocal
+    from review_backend.pagination import encode_cursor
+
+    db = SessionLocal()
+    try:
+        product_ids, cart_ids = common.seed_reference_data(db, products=1000, carts=1000)
+        seed_purchases(db, product_ids, cart_ids, args.purchases)
+
+        print(f"{'skip':>8} {'offset id':>10} {'keyset id':>10} {'offset date':>12} {'keyset date':>12}  (ms)")
+        for skip in [0, 1_000, 10_000, 50_000, 100_000, args.purchases - args.page_size]:
+            if skip >= args.purchases:
+                continue
+            # Cursors for the row just before this page, computed outside the timed section
+            before_id = db.query(models.Purchase.purchase_id).order_by(models.Purchase.purchase_id).offset(max(skip - 1, 0)).first()
+            before_date = (
+                db.query(models.Purchase.input_date, models.Purchase.purchase_id)
+                .order_by(models.Purchase.input_date.desc(), models.Purchase.purchase_id.desc())
+                .offset(max(skip - 1, 0)).first()
+            )
+            id_cursor = encode_cursor("id", list(before_id)) if skip else None
+            date_cursor = encode_cursor("date", list(before_date)) if skip else None
+
+            offset_id = median_ms(lambda: crud.get_purchases(db, skip=skip, limit=args.page_size), args.repeat)
+            keyset_id = median_ms(lambda: crud.get_purchases_page(db, cursor=id_cursor, limit=args.page_size), args.repeat)
+            offset_date = median_ms(
+                lambda: db.query(models.Purchase)
+                .order_by(models.Purchase.input_date.desc(), models.Purchase.purchase_id.desc())
+                .offset(skip).limit(args.page_size).all(),
+                args.repeat,
+            )
+            keyset_date = median_ms(
+                lambda: crud.get_purchases_page(db, cursor=date_cursor, limit=args.page_size, order="date"), args.repeat
+            )
+            print(f"{skip:>8} {offset_id:>10.2f} {keyset_id:>10.2f} {offset_date:>12.2f} {keyset_date:>12.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
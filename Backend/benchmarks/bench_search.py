@@ -0,0 +1,106 @@
+"""Product search latency: in-process index vs the old ILIKE '%term%' scan.
+
+Seeds N products into the benchmark database, builds the search index from it
+and reports p50/p99 over a mix of exact, prefix, multi-word and misspelled
+queries. The ILIKE baseline is sampled with fewer queries since each one scans
+the table.
+
+    cd Backend
+    python -m benchmarks.bench_search --products 1000000
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks import common
+
+CATEGORIES = ["Beverages", "Snacks", "Dairy", "Bakery", "Meat", "Frozen", "Produce", "Pantry", "Cleaning"]
+SYLLABLES = ["ba", "co", "di", "fe", "ga", "hu", "ki", "lo", "ma", "ne", "po", "ra", "si", "tu", "ve", "zo"]
+
+
+def vocabulary(size):
+    words = ("".join(parts) for parts in itertools.product(SYLLABLES, repeat=3))
+    return list(itertools.islice(words, size))
+
+
+def seed_products(db, count, words):
+    from sqlalchemy import insert
+    from review_backend import models
+
+    rng = random.Random(7)
+    for offset in range(0, count, 20_000):
+        rows = [
+            {
+                "product_brand": f"Brand{rng.randint(1, 200)}",
+                "product_name": f"{rng.choice(words)} {rng.choice(words)} {rng.choice(CATEGORIES)}",
+                "product_quantity": float(i), "product_packaging": "Box",
+                "unit_quantity": 1.0, "unit_of_measurement": "oz",
+            }
+            for i in range(offset, min(offset + 20_000, count))
+        ]
+        db.execute(insert(models.Product), rows)
+    db.commit()
+
+
+def make_queries(words, count):
+    rng = random.Random(11)
+    queries = []
+    for i in range(count):
+        word = rng.choice(words)
+        kind = i % 4
+        if kind == 0:
+            queries.append(word)  # exact
+        elif kind == 1:
+            queries.append(word[:rng.randint(2, 4)])  # prefix, as typed
+        elif kind == 2:
+            queries.append(f"{word} {rng.choice(CATEGORIES).lower()}")  # multi-word
+        else:
+            typo = rng.randrange(len(word))
+            queries.append(word[:typo] + word[typo + 1:] if len(word) > 4 else word + "x")  # misspelled
+    return queries
+
+
+def time_queries(fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - start)
+    return common.summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--like-queries", type=int, default=50)
+    args = parser.parse_args()
+
+    common.configure(args.database_url, SEARCH_BACKEND="memory")
+    common.reset_database()
+    from review_backend import search
+    from review_backend.database import SessionLocal
+
+    words = vocabulary(args.words)
+    db = SessionLocal()
+    try:
+        seed_products(db, args.products, words)
+        start = time.perf_counter()
+        search.product_index.refresh(db)
+        print(f"index build: {time.perf_counter() - start:.1f}s for {search.product_index.size:,} products")
+
+        queries = make_queries(words, args.queries)
+        index_stats = time_queries(lambda q: search.search_products(db, q, limit=10), queries)
+        like_stats = time_queries(lambda q: search._like_search(db, q, 0, 10), queries[:args.like_queries])
+    finally:
+        db.close()
+
+    for name, stats in (("index", index_stats), ("ilike", like_stats)):
+        print(f"{name:>6}: p50 {stats['p50_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms  ({stats['count']} queries)")
+
+
+if __name__ == "__main__":
+    main()
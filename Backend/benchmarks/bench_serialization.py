@@ -0,0 +1,63 @@
+"""GET /purchases/ latency: ORM + from_orm + response_model vs the fast path.
+
+The ORM path builds a Purchase object per row, converts it with from_orm and lets
+FastAPI validate and encode the list again; the fast path selects tuples and
+encodes them once with orjson (review_backend.serialization). Both responses
+are checked to decode to the same JSON.
+
+    cd Backend
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import json
+import time
+
+from benchmarks import common
+from benchmarks.bench_pagination import seed_purchases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=common.DEFAULT_DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    common.configure(args.database_url)
+    common.reset_database()
+    from fastapi.testclient import TestClient
+    from review_backend import serialization
+    from review_backend.database import SessionLocal
+    from review_backend.main import app
+
+    db = SessionLocal()
+    try:
+        product_ids, cart_ids = common.seed_reference_data(db, products=100, carts=100)
+        seed_purchases(db, product_ids, cart_ids, args.rows)
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    path = f"/purchases/?limit={args.rows}"
+    results = {}
+    bodies = {}
+    for name, fast in (("orm_from_orm", False), ("fast_orjson", True)):
+        serialization.FAST_SERIALIZATION = fast
+        client.get(path)  # warm up
+        latencies = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+        bodies[name] = response.json()
+        results[name] = common.summarize(latencies)
+        results[name]["bytes"] = len(response.content)
+
+    assert bodies["orm_from_orm"] == bodies["fast_orjson"], "fast path changed the response body"
+    results["speedup_p50"] = round(results["orm_from_orm"]["p50_ms"] / results["fast_orjson"]["p50_ms"], 2)
+    print(json.dumps({"rows": args.rows, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
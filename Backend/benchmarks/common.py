@@ -0,0 +1,73 @@
+"""Shared setup for the benchmark scripts.
+
+review_backend.database reads its configuration at import time, so call
+configure() before anything from review_backend is imported.
+"""
+import os
+import statistics
+from datetime import date, datetime
+
+DEFAULT_DATABASE_URL = "sqlite:///./bench.db"
+BENCH_USER_ID = "bench_user"
+
+
+def configure(database_url: str = DEFAULT_DATABASE_URL, **env):
+    os.environ["DATABASE_URL"] = database_url
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    from review_backend import models
+    from review_backend.database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+
+
+def reset_database():
+    from review_backend import models
+    from review_backend.database import engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+
+def seed_reference_data(db, stores: int = 10, products: int = 100, carts: int = 10):
+    """Insert a user plus stores, products and empty carts; returns (product_ids, cart_ids)."""
+    from review_backend import models
+
+    if db.get(models.User, BENCH_USER_ID) is None:
+        db.add(models.User(user_id=BENCH_USER_ID, created_at=datetime.now()))
+    store_rows = [models.Store(store_name=f"Store {i}", store_location=f"{i} Broad St, Elizabeth, NJ 07201") for i in range(stores)]
+    db.add_all(store_rows)
+    db.flush()
+    product_rows = [
+        models.Product(
+            product_brand=f"Brand{i % 5}", product_name=f"Product {i}", product_quantity=1 + i % 10,
+            product_packaging="Box", unit_quantity=1.0, unit_of_measurement="oz",
+        )
+        for i in range(products)
+    ]
+    cart_rows = [
+        models.Cart(
+            user_id=BENCH_USER_ID, cart_name=f"Cart {i}", purchase_date=date.today(),
+            store_id=store_rows[i % stores].store_id, cart_total=0.0,
+        )
+        for i in range(carts)
+    ]
+    db.add_all(product_rows + cart_rows)
+    db.commit()
+    return [p.product_id for p in product_rows], [c.cart_id for c in cart_rows]
+
+
+def summarize(latencies: list) -> dict:
+    """p50/p95/p99 in milliseconds for a list of latencies in seconds."""
+    ordered = sorted(latencies)
+
+    def pct(q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
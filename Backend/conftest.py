@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+import pytest
+
+# review_backend.database and the Mongo modules read their settings at import time,
+# so the test configuration has to be in place before any of them is imported
+_database_dir = tempfile.mkdtemp(prefix="review_backend_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir}/test.db"
+os.environ["USE_ASYNC_DB"] = "false"
+os.environ["REFERENCE_CACHE_ENABLED"] = "false"
+os.environ["MONGODB_WARM_UP"] = "false"
+
+
+@pytest.fixture
+def engine():
+    from review_backend import models
+    from review_backend.database import engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from review_backend.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine):
+    from fastapi.testclient import TestClient
+    from review_backend.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def product_index(monkeypatch):
+    # A fresh in-process search index per test
+    from review_backend import search
+
+    index = search.ProductSearchIndex()
+    monkeypatch.setattr(search, "product_index", index)
+    return index
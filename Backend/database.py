@@ -1,13 +1,388 @@
+import base64
+import json
+import os
+import threading
+import pymongo
+from bson import json_util
+from bson.errors import InvalidBSON
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, UpdateMany, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, ConfigurationError, ConnectionFailure, PyMongoError
+from pymongo.server_api import ServerApi
+from indexes import check_collscan, ensure_indexes
+
+DATABASE_NAME = os.getenv("MONGODB_DATABASE", "grocery_project")
+COLLECTION_NAME = "grocery_list"
+
+DEFAULT_BATCH_SIZE = 500  # Documents per getMore round trip
+DEFAULT_PAGE_SIZE = 100  # Page size of cursor paging when no limit is given
+
+# Keys that mark a find body as a query object; any other body is the filter itself
+FIND_OPTIONS = ("filter", "projection", "sort", "skip", "limit", "batch_size", "cursor")
+WRITE_OPTIONS = ("ordered", "write_concern")
+WRITE_CONCERN_OPTIONS = ("w", "j", "wtimeout")
+
+
+# Connection settings; the URI carries the credentials, so it only comes from the environment
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+MONGODB_SERVER_API = os.getenv("MONGODB_SERVER_API", "1")  # Stable API version, empty to disable
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_WARM_UP = os.getenv("MONGODB_WARM_UP", "true").lower() in ("1", "true", "yes")
+MONGODB_CREATE_INDEXES = os.getenv("MONGODB_CREATE_INDEXES", "true").lower() in ("1", "true", "yes")
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("MONGODB_HEALTH_CHECK_TIMEOUT_SECONDS", "1"))
+
+
+# ------------------------------------
+# CLIENT
+# ------------------------------------
+_client = None
+_client_lock = threading.Lock()
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    if MONGODB_SERVER_API:
+        options["server_api"] = ServerApi(MONGODB_SERVER_API)
+    return options
+
+
+def create_client(uri: str = None, **overrides):
+    # connect=False: no sockets or monitor threads until the first operation
+    return pymongo.MongoClient(uri or MONGODB_URI, connect=False, **{**client_options(), **overrides})
+
+
+def get_client():
+    """The process-wide client, created on first use; its pool is shared by every request."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+
+def set_client(client):
+    """Use client (e.g. a mongomock.MongoClient in tests) instead of one built from the environment."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def health(client=None, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS) -> dict:
+    """Ping with a short deadline, so an unreachable cluster reports as down instead of hanging the caller."""
+    client = client or get_client()
+    try:
+        with pymongo.timeout(timeout):
+            client.admin.command("ping")
+    except PyMongoError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True}
+
+
+def error_status(e: PyMongoError) -> int:
+    """HTTP status for a failed operation: 503 when the cluster could not be reached in time, else 400."""
+    # ConnectionFailure covers AutoReconnect, NetworkTimeout and ServerSelectionTimeoutError;
+    # timeout is also set on ExecutionTimeout (maxTimeMS) and WTimeoutError
+    return 503 if isinstance(e, ConnectionFailure) or e.timeout else 400
+
+
+def _start():
+    if health(timeout=MONGODB_SERVER_SELECTION_TIMEOUT_MS / 1000)["ok"] and MONGODB_CREATE_INDEXES:
+        ensure_indexes(grocery_list(get_client()))
+
+
+def warm_up():
+    """Connect, fill the pool to MONGODB_MIN_POOL_SIZE and create the indexes in the background, off the startup path."""
+    if not MONGODB_WARM_UP:
+        return None
+    thread = threading.Thread(target=_start, daemon=True)
+    thread.start()
+    return thread
+
+
+def grocery_list(client):
+    return client[DATABASE_NAME][COLLECTION_NAME]
+
+
+# ------------------------------------
+# FIND
+# ------------------------------------
+def _count(options, name, default=0, minimum=0):
+    value = options.get(name, default)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"{name} must be an integer >= {minimum}")
+    return value
+
+
+def _projection(projection):
+    if projection is None or isinstance(projection, dict):
+        return projection
+    if isinstance(projection, list) and all(isinstance(field, str) for field in projection):
+        return projection
+    raise ValueError("projection must be an object or a list of field names")
+
+
+def _direction(direction):
+    if direction in (1, "asc", "ascending"):
+        return ASCENDING
+    if direction in (-1, "desc", "descending"):
+        return DESCENDING
+    raise ValueError(f"Invalid sort direction: {direction!r}")
+
+
+def _sort(sort):
+    # {"field": 1, ...}, [["field", -1], ...] or "field" / "-field"
+    if sort is None:
+        return None
+    if isinstance(sort, str):
+        return [(sort[1:], DESCENDING)] if sort.startswith("-") else [(sort, ASCENDING)]
+    if isinstance(sort, dict):
+        return [(field, _direction(direction)) for field, direction in sort.items()]
+    if isinstance(sort, list) and all(isinstance(key, list) and len(key) == 2 for key in sort):
+        return [(field, _direction(direction)) for field, direction in sort]
+    raise ValueError("sort must be an object, a list of [field, direction] pairs or a field name")
+
+
+def encode_cursor(document_id) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps(document_id).encode()).decode()
+
+
+def decode_cursor(token: str):
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(token.encode()))
+    except (TypeError, ValueError, InvalidBSON):
+        raise ValueError("Invalid cursor")
+
+
+def parse_find(body) -> dict:
+    """Normalize a /database/find body: a plain filter, or a query object with FIND_OPTIONS keys."""
+    if body is None:
+        body = {}
+    if not isinstance(body, dict):
+        raise ValueError("The find body must be a JSON object")
+    if not any(key in body for key in FIND_OPTIONS):
+        body = {"filter": body}
+    unknown = set(body) - set(FIND_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown find options: {', '.join(sorted(unknown))}")
+
+    query = {
+        "filter": body.get("filter") or {},
+        "projection": _projection(body.get("projection")),
+        "sort": _sort(body.get("sort")),
+        "skip": _count(body, "skip"),
+        "limit": _count(body, "limit"),
+        "batch_size": _count(body, "batch_size", DEFAULT_BATCH_SIZE, minimum=1),
+        # "cursor": null asks for the first page of an _id-ordered scan, a token for the next one
+        "paged": "cursor" in body,
+        "after": None,
+    }
+    if not isinstance(query["filter"], dict):
+        raise ValueError("filter must be an object")
+    if query["paged"]:
+        if query["sort"] is not None:
+            raise ValueError("Cursor paging is ordered by _id and can't be combined with sort")
+        if query["skip"]:
+            # The cursor already positions each page; a skip would be applied again on every page
+            raise ValueError("Cursor paging can't be combined with skip")
+        projection = query["projection"]
+        if isinstance(projection, dict) and projection.get("_id") in (0, False):
+            raise ValueError("Cursor paging needs _id in the projection")
+        query["sort"] = [("_id", ASCENDING)]
+        query["limit"] = query["limit"] or DEFAULT_PAGE_SIZE
+        if body["cursor"] is not None:
+            if not isinstance(body["cursor"], str):
+                raise ValueError("Invalid cursor")
+            query["after"] = decode_cursor(body["cursor"])
+    return query
+
+
+def find_condition(query: dict) -> dict:
+    condition = query["filter"]
+    if query["after"] is not None:
+        after = {"_id": {"$gt": query["after"]}}
+        condition = {"$and": [condition, after]} if condition else after
+    return condition
+
+
+def find(collection, query: dict):
+    """Cursor for a parse_find query; filter, projection, sort and paging all run on the server."""
+    condition = find_condition(query)
+    check_collscan(collection, query, condition)
+    cursor = collection.find(condition, query["projection"])
+    if query["sort"]:
+        cursor = cursor.sort(query["sort"])
+    return cursor.skip(query["skip"]).limit(query["limit"]).batch_size(query["batch_size"])
+
+
+def stream_json(documents, paged: bool = False, limit: int = 0):
+    """Yield the documents as a JSON array one at a time instead of building the whole list.
+
+    Paged queries are wrapped as {"documents": [...], "next_cursor": ...}; next_cursor is null
+    once a page comes back short.
+    """
+    yield json_open(paged)
+    count = 0
+    last_id = None
+    for document in documents:
+        yield ("," if count else "") + json.dumps(document, default=str)
+        count += 1
+        last_id = document.get("_id")
+    yield json_close(paged, limit, count, last_id)
+
+
+def json_open(paged: bool) -> str:
+    return '{"documents": [' if paged else "["
+
+
+def json_close(paged: bool, limit: int, count: int, last_id) -> str:
+    if not paged:
+        return "]"
+    next_cursor = encode_cursor(last_id) if count and count == limit else None
+    return f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+# ------------------------------------
+# WRITES
+# ------------------------------------
+def _write_concern(options):
+    if options is None:
+        return None
+    if not isinstance(options, dict) or set(options) - set(WRITE_CONCERN_OPTIONS):
+        raise ValueError(f"write_concern must be an object with keys from {', '.join(WRITE_CONCERN_OPTIONS)}")
+    try:
+        return WriteConcern(**options)
+    except (TypeError, ValueError, ConfigurationError) as e:
+        raise ValueError(f"Invalid write_concern: {e}")
+
+
+def parse_write(body, key: str) -> dict:
+    """Normalize an insert/update body: a bare array, or {key: [...], "ordered", "write_concern"}."""
+    if isinstance(body, list):
+        body = {key: body}
+    if not isinstance(body, dict) or not isinstance(body.get(key), list) or not body[key]:
+        raise ValueError(f"{key} must be a non-empty array")
+    unknown = set(body) - {key, *WRITE_OPTIONS}
+    if unknown:
+        raise ValueError(f"Unknown write options: {', '.join(sorted(unknown))}")
+    if not isinstance(body.get("ordered", False), bool):
+        raise ValueError("ordered must be a boolean")
+    return {key: body[key], "ordered": body.get("ordered", False), "write_concern": _write_concern(body.get("write_concern"))}
+
+
+def _update_operation(operation):
+    # {"filter", "update" (operators or pipeline) or "replacement", "upsert", "multi"}
+    if not isinstance(operation, dict) or not isinstance(operation.get("filter"), dict):
+        raise ValueError("Every operation needs a filter object")
+    upsert = bool(operation.get("upsert", False))
+    if "replacement" in operation:
+        if not isinstance(operation["replacement"], dict):
+            raise ValueError("replacement must be an object")
+        return ReplaceOne(operation["filter"], operation["replacement"], upsert=upsert)
+    if not isinstance(operation.get("update"), (dict, list)):
+        raise ValueError("Every operation needs an update or a replacement")
+    update = UpdateMany if operation.get("multi") else UpdateOne
+    return update(operation["filter"], operation["update"], upsert=upsert)
+
+
+def _write_errors(details: dict) -> dict:
+    return {
+        "write_errors": [
+            {"index": error["index"], "code": error.get("code"), "message": error.get("errmsg")}
+            for error in details.get("writeErrors", [])
+        ],
+        "write_concern_errors": [
+            {"code": error.get("code"), "message": error.get("errmsg")} for error in details.get("writeConcernErrors", [])
+        ],
+    }
+
+
+def check_documents(documents: list):
+    if not all(isinstance(document, dict) for document in documents):
+        raise ValueError("documents must be objects")
+
+
+def insert_result(documents: list, ordered: bool, result=None, details: dict = None) -> dict:
+    # From the InsertManyResult, or from the BulkWriteError details when part of the batch failed
+    if details is not None:
+        errors = _write_errors(details)
+        failed = {error["index"] for error in errors["write_errors"]}
+        # insert_many assigns missing _ids up front; ordered batches stop at the first failure
+        stop = min(failed) if ordered and failed else len(documents)
+        inserted_ids = [document["_id"] for i, document in enumerate(documents[:stop]) if i not in failed]
+        return {"acknowledged": True, "inserted_count": details.get("nInserted", len(inserted_ids)), "inserted_ids": inserted_ids, **errors}
+    if not result.acknowledged:
+        return {"acknowledged": False}
+    return {
+        "acknowledged": True,
+        "inserted_count": len(result.inserted_ids),
+        "inserted_ids": result.inserted_ids,
+        "write_errors": [],
+        "write_concern_errors": [],
+    }
+
+
+def insert_documents(collection, documents: list, ordered: bool = False) -> dict:
+    """insert_many; unordered by default, so one bad document doesn't stop the rest of the batch."""
+    check_documents(documents)
+    try:
+        return insert_result(documents, ordered, result=collection.insert_many(documents, ordered=ordered))
+    except BulkWriteError as e:
+        return insert_result(documents, ordered, details=e.details)
+
+
+def update_operations(operations: list) -> list:
+    return [_update_operation(operation) for operation in operations]
+
+
+def update_result(result=None, details: dict = None) -> dict:
+    # From the BulkWriteResult, or from the BulkWriteError details when part of the batch failed
+    if details is None:
+        if not result.acknowledged:
+            return {"acknowledged": False}
+        details = result.bulk_api_result
+    return {
+        "acknowledged": True,
+        "matched_count": details.get("nMatched", 0),
+        "modified_count": details.get("nModified", 0),
+        "upserted_count": details.get("nUpserted", 0),
+        "upserted_ids": [{"index": upsert["index"], "_id": upsert["_id"]} for upsert in details.get("upserted", [])],
+        **_write_errors(details),
+    }
+
+
+def update_documents(collection, operations: list, ordered: bool = False) -> dict:
+    """Every operation in one bulk_write, so a whole grocery list syncs in one request."""
+    requests = update_operations(operations)
+    try:
+        return update_result(result=collection.bulk_write(requests, ordered=ordered))
+    except BulkWriteError as e:
+        return update_result(details=e.details)
+
+
+def write_collection(collection, query: dict):
+    if query["write_concern"] is not None:
+        return collection.with_options(write_concern=query["write_concern"])
+    return collection
+
+
+def _write(client, query: dict, key: str, write):
+    return write(write_collection(grocery_list(client), query), query[key], query["ordered"])
+
+
 def Database_Query(type, query, client):
     if type == "find":
-        response = []
-        database = client["grocery_project"]
-        collection = database["grocery_list"]
-        results = collection.find(query)
-        for result in results:
-            response.append(result)
-        return response
+        return find(grocery_list(client), parse_find(query))
     if type == "insert":
-        pass
+        return _write(client, parse_write(query, "documents"), "documents", insert_documents)
     if type == "update":
-        pass
\ No newline at end of file
+        return _write(client, parse_write(query, "operations"), "operations", update_documents)
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+import time
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Indexes of grocery_project.grocery_list and query plan tooling. ensure_indexes() is
+# idempotent (create_indexes is a no-op for an index that already exists with the same
+# spec), so it runs on every startup. check_collscan() explains each new query shape
+# once and logs a warning when it is a collection scan over a large collection.
+
+# Nothing in this repo queries the Mongo service yet, so the default indexes assume the
+# grocery list shape the frontend works with, {"name": ..., "items": [{"name", "quantity"}]},
+# and lookups by list name or by item name. Deployments whose clients filter or sort on
+# other fields set MONGODB_INDEXES to a JSON list of index keys instead, for example
+#     MONGODB_INDEXES='[[["owner", 1], ["name", 1]], [["items.name", 1]]]'
+# ("[]" for none); the COLLSCAN warning below names the queries that still miss.
+DEFAULT_GROCERY_LIST_INDEXES = [
+    IndexModel([("name", ASCENDING)], name="name_1"),
+    # Multikey: lists containing an item
+    IndexModel([("items.name", ASCENDING)], name="items_name_1"),
+]
+
+
+def parse_indexes(text: str) -> list:
+    """IndexModels from a MONGODB_INDEXES value: a JSON list of [[field, direction], ...] key lists."""
+    try:
+        specs = json.loads(text)
+    except ValueError:
+        raise ValueError("MONGODB_INDEXES must be JSON")
+    if not isinstance(specs, list):
+        raise ValueError("MONGODB_INDEXES must be a list of index keys")
+    indexes = []
+    for keys in specs:
+        if not isinstance(keys, list) or not keys or not all(
+            isinstance(key, list) and len(key) == 2 and isinstance(key[0], str) and isinstance(key[1], (int, str))
+            for key in keys
+        ):
+            raise ValueError(f"Invalid index keys in MONGODB_INDEXES: {json.dumps(keys)}")
+        indexes.append(IndexModel([tuple(key) for key in keys]))
+    return indexes
+
+
+GROCERY_LIST_INDEXES = parse_indexes(os.environ["MONGODB_INDEXES"]) if os.getenv("MONGODB_INDEXES") else DEFAULT_GROCERY_LIST_INDEXES
+
+# Collection scans over collections larger than this many documents are logged; 0 disables the check
+COLLSCAN_WARN_DOCUMENTS = int(os.getenv("MONGODB_COLLSCAN_WARN_DOCUMENTS", "10000"))
+COUNT_CACHE_SECONDS = 60  # How long an estimated document count is reused
+PLAN_CACHE_SIZE = 1024  # Query shapes whose plan stages are remembered
+EXPLAIN_VERBOSITIES = ("queryPlanner", "executionStats", "allPlansExecution")
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counts = {}  # collection full name -> (estimated count, expires at)
+_plans = {}  # (collection full name, query shape) -> set of winning plan stages
+
+
+def ensure_indexes(collection, indexes: list = GROCERY_LIST_INDEXES) -> list:
+    """Create the declared indexes that don't exist yet; returns the index names."""
+    try:
+        names = collection.create_indexes(indexes)
+    except OperationFailure as e:
+        # An index with the same name or keys but other options; leave it for a manual migration
+        logger.error(f"Could not create indexes on {collection.full_name}: {e}")
+        return []
+    logger.info(f"Indexes on {collection.full_name}: {', '.join(names)}")
+    return names
+
+
+# ------------------------------------
+# EXPLAIN
+# ------------------------------------
+def find_command(collection, query: dict, condition: dict) -> dict:
+    # The find command the parse_find query runs as
+    command = {"find": collection.name, "filter": condition}
+    projection = query.get("projection")
+    if projection is not None:
+        command["projection"] = {field: 1 for field in projection} if isinstance(projection, list) else projection
+    if query.get("sort"):
+        command["sort"] = dict(query["sort"])
+    if query.get("skip"):
+        command["skip"] = query["skip"]
+    if query.get("limit"):
+        command["limit"] = query["limit"]
+    return command
+
+
+def explain_verbosity(verbosity: str) -> str:
+    if verbosity not in EXPLAIN_VERBOSITIES:
+        raise ValueError(f"explain must be true or one of {', '.join(EXPLAIN_VERBOSITIES)}")
+    return verbosity
+
+
+def explain(collection, query: dict, condition: dict, verbosity: str = "queryPlanner") -> dict:
+    command = find_command(collection, query, condition)
+    return collection.database.command("explain", command, verbosity=explain_verbosity(verbosity))
+
+
+def plan_stages(plan) -> set:
+    """Every stage name in an explain plan tree (classic inputStage(s) or SBE queryPlan)."""
+    stages = set()
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= plan_stages(value)
+    return stages
+
+
+def query_shape(value):
+    """The filter with its values blanked out, so queries differing only in constants share a plan."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [query_shape(item) for item in value]
+    return 1
+
+
+def cached_count(collection):
+    with _lock:
+        cached = _counts.get(collection.full_name)
+    return cached[0] if cached and cached[1] > time.monotonic() else None
+
+
+def remember_count(collection, count: int) -> int:
+    with _lock:
+        _counts[collection.full_name] = (count, time.monotonic() + COUNT_CACHE_SECONDS)
+    return count
+
+
+def plan_key(collection, query: dict, condition: dict) -> tuple:
+    return collection.full_name, json.dumps([query_shape(condition), query.get("sort")], sort_keys=True, default=str)
+
+
+def cached_stages(key: tuple):
+    with _lock:
+        return _plans.get(key)
+
+
+def remember_stages(key: tuple, plan: dict) -> set:
+    stages = plan_stages(plan.get("queryPlanner", {}).get("winningPlan", {}))
+    with _lock:
+        if len(_plans) >= PLAN_CACHE_SIZE:
+            _plans.clear()
+        _plans[key] = stages
+    return stages
+
+
+def warn_collscan(collection, count: int, query: dict, condition: dict):
+    logger.warning(
+        f"COLLSCAN on {collection.full_name} (~{count} documents): filter {json.dumps(condition, default=str)}"
+        f" sort {query.get('sort')}; add an index for it to MONGODB_INDEXES"
+    )
+
+
+def check_collscan(collection, query: dict, condition: dict):
+    """Log a warning when the query runs as a COLLSCAN over more than COLLSCAN_WARN_DOCUMENTS documents."""
+    if not COLLSCAN_WARN_DOCUMENTS:
+        return
+    try:
+        count = cached_count(collection)
+        if count is None:
+            count = remember_count(collection, collection.estimated_document_count())
+        if count <= COLLSCAN_WARN_DOCUMENTS:
+            return
+        key = plan_key(collection, query, condition)
+        stages = cached_stages(key)
+        if stages is None:
+            stages = remember_stages(key, explain(collection, query, condition))
+    except PyMongoError as e:
+        logger.debug(f"COLLSCAN check failed: {e}")
+        return
+    if "COLLSCAN" in stages:
+        warn_collscan(collection, count, query, condition)
+
+
+if __name__ == "__main__":
+    from database import get_client, grocery_list
+
+    logging.basicConfig(level=logging.INFO)
+    ensure_indexes(grocery_list(get_client()))
@@ -1,2 +1,2 @@
 # /home/developer/CPS5740/Backend/review_backend/__init__.py
-from review_backend import models, schema, crud  # Explicit absolute imports
+from review_backend import models, schemas, crud  # Explicit absolute imports
@@ -0,0 +1,162 @@
+import os
+from datetime import date, timedelta
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+from review_backend import models
+
+# Spending analytics. Reads come from the rollup tables maintained by
+# review_backend.rollups (user x day x store, user x month x product), so a query
+# touches O(days or months in range) rows rather than every purchase. With
+# ANALYTICS_USE_ROLLUPS off, or for product rankings over ranges that do not cover
+# whole months, each aggregate is a single GROUP BY over purchases joined to their
+# cart instead.
+ANALYTICS_USE_ROLLUPS = os.getenv("ANALYTICS_USE_ROLLUPS", "true").lower() in ("1", "true", "yes")
+
+GRANULARITIES = ("day", "week", "month")
+
+Daily = models.UserDailyStoreSpend
+Monthly = models.UserMonthlyProductSpend
+
+
+def line_amount():
+    return func.sum(models.Purchase.product_price * models.Purchase.product_quantity)
+
+
+def period_start(dialect: str, column, granularity: str):
+    """SQL expression for the first day of the day/week/month containing column.
+
+    Weeks start on Monday.
+    """
+    if dialect == "mysql":
+        if granularity == "month":
+            return func.date_format(column, "%Y-%m-01")
+        if granularity == "week":
+            return func.subdate(column, func.weekday(column))
+        return func.date(column)
+    if dialect == "postgresql":
+        return func.date(func.date_trunc(granularity, column))
+    # SQLite
+    if granularity == "month":
+        return func.strftime("%Y-%m-01", column)
+    if granularity == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column)
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _whole_months(start_date: date = None, end_date: date = None) -> bool:
+    # The monthly product rollup can only answer ranges made of whole months
+    return (start_date is None or start_date.day == 1) and (end_date is None or (end_date + timedelta(days=1)).day == 1)
+
+
+def _in_range(query, column, start_date: date = None, end_date: date = None):
+    if start_date:
+        query = query.filter(column >= start_date)
+    if end_date:
+        query = query.filter(column <= end_date)
+    return query
+
+
+def _filtered(query, user_id: str, start_date: date = None, end_date: date = None):
+    query = (
+        query.select_from(models.Purchase)
+        .join(models.Cart, models.Cart.cart_id == models.Purchase.cart_id)
+        .filter(models.Cart.user_id == user_id)
+    )
+    return _in_range(query, models.Cart.purchase_date, start_date, end_date)
+
+
+def spending_over_time(db: Session, user_id: str, granularity: str = "month", start_date: date = None, end_date: date = None):
+    dialect = db.get_bind().dialect.name
+    if ANALYTICS_USE_ROLLUPS:
+        period = period_start(dialect, Daily.day, granularity).label("period")
+        query = _in_range(
+            db.query(period, func.sum(Daily.total), func.sum(Daily.item_count)).filter(Daily.user_id == user_id),
+            Daily.day, start_date, end_date,
+        )
+    else:
+        period = period_start(dialect, models.Cart.purchase_date, granularity).label("period")
+        query = _filtered(
+            db.query(period, line_amount(), func.count(models.Purchase.purchase_id)), user_id, start_date, end_date
+        )
+    rows = query.group_by(period).order_by(period).all()
+    return [
+        {"period": _as_date(period_value), "total": round(total or 0.0, 2), "item_count": int(count or 0)}
+        for period_value, total, count in rows
+    ]
+
+
+def spending_by_store(db: Session, user_id: str, start_date: date = None, end_date: date = None):
+    if ANALYTICS_USE_ROLLUPS:
+        query = _in_range(
+            db.query(models.Store.store_id, models.Store.store_name, func.sum(Daily.total).label("total"), func.sum(Daily.item_count))
+            .select_from(Daily)
+            .join(models.Store, models.Store.store_id == Daily.store_id)
+            .filter(Daily.user_id == user_id),
+            Daily.day, start_date, end_date,
+        )
+    else:
+        query = _filtered(
+            db.query(models.Store.store_id, models.Store.store_name, line_amount().label("total"), func.count(models.Purchase.purchase_id)),
+            user_id, start_date, end_date,
+        ).join(models.Store, models.Store.store_id == models.Cart.store_id)
+    rows = query.group_by(models.Store.store_id, models.Store.store_name).order_by(literal_column("total").desc()).all()
+    return [
+        {"store_id": store_id, "store_name": store_name, "total": round(total or 0.0, 2), "item_count": int(count or 0)}
+        for store_id, store_name, total, count in rows
+    ]
+
+
+def spending_by_product(db: Session, user_id: str, start_date: date = None, end_date: date = None, limit: int = 20):
+    # Aggregate on product_id first, then join names for just the top rows
+    if ANALYTICS_USE_ROLLUPS and _whole_months(start_date, end_date):
+        query = _in_range(
+            db.query(
+                Monthly.product_id.label("product_id"),
+                func.sum(Monthly.total).label("total"),
+                func.sum(Monthly.item_count).label("item_count"),
+            ).filter(Monthly.user_id == user_id),
+            Monthly.month, start_date, end_date,
+        ).group_by(Monthly.product_id)
+    else:
+        query = _filtered(
+            db.query(
+                models.Purchase.product_id.label("product_id"),
+                line_amount().label("total"),
+                func.count(models.Purchase.purchase_id).label("item_count"),
+            ),
+            user_id, start_date, end_date,
+        ).group_by(models.Purchase.product_id)
+    totals = query.order_by(literal_column("total").desc()).limit(limit).subquery()
+    rows = (
+        db.query(models.Product.product_id, models.Product.product_name, models.Product.product_brand, totals.c.total, totals.c.item_count)
+        .join(totals, totals.c.product_id == models.Product.product_id)
+        .order_by(totals.c.total.desc())
+        .all()
+    )
+    return [
+        {"product_id": product_id, "product_name": name, "product_brand": brand, "total": round(total or 0.0, 2), "item_count": int(count or 0)}
+        for product_id, name, brand, total, count in rows
+    ]
+
+
+def spending_by_sale(db: Session, user_id: str, start_date: date = None, end_date: date = None):
+    if ANALYTICS_USE_ROLLUPS:
+        total, count, sale_total, sale_count = _in_range(
+            db.query(func.sum(Daily.total), func.sum(Daily.item_count), func.sum(Daily.sale_total), func.sum(Daily.sale_count))
+            .filter(Daily.user_id == user_id),
+            Daily.day, start_date, end_date,
+        ).one()
+        rows = [(False, (total or 0.0) - (sale_total or 0.0), (count or 0) - (sale_count or 0)), (True, sale_total, sale_count)]
+        rows = [row for row in rows if row[2]]
+    else:
+        on_sale = func.coalesce(models.Purchase.on_sale, False).label("on_sale")
+        rows = (
+            _filtered(db.query(on_sale, line_amount(), func.count(models.Purchase.purchase_id)), user_id, start_date, end_date)
+            .group_by(on_sale)
+            .all()
+        )
+    return [{"on_sale": bool(flag), "total": round(total or 0.0, 2), "item_count": int(count or 0)} for flag, total, count in rows]
@@ -0,0 +1,327 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from review_backend import schemas, models, search, rollups
+from review_backend.crud import cart_total_delta, line_total, CART_EXPANDED, GROCERY_LIST_EXPANDED
+from review_backend.crud import cart_versions_query, grocery_list_versions_query
+from review_backend.crud import product_rows_query, cart_rows_query, purchase_rows_query
+from review_backend.crud import STORES_ADAPTER, PRODUCT_ADAPTER, PACKAGING_OPTIONS_ADAPTER, UNITS_OF_MEASUREMENT_ADAPTER
+from review_backend.cache import reference_cache, MISSING
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts of review_backend.crud, used when USE_ASYNC_DB is enabled.
+# Function names and behaviour mirror crud.py one for one.
+
+
+async def _first(db: AsyncSession, stmt):
+    result = await db.execute(stmt)
+    return result.scalars().first()
+
+
+async def _all(db: AsyncSession, stmt):
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def _apply_rollups(db: AsyncSession, lines: list):
+    # Async form of rollups.apply_lines
+    result = await db.execute(rollups.cart_keys({line.cart_id for line in lines}))
+    carts = {row.cart_id: row for row in result}
+    for stmt, rows in rollups.rollup_statements(db.bind.dialect.name, lines, carts):
+        await db.execute(stmt, rows)
+
+
+async def _cached(namespace: str, key, adapter, load):
+    # Async form of reference_cache.get_or_load; load is a coroutine function
+    value = reference_cache.lookup(namespace, key, adapter)
+    if value is MISSING:
+        loaded = await load()
+        if loaded is None:
+            return None
+        value = reference_cache.store(namespace, key, adapter.validate_python(loaded), adapter)
+    return value
+
+
+async def _commit_new(db: AsyncSession, obj, label: str):
+    db.add(obj)
+    try:
+        await db.commit()
+        await db.refresh(obj)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating {label}: {e}")
+        raise e
+    return obj
+
+# ------------------------------------
+# STORE FUNCTIONS
+# ------------------------------------
+async def get_store(db: AsyncSession, store_id: int):
+    return await _first(db, select(models.Store).where(models.Store.store_id == store_id))
+
+
+async def get_store_by_name(db: AsyncSession, store_name: str):
+    return await _first(db, select(models.Store).where(models.Store.store_name == store_name))
+
+
+async def get_stores(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await _cached(
+        "stores", f"{skip}:{limit}", STORES_ADAPTER, lambda: _all(db, select(models.Store).offset(skip).limit(limit))
+    )
+
+
+async def create_store(db: AsyncSession, store: schemas.StoreCreate):
+    db_store = models.Store(
+        store_name=store.store_name,
+        store_location=store.store_location
+    )
+    db_store = await _commit_new(db, db_store, "store")
+    reference_cache.invalidate("stores")
+    return db_store
+
+# ------------------------------------
+# PRODUCT FUNCTIONS
+# ------------------------------------
+async def get_product(db: AsyncSession, product_id: int):
+    return await _cached(
+        "products", product_id, PRODUCT_ADAPTER,
+        lambda: _first(db, select(models.Product).where(models.Product.product_id == product_id)),
+    )
+
+
+async def get_products(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await _all(db, select(models.Product).offset(skip).limit(limit))
+
+
+async def get_product_rows(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await db.execute(product_rows_query(skip, limit))
+
+
+async def create_product(db: AsyncSession, product: schemas.ProductCreate):
+    db_product = models.Product(
+        product_brand=product.product_brand,
+        product_name=product.product_name,
+        product_quantity=product.product_quantity,
+        product_packaging=product.product_packaging,
+        unit_quantity=product.unit_quantity,
+        unit_of_measurement=product.unit_of_measurement
+    )
+    db_product = await _commit_new(db, db_product, "product")
+    search.index_product(db_product)
+    reference_cache.invalidate("products", db_product.product_id)
+    return db_product
+
+
+# ------------------------------------
+# CART FUNCTIONS
+# ------------------------------------
+async def get_cart(db: AsyncSession, cart_id: int):
+    return await _first(db, select(models.Cart).where(models.Cart.cart_id == cart_id))
+
+
+async def get_cart_expanded(db: AsyncSession, cart_id: int):
+    return await _first(db, select(models.Cart).options(CART_EXPANDED).where(models.Cart.cart_id == cart_id))
+
+
+async def get_carts(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await _all(db, select(models.Cart).offset(skip).limit(limit))
+
+
+async def get_cart_rows(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await db.execute(cart_rows_query(skip, limit))
+
+
+async def get_cart_versions(db: AsyncSession, skip: int = 0, limit: int = 10):
+    result = await db.execute(cart_versions_query(skip, limit))
+    return result.all()
+
+
+async def create_cart(db: AsyncSession, cart: schemas.CartCreate):
+    db_cart = models.Cart(
+        user_id=cart.user_id,
+        cart_name=cart.cart_name,
+        purchase_date=cart.purchase_date,
+        store_id=cart.store_id,
+        cart_total=cart.cart_total
+    )
+    return await _commit_new(db, db_cart, "cart")
+
+
+async def get_all_carts(db: AsyncSession):
+    return await _all(db, select(models.Cart))
+
+
+async def update_cart_total(db: AsyncSession, cart_id: int, cart_total: float):
+    cart = await get_cart(db, cart_id)
+    if not cart:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    cart.cart_total = cart_total
+    await db.commit()
+    await db.refresh(cart)
+    return cart
+
+# ------------------------------------
+# PURCHASE FUNCTIONS
+# ------------------------------------
+async def create_purchase(db: AsyncSession, purchase: schemas.PurchaseCreate):
+    db_purchase = models.Purchase(
+        cart_id=purchase.cart_id,
+        product_id=purchase.product_id,
+        product_quantity=purchase.product_quantity,
+        product_price=purchase.product_price,
+        on_sale=purchase.on_sale,
+        purchased=purchase.purchased,
+        input_date=purchase.input_date
+    )
+    await db.execute(cart_total_delta(purchase.cart_id, line_total(purchase.product_price, purchase.product_quantity)))
+    await _apply_rollups(db, [rollups.purchase_line(
+        purchase.cart_id, purchase.product_id, purchase.product_price, purchase.product_quantity, purchase.on_sale
+    )])
+    return await _commit_new(db, db_purchase, "purchase")
+
+
+async def get_purchase_by_id(db: AsyncSession, purchase_id: int):
+    return await _first(db, select(models.Purchase).where(models.Purchase.purchase_id == purchase_id))
+
+
+async def get_purchases(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return await _all(db, select(models.Purchase).offset(skip).limit(limit))
+
+
+async def get_purchase_rows(db: AsyncSession, skip: int = 0, limit: int = 10, cart_id: int = None):
+    return await db.execute(purchase_rows_query(skip, limit, cart_id))
+
+
+async def get_purchases_by_cart_id(db: AsyncSession, cart_id: int):
+    return await _all(db, select(models.Purchase).where(models.Purchase.cart_id == cart_id))
+
+
+async def read_purchases_for_product(db: AsyncSession, product_id: int):
+    return await _all(db, select(models.Purchase).where(models.Purchase.product_id == product_id))
+
+
+async def delete_purchase(db: AsyncSession, purchase_id: int):
+    purchase = await get_purchase_by_id(db, purchase_id)
+    if purchase:
+        await db.delete(purchase)
+        await db.execute(cart_total_delta(purchase.cart_id, -line_total(purchase.product_price, purchase.product_quantity)))
+        await _apply_rollups(db, [rollups.purchase_line(
+            purchase.cart_id, purchase.product_id, purchase.product_price, purchase.product_quantity, purchase.on_sale, sign=-1
+        )])
+        await db.commit()
+        return purchase
+    return None
+
+
+async def update_purchase(db: AsyncSession, purchase_id: int, purchase: schemas.PurchaseUpdate):
+    db_purchase = await get_purchase_by_id(db, purchase_id)
+    if not db_purchase:
+        raise HTTPException(status_code=404, detail="Purchase not found")
+    old_total = line_total(db_purchase.product_price, db_purchase.product_quantity)
+    old_line = rollups.purchase_line(
+        db_purchase.cart_id, db_purchase.product_id, db_purchase.product_price, db_purchase.product_quantity, db_purchase.on_sale, sign=-1
+    )
+    update_data = purchase.dict(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_purchase, key, value)
+    delta = line_total(db_purchase.product_price, db_purchase.product_quantity) - old_total
+    if delta:
+        await db.execute(cart_total_delta(db_purchase.cart_id, delta))
+    await _apply_rollups(db, [old_line, rollups.purchase_line(
+        db_purchase.cart_id, db_purchase.product_id, db_purchase.product_price, db_purchase.product_quantity, db_purchase.on_sale
+    )])
+    await db.commit()
+    await db.refresh(db_purchase)
+    return db_purchase
+
+# ------------------------------------
+# USER FUNCTIONS
+# ------------------------------------
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    existing_user = await get_user_by_id(db, user.user_id)
+    if existing_user:
+        raise HTTPException(status_code=400, detail="User ID already exists.")
+    return await _commit_new(db, models.User(user_id=user.user_id), "user")
+
+
+async def get_user_by_id(db: AsyncSession, user_id: str):
+    return await _first(db, select(models.User).where(models.User.user_id == user_id))
+
+# ------------------------------------
+# GROCERY LIST FUNCTIONS
+# ------------------------------------
+async def create_grocery_list(db: AsyncSession, grocery_list: schemas.GroceryListCreate):
+    db_list = models.GroceryList(name=grocery_list.name, user_id=grocery_list.user_id)
+    return await _commit_new(db, db_list, "grocery list")
+
+
+async def get_grocery_lists(db: AsyncSession, user_id: str):
+    return await _all(db, select(models.GroceryList).where(models.GroceryList.user_id == user_id))
+
+
+async def get_grocery_list_versions(db: AsyncSession, user_id: str):
+    result = await db.execute(grocery_list_versions_query(user_id))
+    return result.all()
+
+
+async def get_grocery_list_items(db: AsyncSession, list_id: int):
+    return await _all(db, select(models.GroceryListItem).where(models.GroceryListItem.grocery_list_id == list_id))
+
+
+async def get_grocery_list_expanded(db: AsyncSession, list_id: int):
+    return await _first(db, select(models.GroceryList).options(GROCERY_LIST_EXPANDED).where(models.GroceryList.list_id == list_id))
+
+
+async def update_grocery_list(db: AsyncSession, list_id: int, list_update: schemas.GroceryListUpdate):
+    db_list = await _first(db, select(models.GroceryList).where(models.GroceryList.list_id == list_id))
+    if db_list is None:
+        raise HTTPException(status_code=404, detail="Grocery list not found")
+    db_list.name = list_update.name
+    await db.commit()
+    await db.refresh(db_list)
+    return db_list
+
+
+async def delete_grocery_list(db: AsyncSession, list_id: int):
+    db_list = await _first(db, select(models.GroceryList).where(models.GroceryList.list_id == list_id))
+    if db_list is None:
+        return None
+    await db.delete(db_list)
+    await db.commit()
+    return db_list
+
+# ------------------------------------
+# PACKAGING AND UNIT FUNCTIONS
+# ------------------------------------
+async def create_packaging_option(db: AsyncSession, packaging_option: schemas.PackagingOptionCreate):
+    db_packaging_option = models.PackagingOption(packaging_type=packaging_option.packaging_type)
+    db_packaging_option = await _commit_new(db, db_packaging_option, "packaging option")
+    reference_cache.invalidate("packaging_options")
+    return db_packaging_option
+
+
+async def create_unit_of_measurement(db: AsyncSession, unit_of_measurement: schemas.UnitOfMeasurementCreate):
+    db_unit_of_measurement = models.UnitOfMeasurement(unit_name=unit_of_measurement.unit_name)
+    db_unit_of_measurement = await _commit_new(db, db_unit_of_measurement, "unit of measurement")
+    reference_cache.invalidate("units_of_measurement")
+    return db_unit_of_measurement
+
+
+async def get_packaging_options(db: AsyncSession):
+    return await _cached("packaging_options", "all", PACKAGING_OPTIONS_ADAPTER, lambda: _all(db, select(models.PackagingOption)))
+
+
+async def get_packaging_option_by_id(db: AsyncSession, packaging_id: int):
+    return next((option for option in await get_packaging_options(db) if option.id == packaging_id), None)
+
+
+async def get_units_of_measurement(db: AsyncSession):
+    return await _cached(
+        "units_of_measurement", "all", UNITS_OF_MEASUREMENT_ADAPTER, lambda: _all(db, select(models.UnitOfMeasurement))
+    )
+
+
+async def get_unit_of_measurement_by_id(db: AsyncSession, unit_id: int):
+    return next((unit for unit in await get_units_of_measurement(db) if unit.id == unit_id), None)
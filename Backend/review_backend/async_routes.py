@@ -0,0 +1,283 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from review_backend import schemas, async_crud, serialization
+from review_backend.database import AsyncSessionLocal
+from review_backend.conditional import etag_headers, make_etag, not_modified
+from review_backend.crud import cart_version
+from typing import List
+
+# Async versions of the handlers in main.py. main.py includes this router ahead of
+# its own routes when USE_ASYNC_DB is set, so these take precedence; anything not
+# mirrored here falls through to the sync handler.
+router = APIRouter()
+
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ------------------------------------
+# STORE ENDPOINTS
+# ------------------------------------
+@router.post("/stores/", response_model=schemas.Store)
+async def create_store(store: schemas.StoreCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.Store.from_orm(await async_crud.create_store(db=db, store=store))
+
+
+@router.get("/stores/", response_model=List[schemas.Store])
+async def read_stores(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    stores = await async_crud.get_stores(db, skip=skip, limit=limit)
+    return [schemas.Store.from_orm(store) for store in stores]
+
+
+@router.get("/stores/{store_id}", response_model=schemas.Store)
+async def read_store(store_id: int, db: AsyncSession = Depends(get_async_db)):
+    store = await async_crud.get_store(db, store_id=store_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Store not found")
+    return schemas.Store.from_orm(store)
+
+
+# ------------------------------------
+# PRODUCT ENDPOINTS
+# ------------------------------------
+@router.post("/products/", response_model=schemas.Product)
+async def create_product(product: schemas.ProductCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.Product.from_orm(await async_crud.create_product(db=db, product=product))
+
+
+@router.get("/products/", response_model=List[schemas.Product])
+async def read_products(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = await async_crud.get_product_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result)
+    products = await async_crud.get_products(db, skip=skip, limit=limit)
+    return [schemas.Product.from_orm(product) for product in products]
+
+
+@router.get("/products/{product_id}", response_model=schemas.Product)
+async def read_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    product = await async_crud.get_product(db, product_id=product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    cached = not_modified(request, response, make_etag(tuple(product.model_dump().values())))
+    if cached is not None:
+        return cached
+    return schemas.Product.from_orm(product)
+
+
+# ------------------------------------
+# CART ENDPOINTS
+# ------------------------------------
+@router.post("/carts/", response_model=schemas.Cart)
+async def create_cart(cart: schemas.CartCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.Cart.from_orm(await async_crud.create_cart(db=db, cart=cart))
+
+
+@router.get("/carts/", response_model=List[schemas.Cart])
+async def read_carts(request: Request, response: Response, skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    versions = await async_crud.get_cart_versions(db, skip=skip, limit=limit)
+    etag = make_etag(skip, limit, tuple(map(tuple, versions)))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    if serialization.FAST_SERIALIZATION:
+        result = await async_crud.get_cart_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result, headers=etag_headers(etag))
+    carts = await async_crud.get_carts(db, skip=skip, limit=limit)
+    return [schemas.Cart.from_orm(cart) for cart in carts]
+
+
+@router.get("/carts/{cart_id}/expanded", response_model=schemas.CartExpanded)
+async def read_cart_expanded(cart_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    cart = await async_crud.get_cart_expanded(db, cart_id=cart_id)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    cached = not_modified(request, response, make_etag("expanded", cart_id, cart_version(cart, with_purchases=True)))
+    if cached is not None:
+        return cached
+    return schemas.CartExpanded.from_orm(cart)
+
+
+@router.get("/carts/{cart_id}", response_model=schemas.Cart)
+async def read_cart(cart_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    cart = await async_crud.get_cart(db, cart_id=cart_id)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    cached = not_modified(request, response, make_etag(cart_id, cart_version(cart)))
+    if cached is not None:
+        return cached
+    return schemas.Cart.from_orm(cart)
+
+
+@router.put("/carts/{cart_id}/", response_model=schemas.Cart, deprecated=True)
+async def update_cart(cart_id: int, cart_update: schemas.CartUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated_cart = await async_crud.update_cart_total(db, cart_id=cart_id, cart_total=cart_update.cart_total)
+    return schemas.Cart.from_orm(updated_cart)
+
+
+@router.get("/carts/all/", response_model=List[schemas.Cart])
+async def read_all_carts(db: AsyncSession = Depends(get_async_db)):
+    carts = await async_crud.get_all_carts(db)
+    return [schemas.Cart.from_orm(cart) for cart in carts]
+
+
+# ------------------------------------
+# PURCHASE ENDPOINTS
+# ------------------------------------
+@router.post("/purchases/", response_model=schemas.Purchase)
+async def create_purchase(purchase: schemas.PurchaseCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.Purchase.from_orm(await async_crud.create_purchase(db=db, purchase=purchase))
+
+
+@router.get("/purchases/", response_model=List[schemas.Purchase])
+async def read_purchases(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = await async_crud.get_purchase_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result)
+    purchases = await async_crud.get_purchases(db, skip=skip, limit=limit)
+    return [schemas.Purchase.from_orm(purchase) for purchase in purchases]
+
+
+@router.get("/purchases/{purchase_id}", response_model=schemas.Purchase)
+async def read_purchase(purchase_id: int, db: AsyncSession = Depends(get_async_db)):
+    purchase = await async_crud.get_purchase_by_id(db, purchase_id=purchase_id)
+    if purchase is None:
+        raise HTTPException(status_code=404, detail="Purchase not found")
+    return schemas.Purchase.from_orm(purchase)
+
+
+@router.get("/purchases/cart/{cart_id}", response_model=List[schemas.Purchase])
+async def read_purchases_by_cart(cart_id: int, db: AsyncSession = Depends(get_async_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = await async_crud.get_purchase_rows(db, cart_id=cart_id)
+        rows = result.all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="No purchases found for the specified cart")
+        return serialization.rows_response(result.keys(), rows)
+    purchases = await async_crud.get_purchases_by_cart_id(db, cart_id=cart_id)
+    if not purchases:
+        raise HTTPException(status_code=404, detail="No purchases found for the specified cart")
+    return [schemas.Purchase.from_orm(purchase) for purchase in purchases]
+
+
+@router.put("/purchases/{purchase_id}", response_model=schemas.Purchase)
+async def update_purchase(purchase_id: int, purchase: schemas.PurchaseUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated_purchase = await async_crud.update_purchase(db, purchase_id=purchase_id, purchase=purchase)
+    return schemas.Purchase.from_orm(updated_purchase)
+
+
+@router.delete("/purchases/{purchase_id}", response_model=schemas.Purchase)
+async def delete_purchase(purchase_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_purchase = await async_crud.delete_purchase(db, purchase_id=purchase_id)
+    if deleted_purchase is None:
+        raise HTTPException(status_code=404, detail="Purchase not found")
+    return schemas.Purchase.from_orm(deleted_purchase)
+
+
+# ------------------------------------
+# USER ENDPOINTS
+# ------------------------------------
+@router.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.User.from_orm(await async_crud.create_user(db=db, user=user))
+
+
+@router.get("/users/{user_id}", response_model=schemas.User)
+async def read_user(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_id(db, user_id=user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return schemas.User.from_orm(user)
+
+
+# ------------------------------------
+# PACKAGING OPTIONS ENDPOINTS
+# ------------------------------------
+@router.post("/packaging_options/", response_model=schemas.PackagingOption)
+async def create_packaging_option(packaging_option: schemas.PackagingOptionCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.PackagingOption.from_orm(await async_crud.create_packaging_option(db=db, packaging_option=packaging_option))
+
+
+@router.get("/packaging_options/", response_model=List[schemas.PackagingOption])
+async def read_packaging_options(db: AsyncSession = Depends(get_async_db)):
+    options = await async_crud.get_packaging_options(db)
+    return [schemas.PackagingOption.from_orm(option) for option in options]
+
+
+@router.get("/packaging_options/{packaging_id}", response_model=schemas.PackagingOption)
+async def read_packaging_option(packaging_id: int, db: AsyncSession = Depends(get_async_db)):
+    packaging_option = await async_crud.get_packaging_option_by_id(db, packaging_id=packaging_id)
+    if packaging_option is None:
+        raise HTTPException(status_code=404, detail="Packaging option not found")
+    return schemas.PackagingOption.from_orm(packaging_option)
+
+
+# ------------------------------------
+# UNITS OF MEASUREMENT ENDPOINTS
+# ------------------------------------
+@router.post("/units_of_measurement/", response_model=schemas.UnitOfMeasurement)
+async def create_unit_of_measurement(unit_of_measurement: schemas.UnitOfMeasurementCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.UnitOfMeasurement.from_orm(await async_crud.create_unit_of_measurement(db=db, unit_of_measurement=unit_of_measurement))
+
+
+@router.get("/units_of_measurement/", response_model=List[schemas.UnitOfMeasurement])
+async def read_units_of_measurement(db: AsyncSession = Depends(get_async_db)):
+    units = await async_crud.get_units_of_measurement(db)
+    return [schemas.UnitOfMeasurement.from_orm(unit) for unit in units]
+
+
+@router.get("/units_of_measurement/{unit_id}", response_model=schemas.UnitOfMeasurement)
+async def read_unit_of_measurement(unit_id: int, db: AsyncSession = Depends(get_async_db)):
+    unit = await async_crud.get_unit_of_measurement_by_id(db, unit_id=unit_id)
+    if unit is None:
+        raise HTTPException(status_code=404, detail="Unit of measurement not found")
+    return schemas.UnitOfMeasurement.from_orm(unit)
+
+
+# ------------------------------------
+# GROCERY LIST ENDPOINTS
+# ------------------------------------
+@router.post("/grocery_lists/", response_model=schemas.GroceryList)
+async def create_grocery_list(grocery_list: schemas.GroceryListCreate, db: AsyncSession = Depends(get_async_db)):
+    return schemas.GroceryList.from_orm(await async_crud.create_grocery_list(db=db, grocery_list=grocery_list))
+
+
+@router.get("/grocery_lists/{user_id}", response_model=List[schemas.GroceryList])
+async def read_grocery_lists(user_id: str, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    versions = await async_crud.get_grocery_list_versions(db=db, user_id=user_id)
+    cached = not_modified(request, response, make_etag(user_id, tuple(map(tuple, versions))))
+    if cached is not None:
+        return cached
+    lists = await async_crud.get_grocery_lists(db=db, user_id=user_id)
+    return [schemas.GroceryList.from_orm(g_list) for g_list in lists]
+
+
+@router.get("/grocery_lists/{list_id}/items/", response_model=List[schemas.GroceryListItem])
+async def read_grocery_list_items(list_id: int, db: AsyncSession = Depends(get_async_db)):
+    items = await async_crud.get_grocery_list_items(db=db, list_id=list_id)
+    return [schemas.GroceryListItem.from_orm(item) for item in items]
+
+
+@router.get("/grocery_lists/{list_id}/expanded", response_model=schemas.GroceryListExpanded)
+async def read_grocery_list_expanded(list_id: int, db: AsyncSession = Depends(get_async_db)):
+    grocery_list = await async_crud.get_grocery_list_expanded(db=db, list_id=list_id)
+    if grocery_list is None:
+        raise HTTPException(status_code=404, detail="Grocery list not found")
+    return schemas.GroceryListExpanded.from_orm(grocery_list)
+
+
+@router.put("/grocery_lists/{list_id}/", response_model=schemas.GroceryList)
+async def update_grocery_list(list_id: int, grocery_list: schemas.GroceryListUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated_list = await async_crud.update_grocery_list(db=db, list_id=list_id, list_update=grocery_list)
+    return schemas.GroceryList.from_orm(updated_list)
+
+
+@router.delete("/grocery_lists/{list_id}/", response_model=schemas.GroceryList)
+async def delete_grocery_list(list_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_list = await async_crud.delete_grocery_list(db=db, list_id=list_id)
+    if deleted_list is None:
+        raise HTTPException(status_code=404, detail="Grocery list not found")
+    return schemas.GroceryList.from_orm(deleted_list)
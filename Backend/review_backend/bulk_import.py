@@ -0,0 +1,452 @@
+"""Bulk import of products, stores, users, carts and purchases from CSV or Parquet.
+
+    python -m review_backend.bulk_import purchases receipts.csv [--chunk-size 10000] [--rejects rejects.csv]
+    python -m review_backend.bulk_import dataset ./dataset    # output of review_backend.shard_generation
+
+Files are read one chunk at a time (pandas' chunked CSV reader, pyarrow record
+batches for Parquet) and every chunk is validated, written with executemany /
+multi-row upserts and committed on its own, so memory follows the chunk size, not
+the file size. Rows that fail validation or point at a missing cart, store or
+product are rejected with a reason, optionally written to a rejects CSV, and the
+import carries on. The same code backs POST /import.
+
+Products are matched on _product_unique_constraint (crud.resolve_products), so
+re-importing a product file creates nothing. Purchase rows name their product
+either by product_id or by the product columns, with the product's own
+product_quantity given as package_quantity. Carts start at cart_total 0 and every
+purchase chunk adds its line totals and spending rollup lines, as the purchase
+endpoints do. Stores and carts with explicit ids that already exist are skipped,
+except in a dataset import, which shifts the file's store and cart ids past the
+current maxima so a generated dataset always lands as new stores and carts.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.orm import Session
+
+from review_backend import crud, models, rollups, search
+from review_backend.cache import reference_cache
+from review_backend.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+REJECT_SAMPLE_SIZE = 20  # Rejected rows echoed back in the report; the rest only go to the rejects file
+FORMATS = ("csv", "parquet")
+TABLES = ("products", "stores", "users", "carts", "purchases")
+
+PRODUCT_COLUMNS = {
+    "product_brand": "str", "product_name": "str", "product_quantity": "float",
+    "product_packaging": "str", "unit_quantity": "float", "unit_of_measurement": "str",
+}
+# Product columns on a purchase row; package_quantity is the product's product_quantity
+PURCHASE_PRODUCT_COLUMNS = {
+    ("package_quantity" if column == "product_quantity" else column): kind for column, kind in PRODUCT_COLUMNS.items()
+}
+# (required, optional) columns and their types per table
+TABLE_COLUMNS = {
+    "products": (PRODUCT_COLUMNS, {"product_id": "int"}),
+    "stores": ({"store_name": "str", "store_location": "str"}, {"store_id": "int"}),
+    "users": ({"user_id": "str"}, {}),
+    "carts": ({"user_id": "str", "purchase_date": "date", "store_id": "int"}, {"cart_id": "int", "cart_name": "str"}),
+    "purchases": (
+        {"cart_id": "int", "product_quantity": "int", "product_price": "float", "input_date": "datetime"},
+        {"product_id": "int", "on_sale": "bool", "purchased": "bool", **PURCHASE_PRODUCT_COLUMNS},
+    ),
+}
+NO_REJECTS = pd.Series(dtype=object)  # Importer result when every row was written
+TRUE_VALUES = {"true", "t", "yes", "y", "1"}
+FALSE_VALUES = {"false", "f", "no", "n", "0"}
+
+
+class ImportReport:
+    """Per-chunk throughput and reject counts for one table, plus running totals."""
+
+    def __init__(self, table: str, rejects_path: str = None, on_chunk=None):
+        self.table = table
+        self.rejects_path = rejects_path
+        self.on_chunk = on_chunk
+        self.started = self.finished = time.perf_counter()
+        self.chunks = []
+        self.rows = self.imported = self.existing = self.rejected = 0
+        self.reject_sample = []
+
+    def add_chunk(self, rows: int, imported: int, existing: int, rejects: pd.DataFrame, seconds: float):
+        chunk = {
+            "chunk": len(self.chunks), "rows": rows, "imported": imported, "existing": existing,
+            "rejected": len(rejects), "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds) if seconds else None,
+        }
+        self.chunks.append(chunk)
+        self.finished = time.perf_counter()
+        self.rows += rows
+        self.imported += imported
+        self.existing += existing
+        self.rejected += len(rejects)
+        if len(rejects):
+            room = REJECT_SAMPLE_SIZE - len(self.reject_sample)
+            if room > 0:
+                self.reject_sample.extend(rejects.head(room).astype(str).to_dict("records"))
+            if self.rejects_path:
+                write_header = not os.path.exists(self.rejects_path)
+                rejects.to_csv(self.rejects_path, mode="a", header=write_header, index=False)
+        if self.on_chunk:
+            self.on_chunk(self, chunk)
+
+    def to_dict(self) -> dict:
+        elapsed = self.finished - self.started
+        return {
+            "table": self.table, "rows": self.rows, "imported": self.imported, "existing": self.existing,
+            "rejected": self.rejected, "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed) if elapsed else None,
+            "chunks": self.chunks, "reject_sample": self.reject_sample,
+        }
+
+
+class ImportState:
+    """State carried across the files of one import.
+
+    product_ids maps file product ids to database ids; id_offsets are added to
+    the named id columns of every row.
+    """
+
+    def __init__(self, id_offsets: dict = None):
+        self.product_ids = {}
+        self.id_offsets = id_offsets or {}
+
+    def shift(self, rows: pd.DataFrame) -> pd.DataFrame:
+        offsets = {column: rows[column] + offset for column, offset in self.id_offsets.items() if column in rows}
+        return rows.assign(**offsets) if offsets else rows
+
+
+# ------------------------------------
+# READING AND VALIDATION
+# ------------------------------------
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def detect_format(path: str) -> str:
+    return "parquet" if str(path).endswith((".parquet", ".pq")) else "csv"
+
+
+def read_chunks(source, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """DataFrames of at most chunk_size rows from a path or binary file, indexed by row number."""
+    if fmt == "parquet":
+        if not parquet_available():
+            raise ValueError("Parquet import needs pyarrow (pip install pyarrow)")
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            chunk.index += offset
+            offset += len(chunk)
+            yield chunk
+    else:
+        # Everything as text; _coerce decides what is valid
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def _convert(values: pd.Series, kind: str) -> pd.Series:
+    """values as kind; anything that does not convert becomes NaN/NaT/None."""
+    if kind == "str":
+        return values.astype(object).where(~_blank(values), None).map(lambda value: None if value is None else str(value).strip())
+    if kind in ("int", "float"):
+        numbers = pd.to_numeric(values.where(~_blank(values)), errors="coerce")
+        return numbers.where(numbers % 1 == 0) if kind == "int" else numbers
+    if kind == "bool":
+        if pd.api.types.is_bool_dtype(values):
+            return values.astype(object)
+        text = values.astype(str).str.strip().str.lower()
+        return text.map(lambda value: True if value in TRUE_VALUES else False if value in FALSE_VALUES else None)
+    parsed = pd.to_datetime(values.where(~_blank(values)), errors="coerce", format="ISO8601")
+    return parsed.dt.normalize() if kind == "date" else parsed
+
+
+def _coerce(chunk: pd.DataFrame, table: str):
+    """(typed rows, rejected rows with _row and _reason columns)."""
+    required, optional = TABLE_COLUMNS[table]
+    missing = [column for column in required if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"{table} file is missing columns: {', '.join(missing)}")
+    typed = pd.DataFrame(index=chunk.index)
+    reasons = pd.Series(None, index=chunk.index, dtype=object)
+    for column, kind in {**required, **optional}.items():
+        if column not in chunk.columns:
+            continue
+        typed[column] = _convert(chunk[column], kind)
+        invalid = typed[column].isna()
+        if column in optional:
+            # A blank optional value falls back to its default; a malformed one is an error
+            invalid &= ~_blank(chunk[column])
+        reasons = reasons.where(reasons.notna() | ~invalid, f"invalid {column}")
+    return typed[reasons.isna()], _rejects(chunk, reasons.dropna())
+
+
+def _rejects(chunk: pd.DataFrame, reasons: pd.Series) -> pd.DataFrame:
+    rejected = chunk.loc[reasons.index].copy()
+    rejected.insert(0, "_reason", reasons)
+    rejected.insert(0, "_row", reasons.index + 1)
+    return rejected
+
+
+def _existing(db: Session, column, values) -> set:
+    values = [value.item() if hasattr(value, "item") else value for value in set(values)]
+    found = set()
+    for start in range(0, len(values), crud.BULK_INSERT_CHUNK_SIZE):
+        found.update(db.execute(select(column).where(column.in_(values[start:start + crud.BULK_INSERT_CHUNK_SIZE]))).scalars())
+    return found
+
+
+# ------------------------------------
+# WRITING
+# ------------------------------------
+def _driver_values(table, df: pd.DataFrame) -> pd.DataFrame:
+    # Dates and datetimes as ISO strings (the format SQLAlchemy itself stores on SQLite),
+    # so rows can go straight to the DBAPI without per-value type processing
+    df = df.copy()
+    for column in df.columns:
+        python_type = table.c[column].type.python_type
+        if python_type is datetime:
+            df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        elif python_type is date:
+            df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d")
+    return df
+
+
+def insert_frame(conn, table, df: pd.DataFrame) -> int:
+    """INSERT every row of df with one DBAPI executemany; the caller chunks and commits."""
+    if not len(df):
+        return 0
+    compiled = insert(table).values({column: bindparam(column) for column in df.columns}).compile(dialect=conn.dialect)
+    df = _driver_values(table, df)
+    # The compiled INSERT also binds columns with Python-side scalar defaults (e.g. version)
+    for column in compiled.params:
+        if column not in df:
+            df[column] = table.c[column].default.arg
+    df = df.astype(object).where(df.notna(), None)
+    if compiled.positional:
+        params = list(df[list(compiled.positiontup)].itertuples(index=False, name=None))
+    else:
+        params = df.to_dict("records")
+    conn.exec_driver_sql(compiled.string, params)
+    return len(df)
+
+
+def _import_products(db: Session, rows: pd.DataFrame, state: ImportState):
+    product_ids, created = crud.resolve_products(db, rows[list(PRODUCT_COLUMNS)].to_dict("records"))
+    if "product_id" in rows:
+        file_ids = rows["product_id"].dropna()
+        state.product_ids.update(zip(file_ids.astype(int), np.asarray(product_ids)[rows.index.get_indexer(file_ids.index)]))
+    return created, len(rows) - created, NO_REJECTS
+
+
+def _split_existing(db: Session, rows: pd.DataFrame, column):
+    # Rows whose explicit id is already taken are skipped, which makes re-runs idempotent
+    name = column.key
+    if name not in rows or rows[name].isna().all():
+        return rows.drop(columns=[name], errors="ignore"), 0
+    if rows[name].isna().any():
+        raise ValueError(f"{name} must be given for every row or none")
+    taken = rows[name].isin(_existing(db, column, rows[name]))
+    return rows[~taken].astype({name: int}), int(taken.sum())
+
+
+def _import_stores(db: Session, rows: pd.DataFrame, state: ImportState):
+    rows, existing = _split_existing(db, rows, models.Store.store_id)
+    return insert_frame(db.connection(), models.Store.__table__, rows), existing, NO_REJECTS
+
+
+def _insert_missing_users(db: Session, user_ids) -> int:
+    missing = sorted(set(user_ids) - _existing(db, models.User.user_id, user_ids))
+    users = pd.DataFrame({"user_id": missing, "created_at": datetime.now()})
+    return insert_frame(db.connection(), models.User.__table__, users)
+
+
+def _import_users(db: Session, rows: pd.DataFrame, state: ImportState):
+    created = _insert_missing_users(db, rows["user_id"])
+    return created, len(rows) - created, NO_REJECTS
+
+
+def _import_carts(db: Session, rows: pd.DataFrame, state: ImportState):
+    unknown_store = ~rows["store_id"].isin(_existing(db, models.Store.store_id, rows["store_id"]))
+    rejects = pd.Series("unknown store_id", index=rows.index[unknown_store])
+    rows = rows[~unknown_store]
+    rows, existing = _split_existing(db, rows, models.Cart.cart_id)
+    _insert_missing_users(db, rows["user_id"])
+    rows = rows.assign(store_id=rows["store_id"].astype(int), cart_total=0.0)
+    if "cart_name" not in rows:
+        rows["cart_name"] = None
+    rows["cart_name"] = rows["cart_name"].fillna("Imported cart")
+    return insert_frame(db.connection(), models.Cart.__table__, rows), existing, rejects
+
+
+def _import_purchases(db: Session, rows: pd.DataFrame, state: ImportState):
+    product_ids = rows["product_id"] if "product_id" in rows else pd.Series(np.nan, index=rows.index)
+    if state.product_ids:
+        product_ids = product_ids.map(state.product_ids)
+    by_columns = product_ids.isna()
+    if all(column in rows for column in PURCHASE_PRODUCT_COLUMNS):
+        by_columns &= rows[list(PURCHASE_PRODUCT_COLUMNS)].notna().all(axis=1)
+        if by_columns.any():
+            products = rows.loc[by_columns, list(PURCHASE_PRODUCT_COLUMNS)].rename(columns={"package_quantity": "product_quantity"})
+            resolved, _ = crud.resolve_products(db, products.to_dict("records"))
+            product_ids = product_ids.copy()
+            product_ids[by_columns] = resolved
+    rows = rows.assign(product_id=product_ids)
+
+    known_products = _existing(db, models.Product.product_id, rows["product_id"].dropna().astype(int))
+    known_carts = _existing(db, models.Cart.cart_id, rows["cart_id"].astype(int))
+    reasons = pd.Series(None, index=rows.index, dtype=object)
+    reasons[~rows["product_id"].isin(known_products)] = "unknown product"
+    reasons[~rows["cart_id"].isin(known_carts)] = "unknown cart_id"
+    rejects = reasons.dropna()
+    rows = rows[reasons.isna()]
+    rows = rows.assign(
+        product_id=rows["product_id"].astype(int),
+        cart_id=rows["cart_id"].astype(int),
+        product_quantity=rows["product_quantity"].astype(int),
+        on_sale=rows["on_sale"].fillna(False) if "on_sale" in rows else False,
+        purchased=rows["purchased"].fillna(True) if "purchased" in rows else True,
+    )[["product_id", "cart_id", "product_quantity", "product_price", "on_sale", "purchased", "input_date"]]
+    if not len(rows):
+        return 0, 0, rejects
+
+    insert_frame(db.connection(), models.Purchase.__table__, rows)
+    amounts = rows["product_price"] * rows["product_quantity"]
+    deltas = {int(cart_id): float(total) for cart_id, total in amounts.groupby(rows["cart_id"]).sum().items()}
+    for start in range(0, len(deltas), crud.BULK_INSERT_CHUNK_SIZE):
+        db.execute(crud.cart_total_deltas(dict(list(deltas.items())[start:start + crud.BULK_INSERT_CHUNK_SIZE])))
+    rollups.apply_lines(db, [
+        rollups.purchase_line(cart_id, product_id, price, quantity, on_sale)
+        for cart_id, product_id, price, quantity, on_sale in zip(
+            rows["cart_id"].tolist(), rows["product_id"].tolist(), rows["product_price"].tolist(),
+            rows["product_quantity"].tolist(), rows["on_sale"].tolist(),
+        )
+    ])
+    return len(rows), 0, rejects
+
+
+IMPORTERS = {
+    "products": _import_products,
+    "stores": _import_stores,
+    "users": _import_users,
+    "carts": _import_carts,
+    "purchases": _import_purchases,
+}
+
+
+def import_file(db: Session, table: str, source, fmt: str = None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                report: ImportReport = None, state: ImportState = None) -> ImportReport:
+    """Import source (a path or binary file) into table, committing once per chunk.
+
+    A chunk whose write fails is rolled back and all of its rows are rejected with
+    the error; ValueError is raised for a file this table cannot take at all.
+    """
+    if table not in IMPORTERS:
+        raise ValueError(f"Unknown table {table!r}; expected one of {', '.join(TABLES)}")
+    fmt = fmt or detect_format(source)
+    report = report or ImportReport(table)
+    state = state or ImportState()
+    importer = IMPORTERS[table]
+    for chunk in read_chunks(source, fmt, chunk_size):
+        started = time.perf_counter()
+        rows, rejects = _coerce(chunk, table)
+        rows = state.shift(rows)
+        try:
+            imported, existing, missing = importer(db, rows, state)
+            db.commit()
+            if table in ("products", "purchases"):
+                # Both can create products through crud.resolve_products
+                search.mark_stale()
+        except ValueError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error importing {table} chunk {len(report.chunks)}: {e}")
+            imported, existing, missing = 0, 0, pd.Series(f"chunk failed: {e}"[:200], index=rows.index)
+        rejects = pd.concat([rejects, _rejects(chunk, missing)])
+        report.add_chunk(len(chunk), imported, existing, rejects, time.perf_counter() - started)
+    if table == "stores":
+        reference_cache.invalidate("stores")
+    return report
+
+
+def import_dataset(db: Session, directory: str, chunk_size: int = IMPORT_CHUNK_SIZE, rejects_dir: str = None,
+                   on_chunk=None) -> list:
+    """Import a review_backend.shard_generation output directory, reference tables first."""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    state = ImportState({
+        "store_id": db.execute(select(func.max(models.Store.store_id))).scalar() or 0,
+        "cart_id": db.execute(select(func.max(models.Cart.cart_id))).scalar() or 0,
+    })
+    reports = []
+    for table in TABLES:
+        if table in manifest["files"]:
+            paths = [manifest["files"][table]]
+        else:
+            paths = [shard["files"][table] for shard in manifest["shards"]]
+        rejects_path = os.path.join(rejects_dir, f"{table}.rejects.csv") if rejects_dir else None
+        report = ImportReport(table, rejects_path, on_chunk)
+        for path in paths:
+            import_file(db, table, os.path.join(directory, path), manifest["format"], chunk_size, report, state)
+        reports.append(report)
+    return reports
+
+
+def _print_chunk(report: ImportReport, chunk: dict):
+    print(
+        f"  {report.table:<10} chunk {chunk['chunk']:>6} {chunk['rows']:>8,} rows {chunk['imported']:>8,} imported "
+        f"{chunk['existing']:>8,} existing {chunk['rejected']:>6,} rejected {chunk['rows_per_second'] or 0:>10,} rows/s",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import CSV or Parquet files")
+    parser.add_argument("table", choices=TABLES + ("dataset",), help="target table, or dataset for a shard_generation directory")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--rejects", default=None, help="CSV file (directory for dataset) to append rejected rows to")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.table == "dataset":
+            if args.rejects:
+                os.makedirs(args.rejects, exist_ok=True)
+            reports = import_dataset(db, args.path, args.chunk_size, args.rejects, _print_chunk)
+        else:
+            report = ImportReport(args.table, args.rejects, _print_chunk)
+            reports = [import_file(db, args.table, args.path, args.format, args.chunk_size, report)]
+    finally:
+        db.close()
+    for report in reports:
+        summary = report.to_dict()
+        del summary["chunks"], summary["reject_sample"]
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pydantic import TypeAdapter
+
+# Read-through cache for reference data (stores, products, packaging options,
+# units of measurement): rows that are read on almost every page and change
+# rarely. crud caches the validated schema objects under a namespace and the
+# matching create_* function invalidates that namespace after it commits.
+#
+# The default backend is a per-process LRU with a TTL; invalidations only reach
+# the worker that made the write, and other workers catch up within the TTL. Set
+# REFERENCE_CACHE_URL to a redis:// URL (Redis or any server speaking its
+# protocol; needs the redis package) to share one cache, and its invalidations,
+# across workers.
+REFERENCE_CACHE_ENABLED = os.getenv("REFERENCE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+REFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "10000"))
+REFERENCE_CACHE_URL = os.getenv("REFERENCE_CACHE_URL")
+
+MISSING = object()
+
+
+class LocalBackend:
+    """Thread-safe in-process LRU with per-entry expiry. Values are stored as is."""
+
+    def __init__(self, max_entries: int = REFERENCE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str, adapter: TypeAdapter):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, adapter: TypeAdapter, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend over a redis-py compatible client. Values are stored as JSON."""
+
+    def __init__(self, client, key_prefix: str = "review_backend:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def get(self, key: str, adapter: TypeAdapter):
+        raw = self.client.get(self.key_prefix + key)
+        return MISSING if raw is None else adapter.validate_json(raw)
+
+    def set(self, key: str, value, adapter: TypeAdapter, ttl: float):
+        self.client.set(self.key_prefix + key, adapter.dump_json(value), px=int(ttl * 1000))
+
+    def delete(self, key: str):
+        self.client.delete(self.key_prefix + key)
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=self.key_prefix + prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.key_prefix + "*"))
+
+
+class ReferenceCache:
+    def __init__(self, backend, ttl: float = REFERENCE_CACHE_TTL_SECONDS, enabled: bool = REFERENCE_CACHE_ENABLED):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.invalidations = defaultdict(int)
+
+    def lookup(self, namespace: str, key, adapter: TypeAdapter):
+        if not self.enabled:
+            return MISSING
+        value = self.backend.get(f"{namespace}:{key}", adapter)
+        if value is MISSING:
+            self.misses[namespace] += 1
+        else:
+            self.hits[namespace] += 1
+        return value
+
+    def store(self, namespace: str, key, value, adapter: TypeAdapter):
+        if self.enabled:
+            self.backend.set(f"{namespace}:{key}", value, adapter, self.ttl)
+        return value
+
+    def get_or_load(self, namespace: str, key, adapter: TypeAdapter, loader):
+        """Cached value, or loader() validated through adapter and cached. None results are not cached."""
+        value = self.lookup(namespace, key, adapter)
+        if value is MISSING:
+            loaded = loader()
+            if loaded is None:
+                return None
+            value = self.store(namespace, key, adapter.validate_python(loaded), adapter)
+        return value
+
+    def invalidate(self, namespace: str, key=None):
+        """Drop one key, or the whole namespace when key is None."""
+        self.invalidations[namespace] += 1
+        if key is None:
+            self.backend.delete_prefix(f"{namespace}:")
+        else:
+            self.backend.delete(f"{namespace}:{key}")
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses) | set(self.invalidations))
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "entries": len(self.backend),
+            "namespaces": {
+                namespace: {
+                    "hits": self.hits[namespace],
+                    "misses": self.misses[namespace],
+                    "invalidations": self.invalidations[namespace],
+                }
+                for namespace in namespaces
+            },
+        }
+
+
+def _default_backend():
+    if REFERENCE_CACHE_URL:
+        import redis
+
+        return RedisBackend(redis.Redis.from_url(REFERENCE_CACHE_URL))
+    return LocalBackend()
+
+
+reference_cache = ReferenceCache(_default_backend())
+
+
+def configure(backend=None, ttl: float = None, enabled: bool = None) -> ReferenceCache:
+    """Swap the backend (e.g. RedisBackend(fakeredis.FakeRedis())) or settings at startup."""
+    if backend is not None:
+        reference_cache.backend = backend
+    if ttl is not None:
+        reference_cache.ttl = ttl
+    if enabled is not None:
+        reference_cache.enabled = enabled
+    return reference_cache
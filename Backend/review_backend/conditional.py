@@ -0,0 +1,41 @@
+import hashlib
+from fastapi import Request, Response
+
+# HTTP conditional GETs. Handlers build an ETag from row versions (the version
+# columns on carts, purchases and grocery lists, bumped by every UPDATE) and answer
+# 304 Not Modified when it matches If-None-Match. List reads take the versions from
+# a narrow query, so an unchanged poll skips the full read; single-cart reads take
+# them from the rows they load, so only the serialization is skipped.
+
+
+def make_etag(*parts) -> str:
+    """Weak validator over parts: any iterable of (id, version) pairs or scalars."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    wanted = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == wanted for candidate in header.split(","))
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, response: Response, etag: str):
+    """A 304 response if the client's copy is current; otherwise set ETag on response and return None.
+
+    Handlers that return their own Response must copy etag_headers(etag) onto it.
+    """
+    headers = etag_headers(etag)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,10 +1,24 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, select, func, case, tuple_
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
-from review_backend import schemas, models
+from pydantic import TypeAdapter
+from typing import List
+from review_backend import schemas, models, rollups
+from review_backend import search as search_module
+from review_backend.pagination import paginate
+from review_backend.cache import reference_cache
+from review_backend.serialization import schema_columns
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Reference data reads go through review_backend.cache and return validated schema
+# objects; the create_* functions below invalidate what they change
+STORES_ADAPTER = TypeAdapter(List[schemas.Store])
+PRODUCT_ADAPTER = TypeAdapter(schemas.Product)
+PACKAGING_OPTIONS_ADAPTER = TypeAdapter(List[schemas.PackagingOption])
+UNITS_OF_MEASUREMENT_ADAPTER = TypeAdapter(List[schemas.UnitOfMeasurement])
+
 # ------------------------------------
 # STORE FUNCTIONS
 # ------------------------------------
@@ -17,7 +31,13 @@ def get_store_by_name(db: Session, store_name: str):
 
 
 def get_stores(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Store).offset(skip).limit(limit).all()
+    return reference_cache.get_or_load(
+        "stores", f"{skip}:{limit}", STORES_ADAPTER, lambda: db.query(models.Store).offset(skip).limit(limit).all()
+    )
+
+
+def get_stores_page(db: Session, cursor: str = None, limit: int = 10):
+    return paginate(db.query(models.Store), [models.Store.store_id], "id", cursor=cursor, limit=limit)
 
 
 def create_store(db: Session, store: schemas.StoreCreate):
@@ -33,19 +53,40 @@ def create_store(db: Session, store: schemas.StoreCreate):
         db.rollback()
         logger.error(f"Error creating store: {e}")
         raise e
+    reference_cache.invalidate("stores")
     return db_store
 
 # ------------------------------------
 # PRODUCT FUNCTIONS
 # ------------------------------------
 def get_product(db: Session, product_id: int):
-    return db.query(models.Product).filter(models.Product.product_id == product_id).first()
+    return reference_cache.get_or_load(
+        "products", product_id, PRODUCT_ADAPTER,
+        lambda: db.query(models.Product).filter(models.Product.product_id == product_id).first(),
+    )
 
 
 def get_products(db: Session, skip: int = 0, limit: int = 10):
     return db.query(models.Product).offset(skip).limit(limit).all()
 
 
+# Column-only row queries for the fast serialization path (review_backend.serialization):
+# same rows as the ORM reads, as tuples in response_model field order. Shared with async_crud
+PRODUCT_FIELDS = schema_columns(schemas.Product, models.Product)
+
+
+def product_rows_query(skip: int = 0, limit: int = 10):
+    return select(*PRODUCT_FIELDS).offset(skip).limit(limit)
+
+
+def get_product_rows(db: Session, skip: int = 0, limit: int = 10):
+    return db.execute(product_rows_query(skip, limit))
+
+
+def get_products_page(db: Session, cursor: str = None, limit: int = 10):
+    return paginate(db.query(models.Product), [models.Product.product_id], "id", cursor=cursor, limit=limit)
+
+
 def create_product(db: Session, product: schemas.ProductCreate):
     db_product = models.Product(
         product_brand=product.product_brand,
@@ -63,6 +104,8 @@ def create_product(db: Session, product: schemas.ProductCreate):
         db.rollback()
         logger.error(f"Error creating product: {e}")
         raise e
+    search_module.index_product(db_product)
+    reference_cache.invalidate("products", db_product.product_id)
     return db_product
 
 
@@ -77,15 +120,102 @@ def get_unique_products(db: Session):
     ).all()
 
 
-def search_products(db: Session, search: str = None, skip: int = 0, limit: int = 10):
-    query = db.query(models.Product)
-    if search:
-        search = f"%{search}%"
-        query = query.filter(
-            models.Product.product_name.ilike(search) |
-            models.Product.product_brand.ilike(search)
+# Product identity is the _product_unique_constraint columns. Resolving a batch looks
+# the keys up first, so existing products cost no INSERT (and, on MySQL, no
+# auto-increment values), then upserts only the missing ones and reads their ids.
+# The upsert makes concurrent resolvers of the same product converge on one row.
+PRODUCT_KEY_COLUMNS = [
+    "product_brand", "product_name", "product_quantity", "product_packaging", "unit_quantity", "unit_of_measurement",
+]
+
+
+def product_key(row) -> tuple:
+    # Floats are rounded so values read back from MySQL's single-precision FLOAT still match
+    return (
+        row["product_brand"], row["product_name"], round(row["product_quantity"], 4),
+        row["product_packaging"], round(row["unit_quantity"], 4), row["unit_of_measurement"],
+    )
+
+
+def product_upsert(dialect: str, rows: list):
+    # INSERT that leaves an existing product with the same key untouched
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+        stmt = dialect_insert(models.Product).values(rows)
+        return stmt.on_duplicate_key_update(product_id=models.Product.product_id)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(models.Product).values(rows).on_conflict_do_nothing(index_elements=PRODUCT_KEY_COLUMNS)
+
+
+def _product_ids_by_key(db: Session, keys: list, lock: bool = False) -> dict:
+    found = {}
+    for start in range(0, len(keys), BULK_INSERT_CHUNK_SIZE):
+        chunk = keys[start:start + BULK_INSERT_CHUNK_SIZE]
+        # Match on the string columns in SQL and on the rounded floats here
+        coarse = {(key[0], key[1], key[3], key[5]) for key in chunk}
+        stmt = select(models.Product.product_id, *[models.Product.__table__.c[column] for column in PRODUCT_KEY_COLUMNS]).where(
+            tuple_(
+                models.Product.product_brand, models.Product.product_name,
+                models.Product.product_packaging, models.Product.unit_of_measurement,
+            ).in_(coarse)
         )
-    return query.offset(skip).limit(limit).all()
+        if lock:
+            # A locking read sees rows committed after this transaction's snapshot
+            # (MySQL REPEATABLE READ), i.e. a product a concurrent resolver just created
+            stmt = stmt.with_for_update(read=True)
+        for row in db.execute(stmt).mappings():
+            found[product_key(row)] = row["product_id"]
+    return found
+
+
+def resolve_products(db: Session, products: list):
+    """product_id for each of products (dicts or schemas.ProductCreate), creating missing ones.
+
+    Returns (product_ids, created) where created counts keys the first lookup did not
+    find (callers racing on a new product may both count it); the caller commits.
+    """
+    rows = [
+        {column: product[column] for column in PRODUCT_KEY_COLUMNS} if isinstance(product, dict) else product.dict()
+        for product in products
+    ]
+    keys = [product_key(row) for row in rows]
+    wanted = dict(zip(keys, rows))
+    found = _product_ids_by_key(db, list(wanted))
+    missing = [row for key, row in wanted.items() if key not in found]
+    if missing:
+        dialect = db.get_bind().dialect.name
+        for start in range(0, len(missing), BULK_INSERT_CHUNK_SIZE):
+            db.execute(product_upsert(dialect, missing[start:start + BULK_INSERT_CHUNK_SIZE]))
+        found.update(_product_ids_by_key(db, [product_key(row) for row in missing], lock=True))
+    return [found[key] for key in keys], len(missing)
+
+
+def resolve_product_batch(db: Session, products: list):
+    """Find-or-create products by their identifying fields in one transaction.
+
+    Returns (product_ids, created) like resolve_products.
+    """
+    try:
+        product_ids, created = resolve_products(db, products)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error resolving products: {e}")
+        raise e
+    if created:
+        search_module.mark_stale()
+    return product_ids, created
+
+
+def search_products(db: Session, search: str = None, skip: int = 0, limit: int = 10):
+    # Ranked, typo-tolerant search; see review_backend.search for the backends
+    if not search:
+        return db.query(models.Product).offset(skip).limit(limit).all()
+    return search_module.search_products(db, search, skip=skip, limit=limit)
 
 # ------------------------------------
 # CART FUNCTIONS
@@ -94,10 +224,69 @@ def get_cart(db: Session, cart_id: int):
     return db.query(models.Cart).filter(models.Cart.cart_id == cart_id).first()
 
 
+# Cart with its purchases and their products in two statements: the cart, then the
+# purchases joined to products (rather than one lazy load per purchase and product)
+CART_EXPANDED = selectinload(models.Cart.purchases).joinedload(models.Purchase.product)
+
+
+def get_cart_expanded(db: Session, cart_id: int):
+    return db.query(models.Cart).options(CART_EXPANDED).filter(models.Cart.cart_id == cart_id).first()
+
+
 def get_carts(db: Session, skip: int = 0, limit: int = 10):
     return db.query(models.Cart).offset(skip).limit(limit).all()
 
 
+CART_FIELDS = schema_columns(schemas.Cart, models.Cart)
+
+
+def cart_rows_query(skip: int = 0, limit: int = 10):
+    return select(*CART_FIELDS).offset(skip).limit(limit)
+
+
+def get_cart_rows(db: Session, skip: int = 0, limit: int = 10):
+    return db.execute(cart_rows_query(skip, limit))
+
+
+# Row-version queries behind the ETags in review_backend.conditional; each reads the
+# same rows as the matching read, but only ids and versions. Shared with async_crud
+def cart_versions_query(skip: int = 0, limit: int = 10):
+    return select(models.Cart.cart_id, models.Cart.version).offset(skip).limit(limit)
+
+
+def cart_version(cart, with_purchases: bool = False) -> tuple:
+    """ETag version of a loaded cart, and of its loaded purchases with with_purchases.
+
+    Single-cart reads load the row anyway, so the ETag costs no extra statement; the
+    full response serialization is still skipped on a match.
+    """
+    if not with_purchases:
+        return (cart.version,)
+    purchases = cart.purchases
+    return (
+        cart.version,
+        len(purchases),
+        max((purchase.purchase_id for purchase in purchases), default=None),
+        sum(purchase.version for purchase in purchases) if purchases else None,
+    )
+
+
+def get_cart_versions(db: Session, skip: int = 0, limit: int = 10):
+    return db.execute(cart_versions_query(skip, limit)).all()
+
+
+# Keyset orderings: (sort keys ending in the primary key, newest first?)
+CART_ORDERS = {
+    "id": ([models.Cart.cart_id], False),
+    "date": ([models.Cart.purchase_date, models.Cart.cart_id], True),
+}
+
+
+def get_carts_page(db: Session, cursor: str = None, limit: int = 10, order: str = "id"):
+    keys, descending = CART_ORDERS[order]
+    return paginate(db.query(models.Cart), keys, order, cursor=cursor, limit=limit, descending=descending)
+
+
 def create_cart(db: Session, cart: schemas.CartCreate):
     db_cart = models.Cart(
         user_id=cart.user_id,
@@ -133,6 +322,33 @@ def update_cart_total(db: Session, cart_id: int, cart_total: float):
 # ------------------------------------
 # PURCHASE FUNCTIONS
 # ------------------------------------
+# Cart.cart_total is maintained by the server: every purchase write applies its
+# line-total delta to the cart in the same transaction, and reconcile_cart_totals
+# recomputes from the purchases table to catch drift.
+def line_total(price, quantity) -> float:
+    return (price or 0.0) * (quantity or 0)
+
+
+def cart_total_delta(cart_id: int, delta: float):
+    # O(1) UPDATE carts SET cart_total = cart_total + :delta, shared with async_crud
+    return (
+        update(models.Cart)
+        .where(models.Cart.cart_id == cart_id)
+        .values(cart_total=models.Cart.cart_total + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def cart_total_deltas(deltas: dict):
+    # One UPDATE for many carts: cart_total + CASE cart_id WHEN ... THEN delta END
+    return (
+        update(models.Cart)
+        .where(models.Cart.cart_id.in_(deltas))
+        .values(cart_total=models.Cart.cart_total + case(deltas, value=models.Cart.cart_id, else_=0.0))
+        .execution_options(synchronize_session=False)
+    )
+
+
 def create_purchase(db: Session, purchase: schemas.PurchaseCreate):
     db_purchase = models.Purchase(
         cart_id=purchase.cart_id,
@@ -145,6 +361,10 @@ def create_purchase(db: Session, purchase: schemas.PurchaseCreate):
     )
     db.add(db_purchase)
     try:
+        db.execute(cart_total_delta(purchase.cart_id, line_total(purchase.product_price, purchase.product_quantity)))
+        rollups.apply_lines(db, [rollups.purchase_line(
+            purchase.cart_id, purchase.product_id, purchase.product_price, purchase.product_quantity, purchase.on_sale
+        )])
         db.commit()
         db.refresh(db_purchase)
     except Exception as e:
@@ -154,6 +374,87 @@ def create_purchase(db: Session, purchase: schemas.PurchaseCreate):
     return db_purchase
 
 
+# Rows per INSERT statement for bulk ingestion; keeps packets well under max_allowed_packet
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def _purchase_row(purchase: schemas.PurchaseCreate, cart_id: int = None) -> dict:
+    return {
+        "cart_id": cart_id if cart_id is not None else purchase.cart_id,
+        "product_id": purchase.product_id,
+        "product_quantity": purchase.product_quantity,
+        "product_price": purchase.product_price,
+        "on_sale": purchase.on_sale,
+        "purchased": purchase.purchased,
+        "input_date": purchase.input_date,
+    }
+
+
+def _insert_purchase_rows(db: Session, rows: list) -> list:
+    dialect = db.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        # SQLite / MariaDB / PostgreSQL: batched multi-row INSERT ... RETURNING, ids in input order
+        stmt = insert(models.Purchase).returning(models.Purchase.purchase_id, sort_by_parameter_order=True)
+        return list(db.scalars(stmt, rows))
+    # MySQL has no RETURNING. A multi-row INSERT is a "simple insert" to InnoDB, which
+    # reserves its auto-increment block up front, so ids are consecutive from LAST_INSERT_ID()
+    purchase_ids = []
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_INSERT_CHUNK_SIZE]
+        first_id = db.execute(insert(models.Purchase).values(chunk)).lastrowid
+        purchase_ids.extend(range(first_id, first_id + len(chunk)))
+    return purchase_ids
+
+
+def _purchases_subtotal():
+    return func.coalesce(func.sum(models.Purchase.product_price * models.Purchase.product_quantity), 0.0)
+
+
+def recompute_cart_totals(db: Session, cart_ids):
+    # Set cart_total from the purchases table in one UPDATE; caller commits
+    subtotal = (
+        select(_purchases_subtotal())
+        .where(models.Purchase.cart_id == models.Cart.cart_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(models.Cart)
+        .where(models.Cart.cart_id.in_(cart_ids))
+        .values(cart_total=subtotal)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def create_purchases_bulk(db: Session, purchases: list, cart_id: int = None):
+    """Insert many purchases and update their carts' totals in a single transaction.
+
+    Returns (purchase_ids, carts) where carts are the (cart_id, cart_total) rows touched.
+    """
+    rows = [_purchase_row(purchase, cart_id) for purchase in purchases]
+    if not rows:
+        return [], []
+    deltas = {}
+    for row in rows:
+        deltas[row["cart_id"]] = deltas.get(row["cart_id"], 0.0) + line_total(row["product_price"], row["product_quantity"])
+    cart_ids = sorted(deltas)
+    try:
+        purchase_ids = _insert_purchase_rows(db, rows)
+        db.execute(cart_total_deltas(deltas))
+        rollups.apply_lines(db, [
+            rollups.purchase_line(row["cart_id"], row["product_id"], row["product_price"], row["product_quantity"], row["on_sale"])
+            for row in rows
+        ])
+        carts = db.execute(
+            select(models.Cart.cart_id, models.Cart.cart_total).where(models.Cart.cart_id.in_(cart_ids))
+        ).all()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error creating purchases in bulk: {e}")
+        raise e
+    return purchase_ids, carts
+
+
 def get_purchase_by_id(db: Session, purchase_id: int):
     return db.query(models.Purchase).filter(models.Purchase.purchase_id == purchase_id).first()
 
@@ -162,6 +463,30 @@ def get_purchases(db: Session, skip: int = 0, limit: int = 10):
     return db.query(models.Purchase).offset(skip).limit(limit).all()
 
 
+PURCHASE_FIELDS = schema_columns(schemas.Purchase, models.Purchase)
+
+
+def purchase_rows_query(skip: int = 0, limit: int = 10, cart_id: int = None):
+    if cart_id is not None:
+        return select(*PURCHASE_FIELDS).where(models.Purchase.cart_id == cart_id)
+    return select(*PURCHASE_FIELDS).offset(skip).limit(limit)
+
+
+def get_purchase_rows(db: Session, skip: int = 0, limit: int = 10, cart_id: int = None):
+    return db.execute(purchase_rows_query(skip, limit, cart_id))
+
+
+PURCHASE_ORDERS = {
+    "id": ([models.Purchase.purchase_id], False),
+    "date": ([models.Purchase.input_date, models.Purchase.purchase_id], True),
+}
+
+
+def get_purchases_page(db: Session, cursor: str = None, limit: int = 10, order: str = "id"):
+    keys, descending = PURCHASE_ORDERS[order]
+    return paginate(db.query(models.Purchase), keys, order, cursor=cursor, limit=limit, descending=descending)
+
+
 def get_purchases_by_cart_id(db: Session, cart_id: int):
     return db.query(models.Purchase).filter(models.Purchase.cart_id == cart_id).all()
 
@@ -176,6 +501,10 @@ def delete_purchase(db: Session, purchase_id: int):
     purchase = db.query(models.Purchase).filter(models.Purchase.purchase_id == purchase_id).first()
     if purchase:
         db.delete(purchase)
+        db.execute(cart_total_delta(purchase.cart_id, -line_total(purchase.product_price, purchase.product_quantity)))
+        rollups.apply_lines(db, [rollups.purchase_line(
+            purchase.cart_id, purchase.product_id, purchase.product_price, purchase.product_quantity, purchase.on_sale, sign=-1
+        )])
         db.commit()
         return purchase
     return None
@@ -184,13 +513,53 @@ def update_purchase(db: Session, purchase_id: int, purchase: schemas.PurchaseUpd
     db_purchase = db.query(models.Purchase).filter(models.Purchase.purchase_id == purchase_id).first()
     if not db_purchase:
         raise HTTPException(status_code=404, detail="Purchase not found")
+    old_total = line_total(db_purchase.product_price, db_purchase.product_quantity)
+    old_line = rollups.purchase_line(
+        db_purchase.cart_id, db_purchase.product_id, db_purchase.product_price, db_purchase.product_quantity, db_purchase.on_sale, sign=-1
+    )
     update_data = purchase.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_purchase, key, value)
+    delta = line_total(db_purchase.product_price, db_purchase.product_quantity) - old_total
+    if delta:
+        db.execute(cart_total_delta(db_purchase.cart_id, delta))
+    rollups.apply_lines(db, [old_line, rollups.purchase_line(
+        db_purchase.cart_id, db_purchase.product_id, db_purchase.product_price, db_purchase.product_quantity, db_purchase.on_sale
+    )])
     db.commit()
     db.refresh(db_purchase)
     return db_purchase
 
+
+def find_cart_total_drift(db: Session, tolerance: float = 0.005, cart_ids=None):
+    """Carts whose stored cart_total differs from the sum of their purchases.
+
+    Returns (cart_id, stored_total, computed_total) rows from a single GROUP BY.
+    """
+    computed = _purchases_subtotal()
+    query = (
+        db.query(models.Cart.cart_id, models.Cart.cart_total, computed)
+        .outerjoin(models.Purchase, models.Purchase.cart_id == models.Cart.cart_id)
+        .group_by(models.Cart.cart_id, models.Cart.cart_total)
+        .having(func.abs(models.Cart.cart_total - computed) > tolerance)
+    )
+    if cart_ids is not None:
+        query = query.filter(models.Cart.cart_id.in_(cart_ids))
+    return query.all()
+
+
+def reconcile_cart_totals(db: Session, tolerance: float = 0.005, fix: bool = True, batch_size: int = 1000):
+    """Detect cart_total drift and, if fix, recompute the drifted carts in batches."""
+    drifted = find_cart_total_drift(db, tolerance=tolerance)
+    if drifted:
+        logger.warning(f"{len(drifted)} carts have drifted cart_total values")
+    if fix:
+        cart_ids = [row.cart_id for row in drifted]
+        for start in range(0, len(cart_ids), batch_size):
+            recompute_cart_totals(db, cart_ids[start:start + batch_size])
+            db.commit()
+    return drifted
+
 # ------------------------------------
 # USER FUNCTIONS
 # ------------------------------------
@@ -233,10 +602,25 @@ def get_grocery_lists(db: Session, user_id: str):
     return db.query(models.GroceryList).filter(models.GroceryList.user_id == user_id).all()
 
 
+def grocery_list_versions_query(user_id: str):
+    return select(models.GroceryList.list_id, models.GroceryList.version).where(models.GroceryList.user_id == user_id)
+
+
+def get_grocery_list_versions(db: Session, user_id: str):
+    return db.execute(grocery_list_versions_query(user_id)).all()
+
+
 def get_grocery_list_items(db: Session, list_id: int):
     return db.query(models.GroceryListItem).filter(models.GroceryListItem.grocery_list_id == list_id).all()
 
 
+GROCERY_LIST_EXPANDED = selectinload(models.GroceryList.items).joinedload(models.GroceryListItem.product)
+
+
+def get_grocery_list_expanded(db: Session, list_id: int):
+    return db.query(models.GroceryList).options(GROCERY_LIST_EXPANDED).filter(models.GroceryList.list_id == list_id).first()
+
+
 def update_grocery_list(db: Session, list_id: int, list_update: schemas.GroceryListUpdate):
     db_list = db.query(models.GroceryList).filter(models.GroceryList.list_id == list_id).first()
     if db_list is None:
@@ -268,6 +652,7 @@ def create_packaging_option(db: Session, packaging_option: schemas.PackagingOpti
         db.rollback()
         logger.error(f"Error creating packaging option: {e}")
         raise e
+    reference_cache.invalidate("packaging_options")
     return db_packaging_option
 
 
@@ -281,8 +666,26 @@ def create_unit_of_measurement(db: Session, unit_of_measurement: schemas.UnitOfM
         db.rollback()
         logger.error(f"Error creating unit of measurement: {e}")
         raise e
+    reference_cache.invalidate("units_of_measurement")
     return db_unit_of_measurement
 
 def get_packaging_options(db: Session):
 
-    return db.query(models.PackagingOption).all()
\ No newline at end of file
+    return reference_cache.get_or_load(
+        "packaging_options", "all", PACKAGING_OPTIONS_ADAPTER, lambda: db.query(models.PackagingOption).all()
+    )
+
+
+def get_packaging_option_by_id(db: Session, packaging_id: int):
+    # Served from the cached list; there are only a handful of packaging options
+    return next((option for option in get_packaging_options(db) if option.id == packaging_id), None)
+
+
+def get_units_of_measurement(db: Session):
+    return reference_cache.get_or_load(
+        "units_of_measurement", "all", UNITS_OF_MEASUREMENT_ADAPTER, lambda: db.query(models.UnitOfMeasurement).all()
+    )
+
+
+def get_unit_of_measurement_by_id(db: Session, unit_id: int):
+    return next((unit for unit in get_units_of_measurement(db) if unit.id == unit_id), None)
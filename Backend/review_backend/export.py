@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from review_backend import models
+from review_backend.database import SessionLocal
+
+# Streaming exports. Rows come off a server-side cursor (stream_results/yield_per)
+# as plain tuples and are written out one batch at a time, so memory stays flat no
+# matter how many rows match and the first bytes go out as soon as the first batch
+# is fetched.
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CART_COLUMNS = [
+    models.Cart.cart_id,
+    models.Cart.user_id,
+    models.Cart.cart_name,
+    models.Cart.purchase_date,
+    models.Cart.store_id,
+    models.Cart.cart_total,
+]
+
+PURCHASE_COLUMNS = [
+    models.Purchase.purchase_id,
+    models.Purchase.cart_id,
+    models.Purchase.product_id,
+    models.Cart.store_id,
+    models.Cart.user_id,
+    models.Purchase.product_quantity,
+    models.Purchase.product_price,
+    models.Purchase.on_sale,
+    models.Purchase.purchased,
+    models.Purchase.input_date,
+]
+
+
+def carts_query(user_id: str = None, start_date: date = None, end_date: date = None):
+    stmt = select(*CART_COLUMNS)
+    if user_id:
+        stmt = stmt.where(models.Cart.user_id == user_id)
+    if start_date:
+        stmt = stmt.where(models.Cart.purchase_date >= start_date)
+    if end_date:
+        stmt = stmt.where(models.Cart.purchase_date <= end_date)
+    return stmt.order_by(models.Cart.cart_id)
+
+
+def purchases_query(user_id: str = None, start_date: date = None, end_date: date = None):
+    stmt = select(*PURCHASE_COLUMNS).join(models.Cart, models.Cart.cart_id == models.Purchase.cart_id)
+    if user_id:
+        stmt = stmt.where(models.Cart.user_id == user_id)
+    # input_date is a DATETIME; compare against whole days
+    if start_date:
+        stmt = stmt.where(models.Purchase.input_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        stmt = stmt.where(models.Purchase.input_date <= datetime.combine(end_date, datetime.max.time()))
+    return stmt.order_by(models.Purchase.purchase_id)
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _ndjson_batch(names, rows) -> str:
+    return "".join(
+        json.dumps({name: _json_value(value) for name, value in zip(names, row)}, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def stream_export(stmt, fmt: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield the result of stmt as NDJSON or CSV text, one batch of rows per chunk.
+
+    Opens its own session: a StreamingResponse body runs after the request's
+    get_db dependency has already closed its session.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        names = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(names)
+            yield buffer.getvalue()
+        for rows in result.partitions():
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield _ndjson_batch(names, rows)
+    finally:
+        db.close()
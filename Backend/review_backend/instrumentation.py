@@ -0,0 +1,237 @@
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import event
+
+# Request-level performance instrumentation. An ASGI middleware times every request
+# per route template and status code; SQLAlchemy cursor events count the
+# statements each request sends, time them, and log the ones slower than
+# SLOW_QUERY_SECONDS with their parameters and the database's EXPLAIN plan.
+# render_metrics() exposes it all, plus the connection pool metrics, in the
+# Prometheus text format for GET /metrics.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.5"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_PARAMETERS_CHARS = 500  # Logged parameters are truncated to this many characters
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+logger = logging.getLogger(__name__)
+
+# Statement count of the request being handled; copied into threadpool workers with the context
+_request_statements = contextvars.ContextVar("request_statements", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class StatementCount:
+    def __init__(self):
+        self.count = 0
+
+
+class RequestMetrics:
+    """Per-route request latency and SQL statement histograms, request counts by status, query stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (method, route)
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))  # (method, route)
+        self.requests = defaultdict(int)  # (method, route, status)
+        self.queries = Histogram(LATENCY_BUCKETS)
+        self.slow_queries = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, statements: int):
+        with self._lock:
+            self.latency[(method, route)].observe(seconds)
+            self.statements[(method, route)].observe(statements)
+            self.requests[(method, route, status)] += 1
+
+    def observe_query(self, seconds: float, slow: bool):
+        with self._lock:
+            self.queries.observe(seconds)
+            self.slow_queries += slow
+
+
+request_metrics = RequestMetrics()
+
+
+# ------------------------------------
+# MIDDLEWARE
+# ------------------------------------
+class MetricsMiddleware:
+    """Pure ASGI middleware, so the timing covers streamed response bodies too."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        statements = StatementCount()
+        token = _request_statements.set(statements)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_statements.reset(token)
+            # The route template, not the raw path, keeps label cardinality bounded
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - start, statements.count
+            )
+
+
+# ------------------------------------
+# SQL EVENTS
+# ------------------------------------
+def _explain(conn, statement: str, parameters) -> str:
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    # A separate DBAPI cursor, so the slow statement's own results stay untouched
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join("  " + " | ".join(str(value) for value in row) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+    statements = _request_statements.get()
+    if statements is not None:
+        statements.count += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    slow = elapsed >= SLOW_QUERY_SECONDS
+    request_metrics.observe_query(elapsed, slow)
+    if not slow:
+        return
+    plan = ""
+    if SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+        try:
+            plan = "\nplan:\n" + _explain(conn, statement, parameters)
+        except Exception as e:
+            plan = f"\nplan: EXPLAIN failed: {e}"
+    logger.warning(
+        f"Slow query ({elapsed * 1000:.1f} ms): {statement}\n"
+        f"parameters: {str(parameters)[:SLOW_QUERY_PARAMETERS_CHARS]}{plan}"
+    )
+
+
+def instrument_engine(engine):
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+def install(app, engines, log: logging.Logger = None):
+    """Add the metrics middleware to app and the SQL hooks to engines (sync or async)."""
+    global logger
+    if not METRICS_ENABLED:
+        return
+    if log is not None:
+        logger = log
+    app.add_middleware(MetricsMiddleware)
+    for engine in engines:
+        if engine is not None:
+            instrument_engine(engine)
+
+
+# ------------------------------------
+# PROMETHEUS TEXT FORMAT
+# ------------------------------------
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _header(lines: list, name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram_lines(lines: list, name: str, buckets: tuple, counts: list, total: float, **labels):
+    cumulative = 0
+    for bound, count in zip(buckets + ("+Inf",), counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+
+
+def render_metrics(pool_stats: dict, metrics: RequestMetrics = request_metrics) -> str:
+    lines = []
+    with metrics._lock:
+        _header(lines, "http_requests_total", "counter", "HTTP requests by route template and status code.")
+        for (method, route, status), count in sorted(metrics.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+        _header(lines, "http_request_duration_seconds", "histogram", "HTTP request latency by route template.")
+        for (method, route), histogram in sorted(metrics.latency.items()):
+            _histogram_lines(lines, "http_request_duration_seconds", histogram.buckets, histogram.counts, histogram.sum,
+                             method=method, route=route)
+        _header(lines, "http_request_sql_statements", "histogram", "SQL statements executed per HTTP request.")
+        for (method, route), histogram in sorted(metrics.statements.items()):
+            _histogram_lines(lines, "http_request_sql_statements", histogram.buckets, histogram.counts, histogram.sum,
+                             method=method, route=route)
+        _header(lines, "db_query_duration_seconds", "histogram", "SQL statement execution time.")
+        _histogram_lines(lines, "db_query_duration_seconds", metrics.queries.buckets, metrics.queries.counts, metrics.queries.sum)
+        _header(lines, "db_slow_queries_total", "counter", f"SQL statements slower than SLOW_QUERY_SECONDS ({SLOW_QUERY_SECONDS}).")
+        lines.append(f"db_slow_queries_total {metrics.slow_queries}")
+
+    # Connection pool metrics (review_backend.pool_metrics), one series per engine
+    counters = (("connects", "Connections opened."), ("timeouts", "Checkouts that timed out."),
+                ("invalidations", "Connections invalidated."))
+    for field, help_text in counters:
+        _header(lines, f"db_pool_{field}_total", "counter", help_text)
+        for pool, stats in pool_stats.items():
+            lines.append(f"db_pool_{field}_total{_labels(pool=pool)} {stats[field]}")
+    for field in ("size", "checked_in", "checked_out", "overflow"):
+        _header(lines, f"db_pool_{field}", "gauge", f"Connection pool {field.replace('_', ' ')}.")
+        for pool, stats in pool_stats.items():
+            if field in stats:
+                lines.append(f"db_pool_{field}{_labels(pool=pool)} {stats[field]}")
+    _header(lines, "db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.")
+    for pool, stats in pool_stats.items():
+        histogram = stats["wait_histogram"]
+        buckets = tuple(float(bound) for bound in histogram if bound != "+Inf")
+        _histogram_lines(lines, "db_pool_checkout_wait_seconds", buckets, list(histogram.values()), stats["wait_sum_seconds"], pool=pool)
+    return "\n".join(lines) + "\n"
@@ -1,18 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 #import crud  # CRUD functions
 #import schema  # Pydantic models
 #import models  # SQLAlchemy models
-from review_backend import models, schema, crud  # Explicit absolute imports
-from review_backend.database import SessionLocal, engine
-from typing import List
+from review_backend import models, schemas, crud, export, analytics, price_history, serialization, bulk_import, instrumentation  # Explicit absolute imports
+from review_backend.database import SessionLocal, engine, async_engine, USE_ASYNC_DB, get_pool_stats
+from review_backend.cache import reference_cache
+from review_backend.conditional import etag_headers, make_etag, not_modified
+from review_backend.pagination import MAX_PAGE_SIZE
+from typing import List, Literal, Optional
+from datetime import date
 import logging
+import tempfile
 
 # Initialize FastAPI and database
 models.Base.metadata.create_all(bind=engine)
 logger = logging.getLogger(__name__)
 app = FastAPI()
 
+# Per-route latency and SQL statement metrics for /metrics; slow queries are logged here
+instrumentation.install(app, [engine, async_engine], logger)
+
+# In async mode the AsyncEngine-backed handlers are registered first so they win
+# route matching; endpoints without an async variant fall through to the ones below
+if USE_ASYNC_DB:
+    from review_backend.async_routes import router as async_router
+    app.include_router(async_router)
+
 # Dependency to get the database session
 def get_db():
     db = SessionLocal()
@@ -25,233 +41,481 @@ def get_db():
 # ------------------------------------
 # STORE ENDPOINTS
 # ------------------------------------
-@app.post("/stores/", response_model=schema.Store)
-def create_store(store: schema.StoreCreate, db: Session = Depends(get_db)):
-    return schema.Store.from_orm(crud.create_store(db=db, store=store))
+@app.post("/stores/", response_model=schemas.Store)
+def create_store(store: schemas.StoreCreate, db: Session = Depends(get_db)):
+    return schemas.Store.from_orm(crud.create_store(db=db, store=store))
 
 
-@app.get("/stores/", response_model=List[schema.Store])
+@app.get("/stores/", response_model=List[schemas.Store])
 def read_stores(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
     stores = crud.get_stores(db, skip=skip, limit=limit)
-    return [schema.Store.from_orm(store) for store in stores]
+    return [schemas.Store.from_orm(store) for store in stores]
+
+
+@app.get("/stores/page/", response_model=schemas.Page[schemas.Store])
+def read_stores_page(cursor: Optional[str] = None, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    stores, next_cursor = crud.get_stores_page(db, cursor=cursor, limit=limit)
+    return schemas.Page[schemas.Store](items=[schemas.Store.from_orm(store) for store in stores], next_cursor=next_cursor)
 
 
-@app.get("/stores/{store_id}", response_model=schema.Store)
+@app.get("/stores/{store_id}", response_model=schemas.Store)
 def read_store(store_id: int, db: Session = Depends(get_db)):
     store = crud.get_store(db, store_id=store_id)
     if store is None:
         raise HTTPException(status_code=404, detail="Store not found")
-    return schema.Store.from_orm(store)
+    return schemas.Store.from_orm(store)
 
 
 # ------------------------------------
 # PRODUCT ENDPOINTS
 # ------------------------------------
-@app.post("/products/", response_model=schema.Product)
-def create_product(product: schema.ProductCreate, db: Session = Depends(get_db)):
-    return schema.Product.from_orm(crud.create_product(db=db, product=product))
+@app.post("/products/", response_model=schemas.Product)
+def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
+    return schemas.Product.from_orm(crud.create_product(db=db, product=product))
+
+
+# Find-or-create by the six identifying fields with a native upsert; safe to call
+# concurrently for the same product, every caller gets the one canonical product_id
+@app.put("/products/resolve", response_model=schemas.ProductResolved)
+def resolve_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
+    (product_id,), created = crud.resolve_product_batch(db, [product])
+    return schemas.ProductResolved(product_id=product_id, created=bool(created))
+
 
+@app.put("/products/resolve/batch", response_model=schemas.ProductResolveBatchResponse)
+def resolve_products(batch: schemas.ProductResolveBatch, db: Session = Depends(get_db)):
+    product_ids, created = crud.resolve_product_batch(db, batch.products)
+    return schemas.ProductResolveBatchResponse(product_ids=product_ids, created=created)
 
-@app.get("/products/", response_model=List[schema.Product])
+
+@app.get("/products/", response_model=List[schemas.Product])
 def read_products(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = crud.get_product_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result)
     products = crud.get_products(db, skip=skip, limit=limit)
-    return [schema.Product.from_orm(product) for product in products]
+    return [schemas.Product.from_orm(product) for product in products]
+
 
+@app.get("/products/page/", response_model=schemas.Page[schemas.Product])
+def read_products_page(cursor: Optional[str] = None, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    products, next_cursor = crud.get_products_page(db, cursor=cursor, limit=limit)
+    return schemas.Page[schemas.Product](items=[schemas.Product.from_orm(product) for product in products], next_cursor=next_cursor)
 
-@app.get("/products/{product_id}", response_model=schema.Product)
-def read_product(product_id: int, db: Session = Depends(get_db)):
+
+@app.get("/products/{product_id}", response_model=schemas.Product)
+def read_product(product_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     product = crud.get_product(db, product_id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return schema.Product.from_orm(product)
+    # Products are never updated in place, so their content is their version
+    cached = not_modified(request, response, make_etag(tuple(product.model_dump().values())))
+    if cached is not None:
+        return cached
+    return schemas.Product.from_orm(product)
 
 
-@app.get("/products/search/", response_model=List[schema.Product])
+@app.get("/products/search/", response_model=List[schemas.Product])
 def search_products(search: str, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
     products = crud.search_products(db, search=search, skip=skip, limit=limit)
     if not products:
         raise HTTPException(status_code=404, detail="No products match your search criteria")
-    return [schema.Product.from_orm(product) for product in products]
+    return [schemas.Product.from_orm(product) for product in products]
 
 
 # ------------------------------------
 # CART ENDPOINTS
 # ------------------------------------
-@app.post("/carts/", response_model=schema.Cart)
-def create_cart(cart: schema.CartCreate, db: Session = Depends(get_db)):
-    return schema.Cart.from_orm(crud.create_cart(db=db, cart=cart))
+@app.post("/carts/", response_model=schemas.Cart)
+def create_cart(cart: schemas.CartCreate, db: Session = Depends(get_db)):
+    return schemas.Cart.from_orm(crud.create_cart(db=db, cart=cart))
+
+
+# Conditional reads: the ETag comes from an ids-and-versions query; the full read and
+# serialization only happen when it differs from the client's If-None-Match
+@app.get("/carts/", response_model=List[schemas.Cart])
+def read_carts(request: Request, response: Response, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    etag = make_etag(skip, limit, tuple(map(tuple, crud.get_cart_versions(db, skip=skip, limit=limit))))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    if serialization.FAST_SERIALIZATION:
+        result = crud.get_cart_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result, headers=etag_headers(etag))
+    carts = crud.get_carts(db, skip=skip, limit=limit)
+    return [schemas.Cart.from_orm(cart) for cart in carts]
 
 
-@app.get("/carts/", response_model=List[schema.Cart])
-def read_carts(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    carts = crud.get_carts(db, skip=skip, limit=limit)
-    return [schema.Cart.from_orm(cart) for cart in carts]
+@app.get("/carts/page/", response_model=schemas.Page[schemas.Cart])
+def read_carts_page(cursor: Optional[str] = None, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), order: Literal["id", "date"] = "id", db: Session = Depends(get_db)):
+    carts, next_cursor = crud.get_carts_page(db, cursor=cursor, limit=limit, order=order)
+    return schemas.Page[schemas.Cart](items=[schemas.Cart.from_orm(cart) for cart in carts], next_cursor=next_cursor)
+
+
+@app.get("/carts/{cart_id}/expanded", response_model=schemas.CartExpanded)
+def read_cart_expanded(cart_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    cart = crud.get_cart_expanded(db, cart_id=cart_id)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    cached = not_modified(request, response, make_etag("expanded", cart_id, crud.cart_version(cart, with_purchases=True)))
+    if cached is not None:
+        return cached
+    return schemas.CartExpanded.from_orm(cart)
 
 
-@app.get("/carts/{cart_id}", response_model=schema.Cart)
-def read_cart(cart_id: int, db: Session = Depends(get_db)):
+@app.get("/carts/{cart_id}", response_model=schemas.Cart)
+def read_cart(cart_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     cart = crud.get_cart(db, cart_id=cart_id)
     if cart is None:
         raise HTTPException(status_code=404, detail="Cart not found")
-    return schema.Cart.from_orm(cart)
+    cached = not_modified(request, response, make_etag(cart_id, crud.cart_version(cart)))
+    if cached is not None:
+        return cached
+    return schemas.Cart.from_orm(cart)
 
 
-@app.put("/carts/{cart_id}/", response_model=schema.Cart)
-def update_cart(cart_id: int, cart_update: schema.CartUpdate, db: Session = Depends(get_db)):
+# cart_total is maintained server-side from purchase writes; kept for older clients
+@app.put("/carts/{cart_id}/", response_model=schemas.Cart, deprecated=True)
+def update_cart(cart_id: int, cart_update: schemas.CartUpdate, db: Session = Depends(get_db)):
     updated_cart = crud.update_cart_total(db, cart_id=cart_id, cart_total=cart_update.cart_total)
     if updated_cart is None:
         raise HTTPException(status_code=404, detail="Cart not found")
-    return schema.Cart.from_orm(updated_cart)
+    return schemas.Cart.from_orm(updated_cart)
 
 
-@app.get("/carts/all/", response_model=List[schema.Cart])
+@app.post("/carts/{cart_id}/purchases", response_model=schemas.PurchaseBulkResponse)
+def create_cart_purchases(cart_id: int, purchases: List[schemas.PurchaseCreate], db: Session = Depends(get_db)):
+    if crud.get_cart(db, cart_id=cart_id) is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    purchase_ids, carts = crud.create_purchases_bulk(db, purchases=purchases, cart_id=cart_id)
+    return schemas.PurchaseBulkResponse(
+        purchase_ids=purchase_ids, carts=[schemas.CartResponse.from_orm(cart) for cart in carts]
+    )
+
+
+@app.get("/carts/all/", response_model=List[schemas.Cart])
 def read_all_carts(db: Session = Depends(get_db)):
     carts = crud.get_all_carts(db)
-    return [schema.Cart.from_orm(cart) for cart in carts]
+    return [schemas.Cart.from_orm(cart) for cart in carts]
 
 
 # ------------------------------------
 # PURCHASE ENDPOINTS
 # ------------------------------------
-@app.post("/purchases/", response_model=schema.Purchase)
-def create_purchase(purchase: schema.PurchaseCreate, db: Session = Depends(get_db)):
-    return schema.Purchase.from_orm(crud.create_purchase(db=db, purchase=purchase))
+@app.post("/purchases/", response_model=schemas.Purchase)
+def create_purchase(purchase: schemas.PurchaseCreate, db: Session = Depends(get_db)):
+    return schemas.Purchase.from_orm(crud.create_purchase(db=db, purchase=purchase))
+
+
+@app.post("/purchases/bulk", response_model=schemas.PurchaseBulkResponse)
+def create_purchases_bulk(purchases: List[schemas.PurchaseCreate], db: Session = Depends(get_db)):
+    purchase_ids, carts = crud.create_purchases_bulk(db, purchases=purchases)
+    return schemas.PurchaseBulkResponse(
+        purchase_ids=purchase_ids, carts=[schemas.CartResponse.from_orm(cart) for cart in carts]
+    )
 
 
-@app.get("/purchases/", response_model=List[schema.Purchase])
+@app.get("/purchases/", response_model=List[schemas.Purchase])
 def read_purchases(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = crud.get_purchase_rows(db, skip=skip, limit=limit)
+        return serialization.rows_response(result.keys(), result)
     purchases = crud.get_purchases(db, skip=skip, limit=limit)
-    return [schema.Purchase.from_orm(purchase) for purchase in purchases]
+    return [schemas.Purchase.from_orm(purchase) for purchase in purchases]
 
 
-@app.get("/purchases/{purchase_id}", response_model=schema.Purchase)
+@app.get("/purchases/page/", response_model=schemas.Page[schemas.Purchase])
+def read_purchases_page(cursor: Optional[str] = None, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), order: Literal["id", "date"] = "id", db: Session = Depends(get_db)):
+    purchases, next_cursor = crud.get_purchases_page(db, cursor=cursor, limit=limit, order=order)
+    return schemas.Page[schemas.Purchase](items=[schemas.Purchase.from_orm(purchase) for purchase in purchases], next_cursor=next_cursor)
+
+
+@app.get("/purchases/{purchase_id}", response_model=schemas.Purchase)
 def read_purchase(purchase_id: int, db: Session = Depends(get_db)):
     purchase = crud.get_purchase_by_id(db, purchase_id=purchase_id)
     if purchase is None:
         raise HTTPException(status_code=404, detail="Purchase not found")
-    return schema.Purchase.from_orm(purchase)
+    return schemas.Purchase.from_orm(purchase)
 
 
-@app.get("/purchases/cart/{cart_id}", response_model=List[schema.Purchase])
+@app.get("/purchases/cart/{cart_id}", response_model=List[schemas.Purchase])
 def read_purchases_by_cart(cart_id: int, db: Session = Depends(get_db)):
+    if serialization.FAST_SERIALIZATION:
+        result = crud.get_purchase_rows(db, cart_id=cart_id)
+        rows = result.all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="No purchases found for the specified cart")
+        return serialization.rows_response(result.keys(), rows)
     purchases = crud.get_purchases_by_cart_id(db, cart_id=cart_id)
     if not purchases:
         raise HTTPException(status_code=404, detail="No purchases found for the specified cart")
-    return [schema.Purchase.from_orm(purchase) for purchase in purchases]
+    return [schemas.Purchase.from_orm(purchase) for purchase in purchases]
 
 
-@app.put("/purchases/{purchase_id}", response_model=schema.Purchase)
-def update_purchase(purchase_id: int, purchase: schema.PurchaseUpdate, db: Session = Depends(get_db)):
+@app.put("/purchases/{purchase_id}", response_model=schemas.Purchase)
+def update_purchase(purchase_id: int, purchase: schemas.PurchaseUpdate, db: Session = Depends(get_db)):
     updated_purchase = crud.update_purchase(db, purchase_id=purchase_id, purchase=purchase)
     if updated_purchase is None:
         raise HTTPException(status_code=404, detail="Purchase not found")
-    return schema.Purchase.from_orm(updated_purchase)
+    return schemas.Purchase.from_orm(updated_purchase)
 
 
-@app.delete("/purchases/{purchase_id}", response_model=schema.Purchase)
+@app.delete("/purchases/{purchase_id}", response_model=schemas.Purchase)
 def delete_purchase(purchase_id: int, db: Session = Depends(get_db)):
     deleted_purchase = crud.delete_purchase(db, purchase_id=purchase_id)
     if deleted_purchase is None:
         raise HTTPException(status_code=404, detail="Purchase not found")
-    return schema.Purchase.from_orm(deleted_purchase)
+    return schemas.Purchase.from_orm(deleted_purchase)
 
 
 # ------------------------------------
 # USER ENDPOINTS
 # ------------------------------------
-@app.post("/users/", response_model=schema.User)
-def create_user(user: schema.UserCreate, db: Session = Depends(get_db)):
-    return schema.User.from_orm(crud.create_user(db=db, user=user))
+@app.post("/users/", response_model=schemas.User)
+def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    return schemas.User.from_orm(crud.create_user(db=db, user=user))
 
 
-@app.get("/users/{user_id}", response_model=schema.User)
+@app.get("/users/{user_id}", response_model=schemas.User)
 def read_user(user_id: str, db: Session = Depends(get_db)):
     user = crud.get_user_by_id(db, user_id=user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return schema.User.from_orm(user)
+    return schemas.User.from_orm(user)
 
 
 # ------------------------------------
 # PACKAGING OPTIONS ENDPOINTS
 # ------------------------------------
-@app.post("/packaging_options/", response_model=schema.PackagingOption)
-def create_packaging_option(packaging_option: schema.PackagingOptionCreate, db: Session = Depends(get_db)):
-    return schema.PackagingOption.from_orm(crud.create_packaging_option(db=db, packaging_option=packaging_option))
+@app.post("/packaging_options/", response_model=schemas.PackagingOption)
+def create_packaging_option(packaging_option: schemas.PackagingOptionCreate, db: Session = Depends(get_db)):
+    return schemas.PackagingOption.from_orm(crud.create_packaging_option(db=db, packaging_option=packaging_option))
 
 
-@app.get("/packaging_options/", response_model=List[schema.PackagingOption])
+@app.get("/packaging_options/", response_model=List[schemas.PackagingOption])
 def read_packaging_options(db: Session = Depends(get_db)):
     options = crud.get_packaging_options(db)
-    return [schema.PackagingOption.from_orm(option) for option in options]
+    return [schemas.PackagingOption.from_orm(option) for option in options]
 
 
-@app.get("/packaging_options/{packaging_id}", response_model=schema.PackagingOption)
+@app.get("/packaging_options/{packaging_id}", response_model=schemas.PackagingOption)
 def read_packaging_option(packaging_id: int, db: Session = Depends(get_db)):
     packaging_option = crud.get_packaging_option_by_id(db, packaging_id=packaging_id)
     if packaging_option is None:
         raise HTTPException(status_code=404, detail="Packaging option not found")
-    return schema.PackagingOption.from_orm(packaging_option)
+    return schemas.PackagingOption.from_orm(packaging_option)
 
 
 # ------------------------------------
 # UNITS OF MEASUREMENT ENDPOINTS
 # ------------------------------------
-@app.post("/units_of_measurement/", response_model=schema.UnitOfMeasurement)
-def create_unit_of_measurement(unit_of_measurement: schema.UnitOfMeasurementCreate, db: Session = Depends(get_db)):
-    return schema.UnitOfMeasurement.from_orm(crud.create_unit_of_measurement(db=db, unit_of_measurement=unit_of_measurement))
+@app.post("/units_of_measurement/", response_model=schemas.UnitOfMeasurement)
+def create_unit_of_measurement(unit_of_measurement: schemas.UnitOfMeasurementCreate, db: Session = Depends(get_db)):
+    return schemas.UnitOfMeasurement.from_orm(crud.create_unit_of_measurement(db=db, unit_of_measurement=unit_of_measurement))
 
 
-@app.get("/units_of_measurement/", response_model=List[schema.UnitOfMeasurement])
+@app.get("/units_of_measurement/", response_model=List[schemas.UnitOfMeasurement])
 def read_units_of_measurement(db: Session = Depends(get_db)):
     units = crud.get_units_of_measurement(db)
-    return [schema.UnitOfMeasurement.from_orm(unit) for unit in units]
+    return [schemas.UnitOfMeasurement.from_orm(unit) for unit in units]
 
 
-@app.get("/units_of_measurement/{unit_id}", response_model=schema.UnitOfMeasurement)
+@app.get("/units_of_measurement/{unit_id}", response_model=schemas.UnitOfMeasurement)
 def read_unit_of_measurement(unit_id: int, db: Session = Depends(get_db)):
     unit = crud.get_unit_of_measurement_by_id(db, unit_id=unit_id)
     if unit is None:
         raise HTTPException(status_code=404, detail="Unit of measurement not found")
-    return schema.UnitOfMeasurement.from_orm(unit)
+    return schemas.UnitOfMeasurement.from_orm(unit)
 
 
 # ------------------------------------
 # GROCERY LIST ENDPOINTS
 # ------------------------------------
-@app.post("/grocery_lists/", response_model=schema.GroceryList)
-def create_grocery_list(grocery_list: schema.GroceryListCreate, db: Session = Depends(get_db)):
-    return schema.GroceryList.from_orm(crud.create_grocery_list(db=db, grocery_list=grocery_list))
+@app.post("/grocery_lists/", response_model=schemas.GroceryList)
+def create_grocery_list(grocery_list: schemas.GroceryListCreate, db: Session = Depends(get_db)):
+    return schemas.GroceryList.from_orm(crud.create_grocery_list(db=db, grocery_list=grocery_list))
 
 
-@app.get("/grocery_lists/{user_id}", response_model=List[schema.GroceryList])
-def read_grocery_lists(user_id: str, db: Session = Depends(get_db)):
+@app.get("/grocery_lists/{user_id}", response_model=List[schemas.GroceryList])
+def read_grocery_lists(user_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    versions = crud.get_grocery_list_versions(db=db, user_id=user_id)
+    cached = not_modified(request, response, make_etag(user_id, tuple(map(tuple, versions))))
+    if cached is not None:
+        return cached
     lists = crud.get_grocery_lists(db=db, user_id=user_id)
-    return [schema.GroceryList.from_orm(g_list) for g_list in lists]
+    return [schemas.GroceryList.from_orm(g_list) for g_list in lists]
 
 
-@app.get("/grocery_lists/{list_id}/items/", response_model=List[schema.GroceryListItem])
+@app.get("/grocery_lists/{list_id}/items/", response_model=List[schemas.GroceryListItem])
 def read_grocery_list_items(list_id: int, db: Session = Depends(get_db)):
     items = crud.get_grocery_list_items(db=db, list_id=list_id)
-    return [schema.GroceryListItem.from_orm(item) for item in items]
+    return [schemas.GroceryListItem.from_orm(item) for item in items]
 
 
-@app.post("/grocery_lists/{list_id}/items/", response_model=schema.GroceryListItem)
-def create_grocery_list_item(list_id: int, item: schema.GroceryListItemCreate, db: Session = Depends(get_db)):
-    return schema.GroceryListItem.from_orm(crud.add_grocery_list_item(db=db, list_id=list_id, item=item))
+@app.get("/grocery_lists/{list_id}/expanded", response_model=schemas.GroceryListExpanded)
+def read_grocery_list_expanded(list_id: int, db: Session = Depends(get_db)):
+    grocery_list = crud.get_grocery_list_expanded(db=db, list_id=list_id)
+    if grocery_list is None:
+        raise HTTPException(status_code=404, detail="Grocery list not found")
+    return schemas.GroceryListExpanded.from_orm(grocery_list)
+
 
+@app.post("/grocery_lists/{list_id}/items/", response_model=schemas.GroceryListItem)
+def create_grocery_list_item(list_id: int, item: schemas.GroceryListItemCreate, db: Session = Depends(get_db)):
+    return schemas.GroceryListItem.from_orm(crud.add_grocery_list_item(db=db, list_id=list_id, item=item))
 
-@app.put("/grocery_lists/{list_id}/", response_model=schema.GroceryList)
-def update_grocery_list(list_id: int, grocery_list: schema.GroceryListUpdate, db: Session = Depends(get_db)):
+
+@app.put("/grocery_lists/{list_id}/", response_model=schemas.GroceryList)
+def update_grocery_list(list_id: int, grocery_list: schemas.GroceryListUpdate, db: Session = Depends(get_db)):
     updated_list = crud.update_grocery_list(db=db, list_id=list_id, list_update=grocery_list)
     if updated_list is None:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    return schema.GroceryList.from_orm(updated_list)
+    return schemas.GroceryList.from_orm(updated_list)
 
 
-@app.delete("/grocery_lists/{list_id}/", response_model=schema.GroceryList)
+@app.delete("/grocery_lists/{list_id}/", response_model=schemas.GroceryList)
 def delete_grocery_list(list_id: int, db: Session = Depends(get_db)):
     deleted_list = crud.delete_grocery_list(db=db, list_id=list_id)
     if deleted_list is None:
         raise HTTPException(status_code=404, detail="Grocery list not found")
-    return schema.GroceryList.from_orm(deleted_list)
+    return schemas.GroceryList.from_orm(deleted_list)
+
+
+
+# ------------------------------------
+# ANALYTICS ENDPOINTS
+# ------------------------------------
+@app.get("/analytics/spending", response_model=schemas.SpendingSeries)
+def read_spending(
+    user_id: str,
+    granularity: Literal["day", "week", "month"] = "month",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    points = analytics.spending_over_time(db, user_id, granularity=granularity, start_date=start_date, end_date=end_date)
+    return schemas.SpendingSeries(user_id=user_id, granularity=granularity, points=points)
+
+
+@app.get("/analytics/spending/stores", response_model=List[schemas.StoreSpending])
+def read_spending_by_store(user_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.spending_by_store(db, user_id, start_date=start_date, end_date=end_date)
+
+
+@app.get("/analytics/spending/products", response_model=List[schemas.ProductSpending])
+def read_spending_by_product(
+    user_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    return analytics.spending_by_product(db, user_id, start_date=start_date, end_date=end_date, limit=limit)
+
+
+@app.get("/analytics/spending/sales", response_model=List[schemas.SaleSpending])
+def read_spending_by_sale(user_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.spending_by_sale(db, user_id, start_date=start_date, end_date=end_date)
+
+
+@app.get("/products/{product_id}/price-history", response_model=schemas.PriceHistory)
+def read_price_history(
+    product_id: int,
+    store_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: Literal["auto", "day", "week", "month"] = "auto",
+    max_points: int = Query(price_history.PRICE_HISTORY_MAX_POINTS, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    return price_history.price_history(
+        db, product_id, store_id=store_id, start_date=start_date, end_date=end_date, granularity=granularity, max_points=max_points
+    )
+
+
+# ------------------------------------
+# EXPORT ENDPOINTS
+# ------------------------------------
+def _export_response(stmt, fmt: str, name: str):
+    return StreamingResponse(
+        export.stream_export(stmt, fmt),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@app.get("/export/carts")
+def export_carts(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    user_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    return _export_response(export.carts_query(user_id, start_date, end_date), fmt, "carts")
+
+
+@app.get("/export/purchases")
+def export_purchases(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    user_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    return _export_response(export.purchases_query(user_id, start_date, end_date), fmt, "purchases")
+
+
+# ------------------------------------
+# IMPORT ENDPOINTS
+# ------------------------------------
+IMPORT_UPLOAD_PIECE = 1024 * 1024
+
+
+def _run_import(table: str, upload, fmt: str, chunk_size: int) -> dict:
+    db = SessionLocal()
+    try:
+        return bulk_import.import_file(db, table, upload, fmt, chunk_size).to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        db.close()
+
+
+@app.post("/import")
+async def import_file(
+    request: Request,
+    table: Literal["products", "stores", "users", "carts", "purchases"],
+    fmt: Literal["csv", "parquet"] = Query("csv", alias="format"),
+    chunk_size: int = Query(bulk_import.IMPORT_CHUNK_SIZE, ge=1, le=100_000),
+):
+    # The request body is the file itself (curl --data-binary @purchases.csv). It is
+    # spooled to a temporary file, then imported chunk by chunk off the event loop
+    if fmt == "parquet" and not bulk_import.parquet_available():
+        raise HTTPException(status_code=415, detail="Parquet import needs pyarrow on the server")
+    with tempfile.TemporaryFile() as upload:
+        async for piece in request.stream():
+            upload.write(piece)
+        upload.seek(0)
+        return await run_in_threadpool(_run_import, table, upload, fmt, chunk_size)
+
+
+# ------------------------------------
+# OPERATIONS ENDPOINTS
+# ------------------------------------
+@app.get("/pool/stats")
+def read_pool_stats():
+    # Live connection pool occupancy and checkout wait histogram, for sizing DB_POOL_*
+    return get_pool_stats()
+
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    # Reference data cache hit/miss/invalidation counters per namespace
+    return reference_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    # Prometheus scrape target: request, SQL and connection pool metrics
+    return PlainTextResponse(
+        instrumentation.render_metrics(get_pool_stats()), media_type=instrumentation.PROMETHEUS_CONTENT_TYPE
+    )
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Maintenance jobs for the review backend database.
+
+    python -m review_backend.maintenance reconcile-cart-totals [--dry-run] [--tolerance 0.005]
+    python -m review_backend.maintenance backfill-rollups [--user-id USER]
+"""
+import argparse
+import logging
+from review_backend import crud, rollups
+from review_backend.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_cart_totals(args):
+    db = SessionLocal()
+    try:
+        drifted = crud.reconcile_cart_totals(db, tolerance=args.tolerance, fix=not args.dry_run, batch_size=args.batch_size)
+    finally:
+        db.close()
+    for cart_id, stored, computed in drifted:
+        print(f"cart {cart_id}: stored {stored:.2f}, purchases sum to {computed:.2f}")
+    action = "found" if args.dry_run else "fixed"
+    print(f"{len(drifted)} drifted carts {action}")
+
+
+def backfill_rollups(args):
+    db = SessionLocal()
+    try:
+        rollups.backfill(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"rollups rebuilt for {args.user_id or 'all users'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review backend maintenance jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser("reconcile-cart-totals", help="recompute cart_total where it drifted from purchases")
+    reconcile.add_argument("--tolerance", type=float, default=0.005)
+    reconcile.add_argument("--batch-size", type=int, default=1000)
+    reconcile.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    reconcile.set_defaults(handler=reconcile_cart_totals)
+
+    backfill = commands.add_parser("backfill-rollups", help="rebuild the spending rollup tables from purchases")
+    backfill.add_argument("--user-id", help="only rebuild this user's rows")
+    backfill.set_defaults(handler=backfill_rollups)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, ForeignKey, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, ForeignKey, func, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from review_backend.database import Base
 
 
+def version_column():
+    # Row version for ETags: starts at 1 and is bumped by every UPDATE, ORM or Core
+    return Column(Integer, nullable=False, default=1, server_default=text("1"), onupdate=text("version + 1"))
+
+
 # Store Table
 class Store(Base):
     __tablename__ = "stores"
@@ -29,6 +34,8 @@ class Product(Base):
             'product_packaging', 'unit_quantity', 'unit_of_measurement',
             name='_product_unique_constraint'
         ),
+        # Backs /products/search/ on MySQL; other databases use review_backend.search's in-process index
+        Index("ft_products_name_brand", "product_name", "product_brand", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
     )
 
 
@@ -42,10 +49,16 @@ class Cart(Base):
     purchase_date = Column(Date, index=True, nullable=False)
     store_id = Column(Integer, ForeignKey("stores.store_id"), nullable=False)  # Linked to stores
     cart_total = Column(Float, default=0.0, nullable=False)
+    version = version_column()
 
     purchases = relationship("Purchase", back_populates="cart")
     store = relationship("Store")  # Reference store
 
+    __table_args__ = (
+        Index("ix_carts_purchase_date_cart_id", "purchase_date", "cart_id"),  # Newest-first keyset pages
+        Index("ix_carts_user_id_purchase_date", "user_id", "purchase_date"),  # Per-user analytics ranges
+    )
+
 
 # Purchase Table
 class Purchase(Base):
@@ -53,16 +66,22 @@ class Purchase(Base):
 
     purchase_id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)  # Linked to products
-    cart_id = Column(Integer, ForeignKey("carts.cart_id"), nullable=False)  # Linked to carts
+    cart_id = Column(Integer, ForeignKey("carts.cart_id"), index=True, nullable=False)  # Linked to carts
     product_quantity = Column(Integer, nullable=False)
     product_price = Column(Float, nullable=False)
     on_sale = Column(Boolean, default=False)
     purchased = Column(Boolean, default=True)
     input_date = Column(DateTime, nullable=False)
+    version = version_column()
 
     cart = relationship("Cart", back_populates="purchases")
     product = relationship("Product")  # Reference product
 
+    __table_args__ = (
+        Index("ix_purchases_input_date_purchase_id", "input_date", "purchase_id"),  # Newest-first keyset pages
+        Index("ix_purchases_product_id_input_date", "product_id", "input_date"),  # Price history ranges
+    )
+
 
 # User Table
 class User(Base):
@@ -82,6 +101,7 @@ class GroceryList(Base):
     name = Column(String(100), nullable=False)
     user_id = Column(String(100), ForeignKey("users.user_id"), nullable=False)  # Linked to users
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    version = version_column()
 
     user = relationship("User", back_populates="grocery_lists")
     items = relationship("GroceryListItem", back_populates="grocery_list")
@@ -118,3 +138,28 @@ class UnitOfMeasurement(Base):
 
     id = Column(Integer, primary_key=True)
     unit_name = Column(String(50), nullable=False, unique=True)  # Unique unit of measurement
+
+
+# Spending Rollup Tables
+# Pre-aggregated spend maintained by crud on every purchase write (see review_backend.rollups),
+# so dashboard reads scan days/months in range rather than every purchase.
+class UserDailyStoreSpend(Base):
+    __tablename__ = "user_daily_store_spend"
+
+    user_id = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True)  # Cart purchase_date
+    store_id = Column(Integer, primary_key=True)
+    total = Column(Float, default=0.0, nullable=False)
+    item_count = Column(Integer, default=0, nullable=False)
+    sale_total = Column(Float, default=0.0, nullable=False)  # Portion of total bought on sale
+    sale_count = Column(Integer, default=0, nullable=False)
+
+
+class UserMonthlyProductSpend(Base):
+    __tablename__ = "user_monthly_product_spend"
+
+    user_id = Column(String(100), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    product_id = Column(Integer, primary_key=True)
+    total = Column(Float, default=0.0, nullable=False)
+    item_count = Column(Integer, default=0, nullable=False)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Keyset (cursor) pagination. A cursor is the sort key of the last row on the
+# previous page, so fetching page N is an index range scan from that key rather
+# than an OFFSET that reads and discards every earlier row.
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(order: str, values) -> str:
+    payload = [order, [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str, keys) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order, raw_values = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_order != order or len(raw_values) != len(keys):
+            raise ValueError("cursor does not match this ordering")
+        values = []
+        for key, value in zip(keys, raw_values):
+            python_type = key.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _after(keys, values, descending: bool):
+    # (k1, k2) > (v1, v2) spelled out as k1 > v1 OR (k1 = v1 AND k2 > v2), which
+    # planners handle more reliably than row-constructor comparisons
+    key, value = keys[0], values[0]
+    beyond = key < value if descending else key > value
+    if len(keys) == 1:
+        return beyond
+    return or_(beyond, and_(key == value, _after(keys[1:], values[1:], descending)))
+
+
+def _seek(keys, values, descending: bool):
+    condition = _after(keys, values, descending)
+    if len(keys) == 1:
+        return condition
+    # The redundant k1 >= v1 bound gives the planner an index range to start from;
+    # the OR alone is evaluated row by row from the top of the index
+    key, value = keys[0], values[0]
+    return and_(key <= value if descending else key >= value, condition)
+
+
+def paginate(query, keys, order: str, cursor: str = None, limit: int = 10, descending: bool = False):
+    """Return (rows, next_cursor) for one page of query ordered by keys.
+
+    keys must end with a unique column (the primary key) so the order is total.
+    next_cursor is None on the last page.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if cursor:
+        query = query.filter(_seek(keys, decode_cursor(cursor, order, keys), descending))
+    query = query.order_by(*[key.desc() if descending else key.asc() for key in keys])
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(order, [getattr(last, key.key) for key in keys])
@@ -0,0 +1,95 @@
+import bisect
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Counters and a checkout wait-time histogram for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # last bucket is +Inf
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_count += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def attach(self, engine):
+        # Connection-level events; checkout waits are timed by the pool class itself
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_sum_seconds": round(self.wait_sum, 6),
+                "wait_max_seconds": round(self.wait_max, 6),
+                "wait_histogram": {
+                    **{str(bound): count for bound, count in zip(WAIT_BUCKETS, self.bucket_counts)},
+                    "+Inf": self.bucket_counts[-1],
+                },
+            }
+        # Live occupancy, only meaningful for queue-based pools
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+class _TimedCheckoutMixin:
+    # _do_get is where QueuePool blocks waiting for a free connection, so timing it
+    # gives the real wait a request sees, including timeouts
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_timeout()
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
+
+
+def timed_pool_class(metrics: PoolMetrics, base=QueuePool):
+    """Return a subclass of base that records checkout waits into metrics."""
+    return type(f"Timed{base.__name__}", (_TimedCheckoutMixin, base), {"metrics": metrics})
+
+
+def timed_async_pool_class(metrics: PoolMetrics):
+    return timed_pool_class(metrics, base=AsyncAdaptedQueuePool)
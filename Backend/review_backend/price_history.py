@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from review_backend import models
+from review_backend.analytics import GRANULARITIES, period_start
+
+# Unit price history for a product, per store and period. One GROUP BY over the
+# product's purchases in range, read through ix_purchases_product_id_input_date,
+# with a window function picking each bucket's last price. Results are returned
+# as columnar arrays (one list per statistic) to keep the payload small for the
+# "is this a good price" checks on the lists page.
+
+PRICE_HISTORY_DEFAULT_DAYS = 365
+PRICE_HISTORY_MAX_POINTS = 90
+
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 31}
+
+
+def pick_granularity(start_date: date, end_date: date, max_points: int = PRICE_HISTORY_MAX_POINTS) -> str:
+    """Finest granularity that keeps the range within max_points buckets."""
+    days = (end_date - start_date).days + 1
+    for granularity in GRANULARITIES:
+        if days / PERIOD_DAYS[granularity] <= max_points:
+            return granularity
+    return GRANULARITIES[-1]
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def price_history(
+    db: Session,
+    product_id: int,
+    store_id: int = None,
+    start_date: date = None,
+    end_date: date = None,
+    granularity: str = "auto",
+    max_points: int = PRICE_HISTORY_MAX_POINTS,
+) -> dict:
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=PRICE_HISTORY_DEFAULT_DAYS)
+    if granularity == "auto":
+        granularity = pick_granularity(start_date, end_date, max_points)
+
+    Purchase = models.Purchase
+    period = period_start(db.get_bind().dialect.name, Purchase.input_date, granularity)
+    latest_first = func.row_number().over(
+        partition_by=(models.Cart.store_id, period),
+        order_by=(Purchase.input_date.desc(), Purchase.purchase_id.desc()),
+    )
+    # input_date is a DATETIME; compare against whole days
+    lines = (
+        select(
+            models.Cart.store_id.label("store_id"),
+            period.label("period"),
+            Purchase.product_price.label("price"),
+            latest_first.label("recency"),
+        )
+        .join(models.Cart, models.Cart.cart_id == Purchase.cart_id)
+        .where(
+            Purchase.product_id == product_id,
+            Purchase.input_date >= datetime.combine(start_date, datetime.min.time()),
+            Purchase.input_date <= datetime.combine(end_date, datetime.max.time()),
+        )
+    )
+    if store_id is not None:
+        lines = lines.where(models.Cart.store_id == store_id)
+    lines = lines.subquery()
+
+    stmt = (
+        select(
+            lines.c.store_id,
+            lines.c.period,
+            func.min(lines.c.price),
+            func.avg(lines.c.price),
+            func.max(lines.c.price),
+            func.max(case((lines.c.recency == 1, lines.c.price))),
+            func.count(),
+        )
+        .group_by(lines.c.store_id, lines.c.period)
+        .order_by(lines.c.store_id, lines.c.period)
+    )
+
+    series = {}
+    for row_store_id, period_value, low, mean, high, last, count in db.execute(stmt):
+        columns = series.get(row_store_id)
+        if columns is None:
+            columns = series[row_store_id] = {
+                "store_id": row_store_id, "period": [], "min": [], "avg": [], "max": [], "last": [], "count": [],
+            }
+        columns["period"].append(_as_date(period_value))
+        columns["min"].append(round(low, 2))
+        columns["avg"].append(round(mean, 2))
+        columns["max"].append(round(high, 2))
+        columns["last"].append(round(last, 2))
+        columns["count"].append(count)
+
+    return {
+        "product_id": product_id,
+        "granularity": granularity,
+        "start_date": start_date,
+        "end_date": end_date,
+        "stores": list(series.values()),
+    }
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Counts the SQL statements an engine sends to the database, for catching N+1
+# query patterns:
+#
+#     with assert_max_queries(engine, 2):
+#         client.get(f"/carts/{cart_id}/expanded")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Record every statement executed on engine (sync or async) inside the block."""
+    target = getattr(engine, "sync_engine", engine)
+    counter = QueryCounter()
+    event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", counter)
+
+
+@contextmanager
+def assert_max_queries(engine, limit: int):
+    """Raise AssertionError if the block executes more than limit statements."""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(counter.statements, 1))
+        raise AssertionError(f"{counter.count} SQL statements executed, limit is {limit}:\n{listing}")
@@ -0,0 +1,159 @@
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from sqlalchemy import bindparam, case, delete, func, insert, select
+from sqlalchemy.orm import Session
+from review_backend import models
+from review_backend.analytics import period_start
+
+# Incremental maintenance of the spending rollup tables. Every purchase write is
+# turned into signed "lines" (a create is +1 line, a delete -1, an update removes
+# the old line and adds the new one); lines are summed per rollup key and applied
+# with one executemany upsert per table, in the caller's transaction. A row whose
+# item_count drops to zero (every purchase behind it deleted) is deleted rather
+# than kept as an empty bucket, so the rollups hold exactly the groups the raw
+# GROUP BY over purchases returns. The statements are built once, so they compile
+# once and hit SQLAlchemy's cache.
+
+RollupLine = namedtuple("RollupLine", "cart_id product_id amount on_sale count")
+
+DAILY = models.UserDailyStoreSpend.__table__
+MONTHLY = models.UserMonthlyProductSpend.__table__
+
+
+def purchase_line(cart_id: int, product_id: int, price, quantity, on_sale, sign: int = 1) -> RollupLine:
+    return RollupLine(cart_id, product_id, sign * (price or 0.0) * (quantity or 0), bool(on_sale), sign)
+
+
+def cart_keys(cart_ids):
+    # The rollup dimensions that live on the cart
+    return select(models.Cart.cart_id, models.Cart.user_id, models.Cart.store_id, models.Cart.purchase_date).where(
+        models.Cart.cart_id.in_(cart_ids)
+    )
+
+
+DAILY_KEY = ["user_id", "day", "store_id"]
+DAILY_VALUES = ["total", "item_count", "sale_total", "sale_count"]
+MONTHLY_KEY = ["user_id", "month", "product_id"]
+MONTHLY_VALUES = ["total", "item_count"]
+
+
+def _upsert_increment(dialect: str, table, key_columns: list, value_columns: list):
+    # INSERT ... that adds the values onto an existing row with the same key; run as executemany
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+        stmt = dialect_insert(table)
+        return stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in value_columns})
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + stmt.excluded[column] for column in value_columns},
+    )
+
+
+def _prune_empty(table, key_columns: list):
+    # DELETE of a key's row once no purchases are left behind it; run as executemany
+    return delete(table).where(*[table.c[column] == bindparam(f"key_{column}") for column in key_columns], table.c.item_count <= 0)
+
+
+@lru_cache(maxsize=None)
+def upsert_statements(dialect: str) -> tuple:
+    return (
+        _upsert_increment(dialect, DAILY, DAILY_KEY, DAILY_VALUES),
+        _upsert_increment(dialect, MONTHLY, MONTHLY_KEY, MONTHLY_VALUES),
+    )
+
+
+PRUNE_STATEMENTS = (_prune_empty(DAILY, DAILY_KEY), _prune_empty(MONTHLY, MONTHLY_KEY))
+
+
+def _prune_rows(key_columns: list, groups: dict) -> list:
+    # Only keys whose count went down can have reached zero
+    return [{f"key_{column}": value for column, value in zip(key_columns, key)} for key, values in groups.items() if values[1] < 0]
+
+
+def rollup_statements(dialect: str, lines: list, carts: dict) -> list:
+    """(statement, parameter rows) pairs applying lines; carts maps cart_id to its cart_keys row."""
+    daily = defaultdict(lambda: [0.0, 0, 0.0, 0])
+    monthly = defaultdict(lambda: [0.0, 0])
+    for line in lines:
+        cart = carts.get(line.cart_id)
+        if cart is None:
+            continue
+        day = daily[(cart.user_id, cart.purchase_date, cart.store_id)]
+        day[0] += line.amount
+        day[1] += line.count
+        if line.on_sale:
+            day[2] += line.amount
+            day[3] += line.count
+        month = monthly[(cart.user_id, cart.purchase_date.replace(day=1), line.product_id)]
+        month[0] += line.amount
+        month[1] += line.count
+
+    daily_upsert, monthly_upsert = upsert_statements(dialect)
+    daily_prune, monthly_prune = PRUNE_STATEMENTS
+    statements = []
+    if daily:
+        rows = [
+            {"user_id": user_id, "day": day, "store_id": store_id, "total": total, "item_count": count, "sale_total": sale_total, "sale_count": sale_count}
+            for (user_id, day, store_id), (total, count, sale_total, sale_count) in daily.items()
+        ]
+        statements.append((daily_upsert, rows))
+        prune = _prune_rows(DAILY_KEY, daily)
+        if prune:
+            statements.append((daily_prune, prune))
+    if monthly:
+        rows = [
+            {"user_id": user_id, "month": month, "product_id": product_id, "total": total, "item_count": count}
+            for (user_id, month, product_id), (total, count) in monthly.items()
+        ]
+        statements.append((monthly_upsert, rows))
+        prune = _prune_rows(MONTHLY_KEY, monthly)
+        if prune:
+            statements.append((monthly_prune, prune))
+    return statements
+
+
+def apply_lines(db: Session, lines: list):
+    if not lines:
+        return
+    carts = {row.cart_id: row for row in db.execute(cart_keys({line.cart_id for line in lines}))}
+    for stmt, rows in rollup_statements(db.get_bind().dialect.name, lines, carts):
+        db.execute(stmt, rows)
+
+
+def backfill(db: Session, user_id: str = None):
+    """Rebuild the rollup tables (or one user's rows) from purchases in two INSERT ... SELECTs."""
+    amount = models.Purchase.product_price * models.Purchase.product_quantity
+    on_sale = func.coalesce(models.Purchase.on_sale, False)
+    user_filter = [models.Cart.user_id == user_id] if user_id else []
+
+    db.execute(delete(DAILY).where(*([DAILY.c.user_id == user_id] if user_id else [])))
+    db.execute(delete(MONTHLY).where(*([MONTHLY.c.user_id == user_id] if user_id else [])))
+
+    daily = (
+        select(
+            models.Cart.user_id, models.Cart.purchase_date, models.Cart.store_id,
+            func.sum(amount), func.count(models.Purchase.purchase_id),
+            func.coalesce(func.sum(case((on_sale, amount), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((on_sale, 1), else_=0)), 0),
+        )
+        .join(models.Cart, models.Cart.cart_id == models.Purchase.cart_id)
+        .where(*user_filter)
+        .group_by(models.Cart.user_id, models.Cart.purchase_date, models.Cart.store_id)
+    )
+    db.execute(insert(DAILY).from_select(["user_id", "day", "store_id", "total", "item_count", "sale_total", "sale_count"], daily))
+
+    month = period_start(db.get_bind().dialect.name, models.Cart.purchase_date, "month")
+    monthly = (
+        select(models.Cart.user_id, month, models.Purchase.product_id, func.sum(amount), func.count(models.Purchase.purchase_id))
+        .join(models.Cart, models.Cart.cart_id == models.Purchase.cart_id)
+        .where(*user_filter)
+        .group_by(models.Cart.user_id, month, models.Purchase.product_id)
+    )
+    db.execute(insert(MONTHLY).from_select(["user_id", "month", "product_id", "total", "item_count"], monthly))
+    db.commit()
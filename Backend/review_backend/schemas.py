@@ -1,6 +1,14 @@
 from pydantic import BaseModel
 from datetime import datetime, date
-from typing import Optional
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+### Pagination Schemas
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; null on the last page
 
 
 ### Store Schemas
@@ -41,12 +49,27 @@ class Product(BaseModel):
         from_attributes = True
 
 
+class ProductResolved(BaseModel):
+    product_id: int
+    created: bool
+
+
+class ProductResolveBatch(BaseModel):
+    products: List[ProductCreate]
+
+
+class ProductResolveBatchResponse(BaseModel):
+    product_ids: List[int]  # In request order
+    created: int
+
+
 ### Cart Schemas
 class CartCreate(BaseModel):
     purchase_date: date
     cart_total: float
     user_id: str
     store_id: int
+    cart_name: str = "Cart"
 
 
 class Cart(BaseModel):
@@ -91,16 +114,29 @@ class Purchase(BaseModel):
     cart_id: int
     product_price: float
     product_quantity: int
-    on_sale: bool
-    store_id: int
-    product_category: str
-    purchased: bool
+    on_sale: Optional[bool] = None  # Nullable columns; rows written outside the API can hold NULL
+    store_id: Optional[int] = None  # Not stored on purchases; present only when the caller joins it in
+    product_category: Optional[str] = None
+    purchased: Optional[bool] = None
     input_date: datetime
 
     class Config:
         from_attributes = True
 
 
+class PurchaseExpanded(Purchase):
+    product: Product
+
+
+class CartExpanded(Cart):
+    purchases: List[PurchaseExpanded] = []
+
+
+class PurchaseBulkResponse(BaseModel):
+    purchase_ids: List[int]
+    carts: List[CartResponse]
+
+
 class PurchaseUpdate(BaseModel):
     product_price: Optional[float]
     product_quantity: Optional[int]
@@ -173,6 +209,14 @@ class GroceryListItem(BaseModel):
         from_attributes = True
 
 
+class GroceryListItemExpanded(GroceryListItem):
+    product: Product
+
+
+class GroceryListExpanded(GroceryList):
+    items: List[GroceryListItemExpanded] = []
+
+
 ### Packaging Option Schemas
 class PackagingOptionCreate(BaseModel):
     packaging_type: str
@@ -197,3 +241,57 @@ class UnitOfMeasurement(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+### Analytics Schemas
+class SpendingPoint(BaseModel):
+    period: date  # First day of the day/week/month bucket
+    total: float
+    item_count: int
+
+
+class SpendingSeries(BaseModel):
+    user_id: str
+    granularity: str
+    points: List[SpendingPoint]
+
+
+class StoreSpending(BaseModel):
+    store_id: int
+    store_name: str
+    total: float
+    item_count: int
+
+
+class ProductSpending(BaseModel):
+    product_id: int
+    product_name: str
+    product_brand: str
+    total: float
+    item_count: int
+
+
+class SaleSpending(BaseModel):
+    on_sale: bool
+    total: float
+    item_count: int
+
+
+### Price History Schemas
+class StorePriceHistory(BaseModel):
+    # Columnar: element i of every list describes period[i]
+    store_id: int
+    period: List[date]  # First day of the day/week/month bucket
+    min: List[float]
+    avg: List[float]
+    max: List[float]
+    last: List[float]  # Price of the latest purchase in the bucket
+    count: List[int]
+
+
+class PriceHistory(BaseModel):
+    product_id: int
+    granularity: str
+    start_date: date
+    end_date: date
+    stores: List[StorePriceHistory]
@@ -0,0 +1,292 @@
+import bisect
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from review_backend import models
+
+# Product search. On MySQL the FULLTEXT index declared on models.Product does the
+# matching; elsewhere (SQLite) an in-process inverted index does. The in-process
+# index also supplies typo tolerance, which FULLTEXT lacks, when FULLTEXT finds
+# nothing.
+#
+# SEARCH_BACKEND: auto (FULLTEXT on MySQL, memory elsewhere) | fulltext | memory | like
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+SEARCH_FUZZY_FALLBACK = os.getenv("SEARCH_FUZZY_FALLBACK", "true").lower() in ("1", "true", "yes")
+# Products created by other workers are picked up by an incremental refresh this often;
+# writes in this worker mark the index stale so the next search refreshes first
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "30"))
+
+FIELD_WEIGHTS = {"name": 1.0, "brand": 0.5}
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.75
+FUZZY_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 64
+MAX_FUZZY_EXPANSIONS = 16
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return _TOKEN_RE.findall(text)
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    # Levenshtein distance, giving up early once every cell in a row exceeds limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class ProductSearchIndex:
+    """Inverted index over product name and brand tokens.
+
+    Postings hold product ids only; matching rows are fetched by primary key.
+    Prefix matches come from a sorted vocabulary, typo-tolerant matches from a
+    trigram index over the vocabulary.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = {field: defaultdict(list) for field in FIELD_WEIGHTS}
+        self.tokens = set()
+        self.trigram_tokens = defaultdict(set)
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self.ids = set()
+        self.refreshed_at = 0.0
+        self.stale = False
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def add(self, product_id: int, product_name: str, product_brand: str):
+        with self._lock:
+            if product_id in self.ids:
+                return
+            self.ids.add(product_id)
+            for field, text in (("name", product_name), ("brand", product_brand)):
+                field_postings = self.postings[field]
+                for token in set(tokenize(text)):
+                    if token not in self.tokens:
+                        self._add_token(token)
+                    field_postings[token].append(product_id)
+
+    def _add_token(self, token: str):
+        self.tokens.add(token)
+        for gram in trigrams(token):
+            self.trigram_tokens[gram].add(token)
+        self._vocabulary_dirty = True
+
+    def refresh(self, db: Session, batch_size: int = 10000):
+        """Index every product not indexed yet.
+
+        The ids are diffed rather than compared to the highest indexed id, so a lower
+        id committed after a higher one (concurrent transactions) is still picked up.
+        """
+        with self._lock:
+            self.stale = False
+            ids = db.execute(select(models.Product.product_id)).scalars()
+            missing = sorted(set(ids) - self.ids)
+            for start in range(0, len(missing), batch_size):
+                stmt = select(models.Product.product_id, models.Product.product_name, models.Product.product_brand).where(
+                    models.Product.product_id.in_(missing[start:start + batch_size])
+                )
+                for product_id, name, brand in db.execute(stmt):
+                    self.add(product_id, name, brand)
+            self.refreshed_at = time.monotonic()
+
+    def _vocabulary_list(self) -> list:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.tokens)
+            self._vocabulary_dirty = False
+        return self._vocabulary
+
+    def _document_frequency(self, token: str) -> int:
+        return sum(len(field_postings.get(token, ())) for field_postings in self.postings.values())
+
+    def _fuzzy_tokens(self, term: str) -> list:
+        grams = trigrams(term)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for token in self.trigram_tokens.get(gram, ()):
+                overlap[token] += 1
+        max_edits = 1 if len(term) <= 5 else 2
+        # Each edit destroys at most 3 of the term's trigrams, so a token within max_edits
+        # shares at least this many (q-gram lemma); edit distance has the final say. A
+        # similarity cutoff instead would reject short one-edit typos ("mlk" -> "milk": 0.29)
+        min_shared = max(1, len(grams) - 3 * max_edits)
+        matches = []
+        for token, shared in overlap.items():
+            if shared < min_shared:
+                continue
+            distance = edit_distance(term, token, max_edits)
+            if distance <= max_edits:
+                matches.append((token, distance, shared / len(grams | trigrams(token))))
+        # Fewest edits first, then most similar
+        matches.sort(key=lambda match: (match[1], -match[2], match[0]))
+        return [(token, FUZZY_WEIGHT * similarity) for token, _, similarity in matches[:MAX_FUZZY_EXPANSIONS]]
+
+    def expand(self, term: str, fuzzy: bool) -> list:
+        """(token, weight) pairs a query term matches: exact, then prefix, then fuzzy."""
+        vocabulary = self._vocabulary_list()
+        expansions = []
+        if term in self.tokens:
+            expansions.append((term, EXACT_WEIGHT))
+        start = bisect.bisect_right(vocabulary, term)
+        for token in vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            expansions.append((token, PREFIX_WEIGHT))
+        if fuzzy and not expansions and len(term) >= 3:
+            expansions.extend(self._fuzzy_tokens(term))
+        return expansions
+
+    def _weighted_postings(self, expansions: list) -> list:
+        # (score, postings) for every field/token the term matched, best first. IDF is
+        # taken per term, not per token, so an exact match always outranks a rarer completion
+        weighted = []
+        idf = math.log(1 + self.size / (1 + sum(self._document_frequency(token) for token, _ in expansions)))
+        for token, weight in expansions:
+            for field, field_weight in FIELD_WEIGHTS.items():
+                ids = self.postings[field].get(token)
+                if ids:
+                    weighted.append((weight * field_weight * idf, ids))
+        weighted.sort(key=lambda item: -item[0])
+        return weighted
+
+    def search(self, query: str, skip: int = 0, limit: int = 10, fuzzy: bool = True) -> list:
+        """Product ids matching every query term, best match first."""
+        with self._lock:
+            terms = list(dict.fromkeys(tokenize(query)))
+            if not terms:
+                return []
+            per_term = [self._weighted_postings(self.expand(term, fuzzy)) for term in terms]
+            if not all(per_term):
+                return []
+            wanted = skip + limit
+            if len(per_term) == 1:
+                # Postings are visited best-first, so the first wanted distinct ids are the answer
+                ranked = []
+                seen = set()
+                for _, ids in per_term[0]:
+                    for product_id in ids:
+                        if product_id not in seen:
+                            seen.add(product_id)
+                            ranked.append(product_id)
+                            if len(ranked) >= wanted:
+                                return ranked[skip:]
+                return ranked[skip:]
+
+            # Multi-term: intersect starting from the rarest term, summing each term's best score
+            per_term.sort(key=lambda weighted: sum(len(ids) for _, ids in weighted))
+            scores = {}
+            for score, ids in per_term[0]:
+                for product_id in ids:
+                    if product_id not in scores:
+                        scores[product_id] = score
+            for weighted in per_term[1:]:
+                matched = {}
+                for score, ids in weighted:
+                    for product_id in ids:
+                        if product_id in scores and product_id not in matched:
+                            matched[product_id] = scores[product_id] + score
+                scores = matched
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            return [product_id for product_id, _ in ranked[skip:wanted]]
+
+
+product_index = ProductSearchIndex()
+
+
+def get_index(db: Session) -> ProductSearchIndex:
+    if product_index.stale or time.monotonic() - product_index.refreshed_at > SEARCH_INDEX_REFRESH_SECONDS:
+        product_index.refresh(db)
+    return product_index
+
+
+def index_product(product):
+    # Called by crud.create_product so this worker sees new products immediately
+    if product_index.refreshed_at:
+        product_index.add(product.product_id, product.product_name, product.product_brand)
+
+
+def mark_stale():
+    # Called after committing products created in bulk (crud.resolve_product_batch,
+    # bulk_import), so the next search in this worker refreshes the index first
+    product_index.stale = True
+
+
+def _backend(db: Session) -> str:
+    if SEARCH_BACKEND != "auto":
+        return SEARCH_BACKEND
+    return "fulltext" if db.get_bind().dialect.name == "mysql" else "memory"
+
+
+def _fetch_in_order(db: Session, product_ids: list) -> list:
+    if not product_ids:
+        return []
+    products = db.query(models.Product).filter(models.Product.product_id.in_(product_ids)).all()
+    by_id = {product.product_id: product for product in products}
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+def _fulltext_search(db: Session, search: str, skip: int, limit: int) -> list:
+    from sqlalchemy.dialects.mysql import match
+
+    terms = tokenize(search)
+    if not terms:
+        return []
+    # Boolean mode: every term required, each as a prefix
+    relevance = match(
+        models.Product.product_name, models.Product.product_brand,
+        against=" ".join(f"+{term}*" for term in terms),
+    ).in_boolean_mode()
+    return (
+        db.query(models.Product)
+        .filter(relevance)
+        .order_by(relevance.desc(), models.Product.product_id)
+        .offset(skip).limit(limit).all()
+    )
+
+
+def _like_search(db: Session, search: str, skip: int, limit: int) -> list:
+    pattern = f"%{search}%"
+    return (
+        db.query(models.Product)
+        .filter(models.Product.product_name.ilike(pattern) | models.Product.product_brand.ilike(pattern))
+        .offset(skip).limit(limit).all()
+    )
+
+
+def search_products(db: Session, search: str, skip: int = 0, limit: int = 10) -> list:
+    backend = _backend(db)
+    if backend == "like":
+        return _like_search(db, search, skip, limit)
+    if backend == "fulltext":
+        products = _fulltext_search(db, search, skip, limit)
+        if products or not SEARCH_FUZZY_FALLBACK:
+            return products
+    return _fetch_in_order(db, get_index(db).search(search, skip=skip, limit=limit))
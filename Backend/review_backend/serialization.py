@@ -0,0 +1,67 @@
+import json
+import os
+import types
+import typing
+from datetime import date, datetime
+from starlette.responses import JSONResponse
+from sqlalchemy import null
+
+# Fast path for large list responses. The default path loads ORM objects, converts
+# each with from_orm and then FastAPI validates and serializes the list again
+# against response_model. Here the handler selects only the schema's columns as
+# tuples and returns them through orjson as a ready Response, which FastAPI passes
+# through untouched. Only used where the selected columns already match the
+# response_model field for field; response_model stays on the route for the
+# OpenAPI schema.
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "true").lower() in ("1", "true", "yes")
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+if orjson is not None:
+    # fastapi.responses.ORJSONResponse is deprecated; this is its render on Starlette's JSONResponse
+    class FastJSONResponse(JSONResponse):
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+else:
+    def _json_default(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+    class FastJSONResponse(JSONResponse):
+        def render(self, content) -> bytes:
+            return json.dumps(content, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def _accepts_none(field) -> bool:
+    annotation = field.annotation
+    return annotation is type(None) or (
+        typing.get_origin(annotation) in (typing.Union, types.UnionType) and type(None) in typing.get_args(annotation)
+    )
+
+
+def schema_columns(schema, model) -> list:
+    """Columns of model in the field order of schema; fields the table lacks select as NULL.
+
+    Rows selected this way skip response_model validation, so a nullable column has to
+    back a field that accepts None; otherwise the fast path would send nulls the schema
+    rejects.
+    """
+    table_columns = model.__table__.c
+    columns = []
+    for name, field in schema.model_fields.items():
+        if name not in table_columns:
+            columns.append(null().label(name))
+            continue
+        if table_columns[name].nullable and not _accepts_none(field):
+            raise TypeError(f"{schema.__name__}.{name} must be Optional: {model.__tablename__}.{name} is nullable")
+        columns.append(table_columns[name])
+    return columns
+
+
+def rows_response(keys, rows, headers: dict = None) -> FastJSONResponse:
+    keys = list(keys)
+    return FastJSONResponse([dict(zip(keys, row)) for row in rows], headers=headers)
@@ -0,0 +1,243 @@
+"""Sharded synthetic dataset generator for load testing.
+
+    python -m review_backend.shard_generation --products 100000 --stores 500 --carts 1000000 \\
+        --users 20000 --seed 42 --workers 4 --out ./dataset --format parquet
+
+Writes products, stores and users files plus carts/ and purchases/ shards (CSV or
+Parquet; Parquet needs pyarrow) and a manifest.json describing them, for the bulk
+loader to ingest. Nothing touches the database.
+
+Output is a pure function of the seed and the sizes: carts are split into fixed
+shards of --shard-size, each shard draws from its own SeedSequence child, and
+ids are derived from the shard index, so --workers only changes how fast the
+files appear. Product popularity follows a Zipf law, cart dates follow weekly
+and yearly seasonality, and carts are spread over many users with skewed
+activity.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from review_backend.data_generation import generate_products, generate_stores
+
+SHARD_SIZE = 50_000  # Carts per shard
+PRODUCT_ZIPF_EXPONENT = 1.1
+STORE_ZIPF_EXPONENT = 0.8
+USER_ZIPF_EXPONENT = 0.6
+HISTORY_DAYS = 2 * 365
+MIN_ITEMS, MAX_ITEMS = 3, 30
+SALE_PROBABILITY = 0.2
+SALE_DISCOUNT = 0.8
+# Monday..Sunday shopping volume
+WEEKDAY_WEIGHTS = np.array([0.8, 0.75, 0.85, 0.9, 1.1, 1.45, 1.3])
+
+
+def zipf_cdf(n: int, exponent: float, rng: np.random.Generator) -> tuple:
+    """(cdf, ids) where ids[i] has the i-th largest weight 1/(i+1)**exponent; sample with searchsorted."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return cdf, rng.permutation(n)
+
+
+def seasonal_day_cdf(start: date, days: int) -> np.ndarray:
+    # Yearly peak around mid-December, trough in mid-June, times the weekday pattern
+    day_numbers = np.arange(days)
+    ordinals = np.array([(start + timedelta(days=int(d))).timetuple().tm_yday for d in day_numbers])
+    weekdays = (start.weekday() + day_numbers) % 7
+    weights = (1 + 0.35 * np.cos(2 * np.pi * (ordinals - 350) / 365.25)) * WEEKDAY_WEIGHTS[weekdays]
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def user_ids(num_users: int) -> np.ndarray:
+    return np.array([f"user_{i:08d}" for i in range(1, num_users + 1)])
+
+
+def _sample(cdf: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    return np.minimum(np.searchsorted(cdf, rng.random(size)), len(cdf) - 1)
+
+
+# Per-process context, set once by the pool initializer instead of pickled per shard
+_context = {}
+
+
+def _init_worker(context: dict):
+    _context.update(context)
+
+
+def generate_shard(shard: int, seed_sequence: np.random.SeedSequence, num_carts: int) -> tuple:
+    """Carts and purchases DataFrames for one shard; purchases carry no purchase_id."""
+    ctx = _context
+    rng = np.random.default_rng(seed_sequence)
+    start_cart_id = shard * ctx["shard_size"] + 1
+    cart_ids = np.arange(start_cart_id, start_cart_id + num_carts)
+
+    days = _sample(ctx["day_cdf"], rng, num_carts)
+    seconds = np.clip(rng.normal(15.5, 3.0, num_carts), 7, 22.99) * 3600
+    cart_times = (
+        np.datetime64(ctx["start"], "s")
+        + days.astype("timedelta64[D]").astype("timedelta64[s]")
+        + seconds.astype("timedelta64[s]")
+    )
+    cart_users = ctx["users"][ctx["user_ids"][_sample(ctx["user_cdf"], rng, num_carts)]]
+    cart_stores = ctx["store_ids"][ctx["store_ranks"][_sample(ctx["store_cdf"], rng, num_carts)]]
+    items = rng.integers(MIN_ITEMS, MAX_ITEMS + 1, num_carts)
+
+    num_purchases = int(items.sum())
+    cart_index = np.repeat(np.arange(num_carts), items)
+    product_index = ctx["product_ranks"][_sample(ctx["product_cdf"], rng, num_purchases)]
+    on_sale = rng.random(num_purchases) < SALE_PROBABILITY
+    prices = ctx["base_prices"][product_index] * rng.uniform(0.9, 1.1, num_purchases)
+    prices = np.round(np.where(on_sale, prices * SALE_DISCOUNT, prices), 2)
+    quantities = np.minimum(rng.geometric(0.6, num_purchases), 12)
+
+    purchases = pd.DataFrame({
+        "product_id": ctx["product_ids"][product_index],
+        "cart_id": cart_ids[cart_index],
+        "product_quantity": quantities,
+        "product_price": prices,
+        "on_sale": on_sale,
+        "purchased": True,
+        "input_date": pd.to_datetime(cart_times[cart_index]),
+    })
+    carts = pd.DataFrame({
+        "cart_id": cart_ids,
+        "user_id": cart_users,
+        "cart_name": [f"Cart {cart_id}" for cart_id in cart_ids],
+        "purchase_date": pd.to_datetime(cart_times).date,
+        "store_id": cart_stores,
+        "cart_total": np.round(np.bincount(cart_index, weights=prices * quantities, minlength=num_carts), 2),
+    })
+    return carts, purchases
+
+
+def write_frame(df: pd.DataFrame, path: str, fmt: str):
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+
+def _write_shard(shard: int, seed_sequence, num_carts: int) -> dict:
+    started = time.perf_counter()
+    carts, purchases = generate_shard(shard, seed_sequence, num_carts)
+    out, fmt = _context["out"], _context["format"]
+    files = {}
+    for table, df in (("carts", carts), ("purchases", purchases)):
+        files[table] = os.path.join(table, f"part-{shard:05d}.{fmt}")
+        write_frame(df, os.path.join(out, files[table]), fmt)
+    return {
+        "shard": shard, "files": files, "carts": len(carts), "purchases": len(purchases),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def generate_dataset(out: str, num_products: int, num_stores: int, num_carts: int, num_users: int, seed: int = 0,
+                     workers: int = 1, fmt: str = "csv", shard_size: int = SHARD_SIZE, end: date = None) -> dict:
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+    started = time.perf_counter()
+    os.makedirs(os.path.join(out, "carts"), exist_ok=True)
+    os.makedirs(os.path.join(out, "purchases"), exist_ok=True)
+
+    # Child 0 seeds the reference tables and skew tables; children 1.. seed the shards
+    num_shards = -(-num_carts // shard_size)
+    root = np.random.SeedSequence(seed)
+    reference_seed, *shard_seeds = root.spawn(num_shards + 1)
+    rng = np.random.default_rng(reference_seed)
+
+    import faker
+    faker.Faker.seed(seed)
+    products = generate_products(rng, num_products)
+    stores = generate_stores(rng, num_stores)
+    users = pd.DataFrame({"user_id": user_ids(num_users)})
+    base_prices = np.round(rng.lognormal(mean=1.3, sigma=0.7, size=len(products)), 2) + 0.49
+    products_out = products.assign(base_price=base_prices)
+
+    end = end or date(2025, 12, 31)
+    start = end - timedelta(days=HISTORY_DAYS - 1)
+    product_cdf, product_ranks = zipf_cdf(len(products), PRODUCT_ZIPF_EXPONENT, rng)
+    store_cdf, store_ranks = zipf_cdf(len(stores), STORE_ZIPF_EXPONENT, rng)
+    user_cdf, user_ranks = zipf_cdf(num_users, USER_ZIPF_EXPONENT, rng)
+    context = {
+        "out": out, "format": fmt, "shard_size": shard_size, "start": start,
+        "day_cdf": seasonal_day_cdf(start, HISTORY_DAYS),
+        "product_ids": products["product_id"].to_numpy(), "base_prices": base_prices,
+        "product_cdf": product_cdf, "product_ranks": product_ranks,
+        "store_ids": stores["store_id"].to_numpy(), "store_cdf": store_cdf, "store_ranks": store_ranks,
+        "users": users["user_id"].to_numpy(), "user_cdf": user_cdf, "user_ids": user_ranks,
+    }
+
+    files = {}
+    for table, df in (("products", products_out), ("stores", stores), ("users", users)):
+        files[table] = f"{table}.{fmt}"
+        write_frame(df, os.path.join(out, files[table]), fmt)
+
+    shard_sizes = [min(shard_size, num_carts - shard * shard_size) for shard in range(num_shards)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as pool:
+            results = pool.map(_write_shard, range(num_shards), shard_seeds, shard_sizes)
+            shards = _report(results, num_shards, started)
+    else:
+        _init_worker(context)
+        shards = _report(map(_write_shard, range(num_shards), shard_seeds, shard_sizes), num_shards, started)
+
+    manifest = {
+        "seed": seed, "format": fmt, "shard_size": shard_size,
+        "date_range": [start.isoformat(), end.isoformat()],
+        "counts": {
+            "products": len(products), "stores": len(stores), "users": num_users,
+            "carts": sum(shard["carts"] for shard in shards), "purchases": sum(shard["purchases"] for shard in shards),
+        },
+        "files": files,
+        "shards": shards,
+    }
+    with open(os.path.join(out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _report(results, num_shards: int, started: float) -> list:
+    shards = []
+    purchases = 0
+    for result in results:
+        shards.append(result)
+        purchases += result["purchases"]
+        elapsed = time.perf_counter() - started
+        print(f"  shard {len(shards):>5}/{num_shards:<5} {purchases:>14,} purchases {purchases / elapsed:>12,.0f} rows/s", flush=True)
+    return shards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--stores", type=int, default=200)
+    parser.add_argument("--carts", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="carts per shard")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="last day of the two-year history")
+    parser.add_argument("--out", default="./dataset")
+    args = parser.parse_args(argv)
+
+    manifest = generate_dataset(
+        args.out, args.products, args.stores, args.carts, args.users, seed=args.seed, workers=args.workers,
+        fmt=args.format, shard_size=args.shard_size, end=args.end_date,
+    )
+    print(json.dumps(manifest["counts"]))
+
+
+if __name__ == "__main__":
+    main()
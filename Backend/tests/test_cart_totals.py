@@ -0,0 +1,66 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import update
+
+from review_backend import crud, models
+
+
+@pytest.fixture
+def cart(db):
+    user = models.User(user_id="total_user", created_at=datetime.now())
+    store = models.Store(store_name="Store", store_location="1 Broad St, Elizabeth, NJ 07201")
+    product = models.Product(
+        product_brand="Brand", product_name="Product", product_quantity=1, product_packaging="Box",
+        unit_quantity=1.0, unit_of_measurement="oz",
+    )
+    db.add_all([user, store, product])
+    db.flush()
+    cart = models.Cart(user_id=user.user_id, cart_name="Cart", purchase_date=date.today(), store_id=store.store_id, cart_total=0.0)
+    db.add(cart)
+    db.commit()
+    return cart
+
+
+def _purchase(cart, price: float, quantity: int) -> dict:
+    return {
+        "product_id": 1, "cart_id": cart.cart_id, "product_price": price, "product_quantity": quantity, "on_sale": False,
+        "store_id": cart.store_id, "product_category": "Pantry", "purchased": True, "input_date": "2024-01-01T12:00:00",
+    }
+
+
+def _total(client, cart) -> float:
+    return client.get(f"/carts/{cart.cart_id}").json()["cart_total"]
+
+
+def test_purchase_writes_keep_cart_total_in_step(client, db, cart):
+    first = client.post("/purchases/", json=_purchase(cart, 5.0, 1)).json()
+    assert _total(client, cart) == 5.0
+
+    client.post(f"/carts/{cart.cart_id}/purchases", json=[_purchase(cart, 3.5, 2)])
+    assert _total(client, cart) == 12.0
+
+    update_body = {key: value for key, value in _purchase(cart, 5.0, 2).items() if key not in ("product_id", "cart_id", "store_id")}
+    assert client.put(f"/purchases/{first['purchase_id']}", json=update_body).status_code == 200
+    assert _total(client, cart) == 17.0
+
+    added = client.post("/purchases/bulk", json=[_purchase(cart, 2.5, 2)]).json()
+    assert added["carts"] == [{"cart_id": cart.cart_id, "cart_total": 22.0}]
+    assert _total(client, cart) == 22.0
+
+    assert client.delete(f"/purchases/{added['purchase_ids'][0]}").status_code == 200
+    assert _total(client, cart) == 17.0
+
+    # The maintained total matches SUM(price * quantity) over the cart's purchases
+    assert crud.find_cart_total_drift(db) == []
+
+
+def test_reconcile_repairs_drifted_totals(client, db, cart):
+    client.post(f"/carts/{cart.cart_id}/purchases", json=[_purchase(cart, 5.0, 1), _purchase(cart, 3.5, 2)])
+    db.execute(update(models.Cart).where(models.Cart.cart_id == cart.cart_id).values(cart_total=100.0))
+    db.commit()
+
+    drifted = crud.reconcile_cart_totals(db)
+    assert [(row.cart_id, row.cart_total, row[2]) for row in drifted] == [(cart.cart_id, 100.0, 12.0)]
+    assert crud.find_cart_total_drift(db) == []
+    assert _total(client, cart) == 12.0
@@ -0,0 +1,154 @@
+import mongomock
+import pymongo
+import pytest
+from pymongo.errors import NetworkTimeout, OperationFailure, ServerSelectionTimeoutError
+
+import app
+import database
+import indexes
+
+
+@pytest.fixture
+def mongo():
+    client = mongomock.MongoClient()
+    database.set_client(client)
+    yield client
+    database.set_client(None)
+
+
+@pytest.fixture
+def flask_client(mongo):
+    return app.app.test_client()
+
+
+def test_client_is_created_lazily_and_reused():
+    database.set_client(None)
+    try:
+        client = database.get_client()
+        assert isinstance(client, pymongo.MongoClient)
+        assert database.get_client() is client
+        # connect=False: nothing is opened until the first operation
+        assert not client._topology._opened
+        assert client.options.pool_options.max_pool_size == database.MONGODB_MAX_POOL_SIZE
+        assert client.options.server_selection_timeout == database.MONGODB_SERVER_SELECTION_TIMEOUT_MS / 1000
+    finally:
+        database.get_client().close()
+        database.set_client(None)
+
+
+def test_health_check_reports_unreachable_server():
+    database.set_client(database.create_client("mongodb://127.0.0.1:1", serverSelectionTimeoutMS=200))
+    try:
+        response = app.app.test_client().get("/test")
+    finally:
+        database.get_client().close()
+        database.set_client(None)
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "unavailable"
+    assert response.get_json()["mongo"]["ok"] is False
+
+
+def test_health_check_ok(flask_client):
+    response = flask_client.get("/test")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok", "mongo": {"ok": True}}
+
+
+def test_insert_then_find(flask_client, mongo):
+    documents = [{"_id": i, "name": f"List {i}", "items": [{"name": "milk"}] if i % 2 else []} for i in range(5)]
+    response = flask_client.post("/database/insert", json={"documents": documents})
+    assert response.status_code == 200
+    assert response.get_json()["inserted_ids"] == [0, 1, 2, 3, 4]
+    assert database.grocery_list(mongo).count_documents({}) == 5
+
+    response = flask_client.post("/database/find", json={"filter": {"items.name": "milk"}, "projection": ["name"], "sort": {"name": -1}})
+    assert response.status_code == 200
+    assert response.get_json() == [{"_id": 3, "name": "List 3"}, {"_id": 1, "name": "List 1"}]
+
+    first = flask_client.post("/database/find", json={"cursor": None, "limit": 3}).get_json()
+    assert [document["_id"] for document in first["documents"]] == [0, 1, 2]
+    rest = flask_client.post("/database/find", json={"cursor": first["next_cursor"], "limit": 3}).get_json()
+    assert [document["_id"] for document in rest["documents"]] == [3, 4]
+    assert rest["next_cursor"] is None
+
+
+def test_cursor_paging_rejects_skip(flask_client):
+    flask_client.post("/database/insert", json={"documents": [{"_id": i} for i in range(5)]})
+    response = flask_client.post("/database/find", json={"cursor": None, "skip": 2, "limit": 2})
+    assert response.status_code == 400
+    assert "skip" in response.get_json()["error"]
+    # skip 0 is the default and allowed
+    assert flask_client.post("/database/find", json={"cursor": None, "skip": 0, "limit": 2}).status_code == 200
+
+
+def test_insert_reports_partial_failure(flask_client):
+    flask_client.post("/database/insert", json={"documents": [{"_id": 1, "name": "Weekly"}]})
+    response = flask_client.post("/database/insert", json={"documents": [{"_id": 1, "name": "Again"}, {"_id": 2, "name": "Party"}]})
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body["inserted_ids"] == [2]
+    assert [error["index"] for error in body["write_errors"]] == [0]
+
+
+def test_invalid_bodies_are_400(flask_client):
+    assert flask_client.post("/database/find", json={"filter": ["milk"], "limit": 1}).status_code == 400
+    assert flask_client.post("/database/insert", json={"documents": ["milk"]}).status_code == 400
+    assert flask_client.post("/database/insert", data="not json", content_type="application/json").status_code == 400
+
+
+@pytest.mark.parametrize("error, status", [
+    (ServerSelectionTimeoutError("no servers"), 503),
+    (NetworkTimeout("timed out"), 503),
+    (OperationFailure("operation exceeded time limit", 50), 503),
+    (OperationFailure("not authorized", 13), 400),
+])
+def test_write_errors_are_json(flask_client, monkeypatch, error, status):
+    def insert_many(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(mongomock.collection.Collection, "insert_many", insert_many)
+    response = flask_client.post("/database/insert", json={"documents": [{"name": "Weekly"}]})
+    assert response.status_code == status
+    assert response.get_json() == {"error": str(error)}
+
+
+def test_find_connection_error_is_503(flask_client, monkeypatch):
+    def find(*args, **kwargs):
+        raise ServerSelectionTimeoutError("no servers")
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find", find)
+    response = flask_client.post("/database/find", json={})
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "no servers"}
+
+
+def test_async_write_errors_are_json(monkeypatch):
+    from fastapi.testclient import TestClient
+    import async_app
+
+    async def rejected(*args):
+        raise OperationFailure("not authorized", 13)
+
+    async def unreachable(*args):
+        raise ServerSelectionTimeoutError("no servers")
+
+    with TestClient(async_app.app) as client:
+        monkeypatch.setattr(async_app, "Database_Query", rejected)
+        response = client.post("/database/update", json={"operations": []})
+        assert (response.status_code, response.json()) == (400, {"error": "not authorized"})
+        monkeypatch.setattr(async_app, "Database_Query", unreachable)
+        response = client.post("/database/insert", json={"documents": [{"name": "Weekly"}]})
+        assert (response.status_code, response.json()) == (503, {"error": "no servers"})
+
+
+def test_index_keys_come_from_the_environment_format(mongo):
+    specs = indexes.parse_indexes('[[["owner", 1], ["name", -1]], [["items.name", 1]]]')
+    assert [index.document["key"] for index in specs] == [{"owner": 1, "name": -1}, {"items.name": 1}]
+    assert indexes.parse_indexes("[]") == []
+    assert indexes.ensure_indexes(database.grocery_list(mongo), specs) == ["owner_1_name_-1", "items.name_1"]
+
+
+@pytest.mark.parametrize("text", ["owner", '{"owner": 1}', '[["owner", 1]]', '[[["owner"]]]'])
+def test_invalid_index_keys_are_rejected(text):
+    with pytest.raises(ValueError):
+        indexes.parse_indexes(text)
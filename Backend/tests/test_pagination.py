@@ -0,0 +1,67 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from review_backend import models, pagination
+
+
+def _pages(client, path: str, **params) -> list:
+    # Follow next_cursor to the end; returns the ids of each page
+    pages, cursor = [], None
+    while True:
+        body = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def carts(db):
+    user = models.User(user_id="page_user", created_at=datetime.now())
+    store = models.Store(store_name="Store", store_location="1 Broad St, Elizabeth, NJ 07201")
+    db.add_all([user, store])
+    db.flush()
+    # Several carts share a date, so the date order has to fall back to cart_id
+    dates = [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 2)]
+    db.add_all(models.Cart(user_id=user.user_id, cart_name="Cart", purchase_date=day, store_id=store.store_id, cart_total=0.0) for day in dates)
+    db.commit()
+    return [(cart.purchase_date, cart.cart_id) for cart in db.query(models.Cart)]
+
+
+def test_cursor_round_trip_visits_every_row_once(client, carts):
+    pages = _pages(client, "/carts/page/", limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [cart["cart_id"] for page in pages for cart in page] == sorted(cart_id for _, cart_id in carts)
+
+
+def test_date_order_breaks_ties_on_cart_id(client, carts):
+    pages = _pages(client, "/carts/page/", limit=2, order="date")
+    ids = [cart["cart_id"] for page in pages for cart in page]
+    assert ids == [cart_id for _, cart_id in sorted(carts, reverse=True)]
+
+
+def test_last_page_has_no_next_cursor(client, carts):
+    body = client.get("/carts/page/", params={"limit": len(carts)}).json()
+    assert len(body["items"]) == len(carts)
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "W10", pagination.encode_cursor("date", ["2024-01-01", 1])])
+def test_bad_cursor_is_400(client, carts, cursor):
+    # Garbage, a cursor with no values, and one issued for another ordering
+    response = client.get("/carts/page/", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/stores/page/", "/products/page/", "/carts/page/", "/purchases/page/"])
+@pytest.mark.parametrize("limit", [0, -1, pagination.MAX_PAGE_SIZE + 1])
+def test_limit_out_of_range_is_rejected(client, path, limit):
+    assert client.get(path, params={"limit": limit}).status_code == 422
+
+
+def test_paginate_rejects_empty_pages(db):
+    with pytest.raises(HTTPException) as error:
+        pagination.paginate(db.query(models.Store), [models.Store.store_id], "id", limit=0)
+    assert error.value.status_code == 400
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+
+from review_backend import crud, models
+from review_backend.database import SessionLocal
+
+THREADS = 8
+
+PRODUCT = {
+    "product_brand": "Acme", "product_name": "Racing Oats", "product_quantity": 1.0,
+    "product_packaging": "Bag", "unit_quantity": 2.5, "unit_of_measurement": "lb",
+}
+
+
+def _race(resolve) -> list:
+    # Every thread resolves at the same moment on its own session
+    barrier = threading.Barrier(THREADS)
+
+    def worker(index: int):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            return resolve(db, index)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(worker, range(THREADS)))
+
+
+def _stored(db) -> int:
+    return db.execute(select(func.count()).select_from(models.Product)).scalar()
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_racing_resolves_create_exactly_one_product(db, batched):
+    def resolve(session, index):
+        products = [PRODUCT, {**PRODUCT, "product_name": f"Other {index}"}] if batched else [PRODUCT]
+        product_ids, _ = crud.resolve_product_batch(session, products)
+        return product_ids[0]
+
+    product_ids = _race(resolve)
+    assert len(set(product_ids)) == 1
+    assert db.execute(select(func.count()).select_from(models.Product).where(models.Product.product_name == "Racing Oats")).scalar() == 1
+    assert _stored(db) == (1 + THREADS if batched else 1)
+
+
+def test_racing_resolve_routes_agree(client, db):
+    def resolve(session, index):
+        if index % 2:
+            response = client.put("/products/resolve/batch", json={"products": [PRODUCT]})
+            return response.json()["product_ids"][0]
+        return client.put("/products/resolve", json=PRODUCT).json()["product_id"]
+
+    product_ids = _race(resolve)
+    assert len(set(product_ids)) == 1
+    assert _stored(db) == 1
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+import pytest
+
+from review_backend import models
+from review_backend.query_counter import assert_max_queries
+
+# SQL statement budget per read endpoint. A lazy-loading regression (one query per
+# purchase or item) fails here instead of turning into a slow page.
+BUDGETS = [
+    ("/carts/{cart_id}", 1),
+    ("/carts/{cart_id}/expanded", 2),
+    ("/grocery_lists/{list_id}/expanded", 2),
+    ("/grocery_lists/{list_id}/items/", 1),
+]
+ITEMS = 25  # Purchases in the cart and items in the grocery list
+
+
+@pytest.fixture
+def ids(db):
+    user = models.User(user_id="budget_user", created_at=datetime.now())
+    store = models.Store(store_name="Store", store_location="1 Broad St, Elizabeth, NJ 07201")
+    db.add_all([user, store])
+    db.flush()
+    products = [
+        models.Product(
+            product_brand="Brand", product_name=f"Product {i}", product_quantity=1, product_packaging="Box",
+            unit_quantity=1.0, unit_of_measurement="oz",
+        )
+        for i in range(ITEMS)
+    ]
+    cart = models.Cart(user_id=user.user_id, cart_name="Cart", purchase_date=date.today(), store_id=store.store_id, cart_total=0.0)
+    grocery_list = models.GroceryList(name="Weekly", user_id=user.user_id, created_at=datetime.now())
+    db.add_all([*products, cart, grocery_list])
+    db.flush()
+    db.add_all(
+        models.Purchase(
+            product_id=product.product_id, cart_id=cart.cart_id, product_quantity=1, product_price=1.0,
+            on_sale=False, purchased=True, input_date=datetime.now(),
+        )
+        for product in products
+    )
+    db.add_all(models.GroceryListItem(grocery_list_id=grocery_list.list_id, product_id=product.product_id) for product in products)
+    db.commit()
+    return {"cart_id": cart.cart_id, "list_id": grocery_list.list_id}
+
+
+@pytest.mark.parametrize("template, budget", BUDGETS)
+def test_read_stays_within_statement_budget(client, engine, ids, template, budget):
+    path = template.format(**ids)
+    with assert_max_queries(engine, budget):
+        response = client.get(path)
+    assert response.status_code == 200
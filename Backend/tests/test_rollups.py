@@ -0,0 +1,87 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from review_backend import analytics, models, rollups
+
+USER = "rollup_user"
+
+
+@pytest.fixture
+def carts(db):
+    db.add_all([
+        models.User(user_id=USER, created_at=datetime.now()),
+        models.User(user_id="other_user", created_at=datetime.now()),
+        models.Store(store_name="Corner", store_location="1 Broad St, Elizabeth, NJ 07201"),
+        models.Store(store_name="Market", store_location="2 Broad St, Elizabeth, NJ 07201"),
+    ])
+    db.add_all(
+        models.Product(
+            product_brand="Brand", product_name=name, product_quantity=1, product_packaging="Box",
+            unit_quantity=1.0, unit_of_measurement="oz",
+        )
+        for name in ("Milk", "Bread", "Eggs")
+    )
+    db.flush()
+    carts = [
+        models.Cart(user_id=user_id, cart_name="Cart", purchase_date=day, store_id=store_id, cart_total=0.0)
+        for user_id, day, store_id in [
+            (USER, date(2024, 1, 5), 1), (USER, date(2024, 1, 20), 2), (USER, date(2024, 2, 3), 1),
+            (USER, date(2024, 2, 10), 2), ("other_user", date(2024, 1, 5), 1),
+        ]
+    ]
+    db.add_all(carts)
+    db.commit()
+    return [cart.cart_id for cart in carts]
+
+
+def _purchase(cart_id: int, product_id: int, price: float, quantity: int, on_sale: bool = False) -> dict:
+    return {
+        "product_id": product_id, "cart_id": cart_id, "product_price": price, "product_quantity": quantity, "on_sale": on_sale,
+        "store_id": 1, "product_category": "Pantry", "purchased": True, "input_date": "2024-01-01T12:00:00",
+    }
+
+
+def _analytics(db, monkeypatch, use_rollups: bool) -> dict:
+    monkeypatch.setattr(analytics, "ANALYTICS_USE_ROLLUPS", use_rollups)
+    return {
+        **{granularity: analytics.spending_over_time(db, USER, granularity=granularity) for granularity in analytics.GRANULARITIES},
+        "january": analytics.spending_over_time(db, USER, "day", start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)),
+        "stores": analytics.spending_by_store(db, USER),
+        "products": analytics.spending_by_product(db, USER),
+        "february_products": analytics.spending_by_product(db, USER, start_date=date(2024, 2, 1), end_date=date(2024, 2, 29)),
+        "sales": analytics.spending_by_sale(db, USER),
+    }
+
+
+def test_rollups_match_raw_aggregates_after_writes(client, db, carts, monkeypatch):
+    jan_5, jan_20, feb_3, feb_10, other = carts
+    client.post("/purchases/", json=_purchase(jan_5, 1, 3.25, 2))
+    client.post("/purchases/bulk", json=[
+        _purchase(jan_5, 2, 4.0, 1, on_sale=True), _purchase(jan_20, 3, 2.5, 4), _purchase(feb_3, 1, 3.5, 1),
+        _purchase(feb_3, 2, 6.0, 3, on_sale=True), _purchase(other, 1, 9.0, 1),
+    ])
+    alone = client.post(f"/carts/{feb_10}/purchases", json=[_purchase(feb_10, 3, 7.0, 1)]).json()["purchase_ids"][0]
+    updated = client.post("/purchases/", json=_purchase(jan_20, 2, 1.0, 1)).json()["purchase_id"]
+
+    body = _purchase(jan_20, 2, 5.5, 2, on_sale=True)
+    client.put(f"/purchases/{updated}", json={key: value for key, value in body.items() if key not in ("product_id", "cart_id", "store_id")})
+    # The only purchase of its day, store and month-product
+    client.delete(f"/purchases/{alone}")
+
+    rolled_up = _analytics(db, monkeypatch, True)
+    assert rolled_up == _analytics(db, monkeypatch, False)
+    assert [point["period"] for point in rolled_up["day"]] == [date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 3)]
+    assert rolled_up["month"] == [
+        {"period": date(2024, 1, 1), "total": 31.5, "item_count": 4},
+        {"period": date(2024, 2, 1), "total": 21.5, "item_count": 2},
+    ]
+
+
+def test_deleting_every_purchase_leaves_no_rollup_rows(client, db, carts):
+    ids = client.post("/purchases/bulk", json=[_purchase(carts[0], 1, 3.0, 1), _purchase(carts[0], 2, 2.0, 1, on_sale=True)]).json()["purchase_ids"]
+    for purchase_id in ids:
+        client.delete(f"/purchases/{purchase_id}")
+    assert db.execute(select(func.count()).select_from(rollups.DAILY)).scalar() == 0
+    assert db.execute(select(func.count()).select_from(rollups.MONTHLY)).scalar() == 0
@@ -0,0 +1,70 @@
+import io
+
+from review_backend import bulk_import, models, search
+
+MILK = {
+    "product_brand": "Acme", "product_name": "Whole Milk", "product_quantity": 1.0,
+    "product_packaging": "Carton", "unit_quantity": 64.0, "unit_of_measurement": "oz",
+}
+
+
+def _product(**fields) -> dict:
+    return {**MILK, **fields}
+
+
+def _search_names(client, query: str) -> list:
+    response = client.get("/products/search/", params={"search": query})
+    return [product["product_name"] for product in response.json()] if response.status_code == 200 else []
+
+
+def test_fuzzy_match_accepts_short_one_edit_typos(product_index):
+    product_index.add(1, "Whole Milk", "Acme")
+    product_index.add(2, "Orange Juice", "Sunny")
+    # "mlk" shares only 2 of 7 trigrams with "milk" (similarity 0.29) but is one edit away
+    assert product_index.search("mlk") == [1]
+    assert product_index.search("juce") == [2]
+    assert product_index.search("xyz") == []
+
+
+def test_fuzzy_match_prefers_fewer_edits(product_index):
+    product_index.add(1, "Sourdoughs", "Acme")
+    product_index.add(2, "Sourdough", "Acme")
+    # One edit from "sourdough", two from "sourdoughs"
+    assert product_index.search("sourdogh") == [2, 1]
+
+
+def test_refresh_picks_up_ids_below_the_highest_indexed(db, product_index):
+    db.add(models.Product(product_id=10, **_product(product_name="Rye Bread")))
+    db.commit()
+    product_index.refresh(db)
+    # Committed after id 10, e.g. by a transaction that took its id first
+    db.add(models.Product(product_id=5, **_product(product_name="Sourdough Bread")))
+    db.commit()
+    product_index.refresh(db)
+    assert sorted(product_index.search("bread")) == [5, 10]
+    assert product_index.size == 2
+
+
+def test_resolved_products_are_searchable_immediately(client):
+    client.post("/products/", json=_product(product_name="Rye Bread"))
+    assert _search_names(client, "bread") == ["Rye Bread"]
+
+    response = client.put("/products/resolve", json=_product(product_name="Oat Milk"))
+    assert response.json()["created"]
+    assert _search_names(client, "oat") == ["Oat Milk"]
+
+    response = client.put("/products/resolve/batch", json={"products": [_product(product_name="Goat Cheese")]})
+    assert response.json()["created"] == 1
+    assert _search_names(client, "cheese") == ["Goat Cheese"]
+
+
+def test_imported_products_are_searchable_immediately(db, client):
+    client.post("/products/", json=_product(product_name="Rye Bread"))
+    assert _search_names(client, "bread") == ["Rye Bread"]
+
+    csv = "product_brand,product_name,product_quantity,product_packaging,unit_quantity,unit_of_measurement\n"
+    csv += "Acme,Almond Butter,1,Jar,16,oz\n"
+    report = bulk_import.import_file(db, "products", io.BytesIO(csv.encode()), fmt="csv")
+    assert report.to_dict()["imported"] == 1
+    assert search.product_index.stale
+    assert _search_names(client, "almond") == ["Almond Butter"]
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import update
+
+from review_backend import models, serialization
+
+
+@pytest.fixture
+def cart_id(db):
+    db.add_all([
+        models.User(user_id="serial_user", created_at=datetime.now()),
+        models.Store(store_name="Store", store_location="1 Broad St, Elizabeth, NJ 07201"),
+        models.Product(
+            product_brand="Brand", product_name="Product", product_quantity=1, product_packaging="Box",
+            unit_quantity=1.0, unit_of_measurement="oz",
+        ),
+    ])
+    db.flush()
+    cart = models.Cart(user_id="serial_user", cart_name="Cart", purchase_date=date(2024, 1, 5), store_id=1, cart_total=0.0)
+    db.add(cart)
+    db.flush()
+    db.add_all(
+        models.Purchase(product_id=1, cart_id=cart.cart_id, product_quantity=1, product_price=price, input_date=datetime(2024, 1, 5, 12))
+        for price in (1.0, 2.5)
+    )
+    db.flush()
+    # Rows written outside the API, e.g. by a bulk load, can leave the flags NULL
+    db.execute(update(models.Purchase).where(models.Purchase.product_price == 2.5).values(on_sale=None, purchased=None))
+    db.commit()
+    return cart.cart_id
+
+
+@pytest.mark.parametrize("path", ["/purchases/", "/purchases/cart/{cart_id}"])
+def test_fast_path_matches_validated_path(client, monkeypatch, cart_id, path):
+    path = path.format(cart_id=cart_id)
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", True)
+    fast = client.get(path)
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", False)
+    validated = client.get(path)
+    assert fast.status_code == validated.status_code == 200
+    assert fast.json() == validated.json()
+    assert [(row["on_sale"], row["purchased"]) for row in fast.json()] == [(False, True), (None, None)]
+
+
+def test_schema_columns_rejects_non_optional_nullable_field():
+    class StrictPurchase(BaseModel):
+        purchase_id: int
+        on_sale: bool
+
+    with pytest.raises(TypeError, match="on_sale"):
+        serialization.schema_columns(StrictPurchase, models.Purchase)